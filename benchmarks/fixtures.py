@@ -0,0 +1,78 @@
+import json
+import random
+from pathlib import Path
+
+BENCH_FEATURE = """Feature: Benchmark {index}
+  Scenario: Escenario de benchmark {index}
+    Given un paso de benchmark
+    When otro paso de benchmark
+    Then el paso de benchmark termina
+"""
+
+BENCH_STEPS = """from behave import given, when, then
+
+
+@given('un paso de benchmark')
+@when('otro paso de benchmark')
+@then('el paso de benchmark termina')
+def step_benchmark(context):
+    pass
+"""
+
+
+def fake_behave_json(scenarios, modules=1, steps_per_scenario=5, failure_rate=0.05, seed=1):
+    """Features de behave en formato JSON con duraciones log-normales (en ns, como behave)"""
+    rng = random.Random(seed)
+    features = []
+    per_module = max(scenarios // modules, 1)
+    for module_index in range(modules):
+        module_name = f"module_bench_{module_index:03d}"
+        elements = []
+        for scenario_index in range(per_module):
+            location = f"modules/{module_name}/features/bench.feature:{scenario_index * 10 + 3}"
+            failing_step = rng.randrange(steps_per_scenario) if rng.random() < failure_rate else None
+            steps = []
+            for step_index in range(steps_per_scenario):
+                if failing_step is not None and step_index > failing_step:
+                    result = {'status': 'skipped', 'duration': 0}
+                else:
+                    result = {
+                        'status': 'failed' if step_index == failing_step else 'passed',
+                        'duration': int(rng.lognormvariate(-1.0, 0.8) * 1e9)
+                    }
+                    if step_index == failing_step:
+                        result['error_message'] = "AssertionError: Login no exitoso"
+                steps.append({
+                    'keyword': ('Given', 'When', 'Then', 'And', 'And')[step_index % 5],
+                    'name': f"paso {step_index} del escenario \"{scenario_index}\"",
+                    'location': f"modules/{module_name}/features/bench.feature:{scenario_index * 10 + 4 + step_index}",
+                    'result': result
+                })
+            elements.append({
+                'type': 'scenario',
+                'keyword': 'Scenario',
+                'name': f"Escenario {scenario_index}",
+                'location': location,
+                'tags': ['bench'],
+                'status': 'failed' if failing_step is not None else 'passed',
+                'module': module_name,
+                'steps': steps
+            })
+        features.append({'keyword': 'Feature', 'name': f"Benchmark {module_name}", 'elements': elements})
+    return features
+
+
+def write_fake_behave_json(path, scenarios, **kwargs):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fake_behave_json(scenarios, **kwargs), f)
+    return path
+
+
+def write_bench_module(root, index):
+    """Módulo mínimo (``modules/module_bench_N``) con la estructura de los módulos reales"""
+    module_dir = Path(root) / "modules" / f"module_bench_{index:03d}"
+    (module_dir / "features").mkdir(parents=True, exist_ok=True)
+    (module_dir / "steps").mkdir(parents=True, exist_ok=True)
+    (module_dir / "features" / "bench.feature").write_text(BENCH_FEATURE.format(index=index), encoding='utf-8')
+    (module_dir / "steps" / "bench_steps.py").write_text(BENCH_STEPS, encoding='utf-8')
+    return module_dir.name
@@ -0,0 +1,94 @@
+"""Presupuesto de tiempo de importación (``-X importtime``) para los CLI y módulos del framework.
+
+Cada caso se ejecuta en un intérprete nuevo; se toma el mínimo de varias repeticiones
+(suma del tiempo propio de cada import) y se compara contra su presupuesto. Además
+verifica que los módulos pesados (dotenv, win32com, allure, numpy, Pillow, reporter)
+no se carguen donde no se usan.
+
+Uso: python benchmarks/import_budget.py [--repeats 5] [--scale 1.5] [--output resultados.json]
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("dotenv", "win32com", "allure", "numpy", "PIL", "src.reporting.html_reporter")
+
+# (nombre, argumentos del intérprete, presupuesto en ms, módulos que no deben importarse)
+CASES = (
+    ("run_tests --list", ["scripts/run_tests.py", "--list"], 45,
+     HEAVY_MODULES + ("src.config.config",)),
+    ("run_module --list", ["scripts/run_module.py", "--list"], 45,
+     HEAVY_MODULES + ("src.config.config",)),
+    ("run_all_modules --help", ["scripts/run_all_modules.py", "--help"], 75,
+     HEAVY_MODULES + ("pstats", "tracemalloc")),
+    ("import src.config.config", ["-c", "import src.config.config"], 20, ("dotenv",)),
+    ("import src.core.sap_login", ["-c", "import src.core.sap_login"], 65,
+     ("dotenv", "win32com", "subprocess")),
+    ("import src.reporting.html_reporter", ["-c", "import src.reporting.html_reporter"], 80,
+     ("dotenv", "allure", "numpy", "PIL", "concurrent.futures.process")),
+)
+
+
+def measure_imports(args):
+    """Ejecuta ``python -X importtime <args>``; retorna (ms totales, módulos importados)"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.add(name.strip())
+    return total_us / 1000.0, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación del framework SAP")
+    parser.add_argument("--repeats", type=int, default=int(os.getenv("IMPORT_BUDGET_REPEATS", "5")))
+    parser.add_argument("--scale", type=float, default=float(os.getenv("IMPORT_BUDGET_SCALE", "1.0")),
+                        help="Multiplicador de los presupuestos (máquinas de CI más lentas)")
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    args = parser.parse_args()
+
+    results = []
+    failures = 0
+    for name, case_args, budget_ms, forbidden in CASES:
+        samples = []
+        imported = set()
+        for _ in range(max(1, args.repeats)):
+            total_ms, imported = measure_imports(case_args)
+            samples.append(total_ms)
+        elapsed_ms = min(samples)
+        budget = budget_ms * args.scale
+        loaded = sorted(module for module in imported
+                        if any(module == heavy or module.startswith(f"{heavy}.") for heavy in forbidden))
+        ok = elapsed_ms <= budget and not loaded
+        failures += not ok
+        icon = "✅" if ok else "❌"
+        print(f"{icon} {name}: {elapsed_ms:.1f} ms (presupuesto {budget:.0f} ms, {len(imported)} módulos)")
+        if loaded:
+            print(f"   ⚠️  Importa módulos pesados: {', '.join(loaded)}")
+        results.append({'case': name, 'import_ms': round(elapsed_ms, 2), 'budget_ms': budget,
+                        'modules': len(imported), 'forbidden_loaded': loaded, 'ok': ok})
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if failures:
+        print(f"❌ {failures} casos fuera de presupuesto")
+        return 1
+    print("✅ Tiempos de importación dentro del presupuesto")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Benchmarks del framework contra el backend SAP simulado.
+
+Uso: python benchmarks/run_benchmarks.py [--quick] [--baseline archivo] [--save-baseline]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import importlib.util
+from pathlib import Path
+from datetime import datetime
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+# Backend simulado y sin esperas fijas: se mide el framework, no los sleeps
+os.environ.setdefault("SAP_BACKEND", "simulated")
+os.environ.setdefault("SAP_LOGIN_WAIT", "0")
+os.environ.setdefault("SAP_COM_PROFILE", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fixtures import write_bench_module, write_fake_behave_json
+from src.core import sap_simulator
+from src.core.sap_login import SAPLogin
+from src.core.sap_utils import close_sap_popups
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+DEFAULT_BASELINE = RESULTS_DIR / "baseline.json"
+
+
+def measure(func, repeats=5, warmup=1, setup=None):
+    """Ejecuta ``func`` ``repeats`` veces (más ``warmup``) y retorna estadísticas en segundos"""
+    samples = []
+    for iteration in range(warmup + repeats):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        func(argument) if setup else func()
+        elapsed = time.perf_counter() - start
+        if iteration >= warmup:
+            samples.append(elapsed)
+    samples.sort()
+    return {
+        'repeats': repeats,
+        'median': round(statistics.median(samples), 6),
+        'mean': round(statistics.fmean(samples), 6),
+        'p95': round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 6),
+        'min': round(samples[0], 6),
+        'max': round(samples[-1], 6),
+        'stdev': round(statistics.stdev(samples), 6) if len(samples) > 1 else 0.0
+    }
+
+
+def _logged_in_session(settings):
+    sap_simulator.reset(settings)
+    sap_login = SAPLogin("simulated")
+    sap_login.login()
+    return sap_login.session
+
+
+def bench_login(settings, repeats):
+    def login(_):
+        assert SAPLogin("simulated").login()
+    return measure(login, repeats=repeats, setup=lambda: sap_simulator.reset(settings))
+
+
+def bench_popups(settings, repeats):
+    def with_popup():
+        session = _logged_in_session(settings)
+        session.windows.add("wnd[1]")
+        return session
+
+    return {
+        'with_popup': measure(close_sap_popups, repeats=repeats, setup=with_popup),
+        'without_popup': measure(close_sap_popups, repeats=repeats,
+                                 setup=lambda: _logged_in_session(settings))
+    }
+
+
+def bench_transaction(settings, repeats):
+    sys.path.insert(0, str(ROOT / "modules" / "module_login"))
+    from functions.sap_transactions import execute_transaction
+
+    def transaction(session):
+        assert execute_transaction("MM01", session)
+    return measure(transaction, repeats=repeats, setup=lambda: _logged_in_session(settings))
+
+
+def bench_reporting(scales, workdir, repeats):
+    """Parseo del JSON de behave y reporte consolidado (fragmentado) por escala"""
+    from src.reporting.html_reporter import HTMLReporter
+
+    results = {}
+    for scenarios in scales:
+        json_path = write_fake_behave_json(workdir / f"behave_{scenarios}.json", scenarios,
+                                           modules=max(1, min(20, scenarios // 500)))
+        reporter = HTMLReporter(str(workdir / f"html_{scenarios}"), evidence_root=str(workdir / "evidence"))
+        parse_stats = measure(lambda: reporter.parse_behave_json(str(json_path)), repeats=repeats)
+
+        def consolidated():
+            parsed = reporter.parse_behave_json(str(json_path))
+            output_dir = workdir / f"consolidated_{scenarios}"
+            shutil.rmtree(output_dir, ignore_errors=True)
+            consolidated_reporter = HTMLReporter(str(output_dir), evidence_root=str(workdir / "evidence"))
+            assert consolidated_reporter.generate_consolidated_report({'test_cases': parsed.test_cases})
+
+        results[str(scenarios)] = {
+            'parse': parse_stats,
+            'consolidated_report': measure(consolidated, repeats=max(1, repeats // 2), warmup=0)
+        }
+    return results
+
+
+def bench_runner(workdir, modules, repeats):
+    """Sobrecarga del runner por módulo: subproceso behave + recolección del JSON"""
+    spec = importlib.util.spec_from_file_location("run_all_modules", ROOT / "scripts" / "run_all_modules.py")
+    runner = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(runner)
+
+    runner_dir = workdir / "runner"
+    module_names = [write_bench_module(runner_dir, index) for index in range(modules)]
+    previous_cwd = os.getcwd()
+    os.chdir(runner_dir)
+    try:
+        def schedule():
+            for name in module_names:
+                assert runner.run_module(name)
+                runner.collect_module_data(name)
+        stats = measure(schedule, repeats=repeats, warmup=0)
+    finally:
+        os.chdir(previous_cwd)
+    stats['per_module_median'] = round(stats['median'] / modules, 6)
+    stats['modules'] = modules
+    return stats
+
+
+def compare(results, baseline, tolerance):
+    """Compara medianas contra la línea base; retorna lista de métricas más lentas"""
+    current = dict(_flatten(results['benchmarks']))
+    reference = dict(_flatten(baseline.get('benchmarks', {})))
+    comparison = []
+    for name, median in current.items():
+        if name not in reference or not reference[name]:
+            continue
+        ratio = median / reference[name]
+        comparison.append({'benchmark': name, 'median': median, 'baseline': reference[name],
+                           'ratio': round(ratio, 3), 'slower': ratio > 1 + tolerance})
+    return comparison
+
+
+def _flatten(node, prefix=""):
+    if isinstance(node, dict) and 'median' in node:
+        yield prefix, node['median']
+        return
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del framework SAP (backend simulado)")
+    parser.add_argument("--quick", action="store_true", help="Solo escala 1k y menos repeticiones")
+    parser.add_argument("--scales", default="1000,10000,100000", help="Escenarios para parseo/reporte")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Latencia simulada por llamada COM")
+    parser.add_argument("--server-ms", type=float, default=5.0, help="Latencia simulada de ida al servidor")
+    parser.add_argument("--runner-modules", type=int, default=3)
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Resultados de referencia")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar estos resultados como línea base")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Margen antes de marcar lentitud (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    scales = [1000] if args.quick else [int(scale) for scale in args.scales.split(',') if scale]
+    repeats = 3 if args.quick else args.repeats
+    settings = sap_simulator.SimulatorSettings(latency_ms=args.latency_ms, server_ms=args.server_ms, seed=1)
+
+    workdir = Path(tempfile.mkdtemp(prefix="sap_bench_"))
+    print(f"🏁 Benchmarks (latencia {args.latency_ms} ms, servidor {args.server_ms} ms, escalas {scales})")
+    try:
+        benchmarks = {}
+        print("⏱️  login...")
+        benchmarks['login'] = bench_login(settings, repeats)
+        print("⏱️  popups...")
+        benchmarks['popup_dismissal'] = bench_popups(settings, repeats)
+        print("⏱️  transacción...")
+        benchmarks['transaction'] = bench_transaction(settings, repeats)
+        print("⏱️  reportes...")
+        benchmarks['reporting'] = bench_reporting(scales, workdir, max(1, repeats // 2 if not args.quick else 1))
+        print("⏱️  runner...")
+        benchmarks['runner'] = bench_runner(workdir, args.runner_modules, max(1, repeats // 2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {'platform': platform.platform(), 'python_version': platform.python_version()},
+        'settings': {'latency_ms': args.latency_ms, 'server_ms': args.server_ms, 'scales': scales,
+                     'repeats': repeats},
+        'benchmarks': benchmarks
+    }
+
+    slower = []
+    if Path(args.baseline).exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            results['comparison'] = compare(results, json.load(f), args.tolerance)
+        slower = [item for item in results['comparison'] if item['slower']]
+        for item in results['comparison']:
+            icon = "🐢" if item['slower'] else "✅"
+            print(f"{icon} {item['benchmark']}: {item['median']}s (base {item['baseline']}s, x{item['ratio']})")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output = Path(args.output or RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"📄 Resultados: {output}")
+
+    if args.save_baseline:
+        shutil.copyfile(output, args.baseline)
+        print(f"📌 Línea base actualizada: {args.baseline}")
+
+    if slower and args.fail_on_regression:
+        print(f"❌ {len(slower)} benchmarks más lentos que la línea base")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
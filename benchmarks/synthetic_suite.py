@@ -0,0 +1,272 @@
+"""Generador de suites sintéticas para pruebas de estrés del runner, el reporter y el descubrimiento.
+
+Escribe ``<root>/modules/module_synth_NNN`` (manifiesto ``module.json``, features, steps,
+reporte JSON de behave simulado) y ``<root>/modules_config.synthetic.json`` con todas
+las entradas y su grafo de dependencias.
+
+Uso:
+    python benchmarks/synthetic_suite.py --root synthetic_suite --modules 500 --scenarios 200
+    cd synthetic_suite
+    python ../scripts/run_all_modules.py --collect-only
+"""
+import os
+import sys
+import json
+import math
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+CONFIG_FILENAME = "modules_config.synthetic.json"
+
+# Perfiles de paso: (palabra clave, texto, mu y sigma de la log-normal en segundos)
+STEP_PROFILES = (
+    ('Given', 'que el usuario sintético "{user}" tiene sesión', math.log(2.5), 0.35),
+    ('When', 'ejecuto la transacción "{tcode}"', math.log(1.2), 0.6),
+    ('And', 'completo el campo "{field}" con "{value}"', math.log(0.15), 0.5),
+    ('And', 'presiono el botón "{button}"', math.log(0.4), 0.7),
+    ('Then', 'el sistema muestra el mensaje "{message}"', math.log(0.3), 0.5),
+)
+TRANSACTIONS = ("MM01", "MM02", "VA01", "VA02", "ME21N", "MIGO", "FB01", "SE16N")
+FIELDS = ("MATNR", "WERKS", "LGORT", "MTART", "MBRSH", "KUNNR", "VKORG")
+BUTTONS = ("btn[0]", "btn[11]", "btnSPOP-OPTION1", "btn[8]")
+ERRORS = (
+    "AssertionError: Login no exitoso",
+    "com_error: The control could not be found by id",
+    "TimeoutError: La transacción no respondió",
+    "AssertionError: Mensaje inesperado en la barra de estado",
+)
+
+STEPS_TEMPLATE = '''import os
+import time
+from behave import given, when, then
+
+# Pasos sintéticos: no tocan SAP; SYNTH_STEP_SLEEP_MS simula la duración
+STEP_SLEEP = float(os.getenv("SYNTH_STEP_SLEEP_MS", "0")) / 1000.0
+
+
+def _wait():
+    if STEP_SLEEP:
+        time.sleep(STEP_SLEEP)
+
+
+@given('que el usuario sintético "{user}" tiene sesión')
+def step_synthetic_session(context, user):
+    _wait()
+
+
+@when('ejecuto la transacción "{tcode}"')
+def step_synthetic_transaction(context, tcode):
+    _wait()
+
+
+@when('completo el campo "{field}" con "{value}"')
+def step_synthetic_field(context, field, value):
+    _wait()
+
+
+@when('presiono el botón "{button}"')
+def step_synthetic_button(context, button):
+    _wait()
+
+
+@then('el sistema muestra el mensaje "{message}"')
+def step_synthetic_message(context, message):
+    _wait()
+'''
+
+
+class SyntheticSuiteGenerator:
+    """Genera módulos, configuración y reportes de behave con distribuciones realistas.
+
+    Cada módulo tiene su propia tasa de fallos (beta centrada en ``failure_rate``)
+    y un factor de lentitud; una fracción de escenarios es inestable (falla al azar).
+    """
+
+    def __init__(self, root, modules=10, features_per_module=2, scenarios_per_module=50,
+                 steps_per_scenario=5, failure_rate=0.05, flaky_rate=0.02, max_dependencies=3,
+                 seed=42):
+        self.root = Path(root)
+        self.modules = modules
+        self.features_per_module = max(1, features_per_module)
+        self.scenarios_per_module = scenarios_per_module
+        self.steps_per_scenario = steps_per_scenario
+        self.failure_rate = failure_rate
+        self.flaky_rate = flaky_rate
+        self.max_dependencies = max_dependencies
+        self.random = random.Random(seed)
+
+    def module_names(self):
+        width = max(3, len(str(self.modules)))
+        return [f"module_synth_{index:0{width}d}" for index in range(self.modules)]
+
+    def generate(self, write_reports=True):
+        """Escribe la suite completa; retorna la configuración generada"""
+        modules_dir = self.root / "modules"
+        modules_dir.mkdir(parents=True, exist_ok=True)
+        names = self.module_names()
+        config = self.build_config(names)
+
+        for name in names:
+            scenarios = self.build_scenarios(name)
+            self.write_module(name, scenarios)
+            self.write_manifest(name, config[name])
+            if write_reports:
+                self.write_report(name, scenarios)
+
+        with open(self.root / CONFIG_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+        return config
+
+    def build_config(self, names):
+        """Entradas de ``MODULES_CONFIG``; las dependencias solo apuntan a módulos anteriores (DAG)"""
+        config = {}
+        for index, name in enumerate(names):
+            candidates = names[max(0, index - 20):index]
+            dependencies = self.random.sample(candidates, min(len(candidates),
+                                                              self.random.randint(0, self.max_dependencies)))
+            config[name] = {
+                "name": f"Modulo Sintetico {index}",
+                "description": "Módulo generado para pruebas de estrés",
+                "tags": ["@synth", f"@{name}"],
+                "dependencies": sorted(dependencies),
+                "enabled": True,
+                "execution_order": index + 1
+            }
+        return config
+
+    def build_scenarios(self, module_name):
+        """Escenarios con pasos, estados y duraciones (en ns, como los lee el reporter)"""
+        module_failure_rate = self.random.betavariate(2, max(2 * (1 - self.failure_rate) / max(self.failure_rate, 1e-6), 1e-3))
+        module_slowness = self.random.lognormvariate(0, 0.3)
+        started = datetime(2026, 1, 1, 8, 0) + timedelta(minutes=self.random.randint(0, 600))
+
+        scenarios = []
+        for index in range(self.scenarios_per_module):
+            feature_index = index % self.features_per_module
+            flaky = self.random.random() < self.flaky_rate
+            fails = self.random.random() < (0.5 if flaky else module_failure_rate)
+            failing_step = self.random.randrange(self.steps_per_scenario) if fails else None
+
+            steps = []
+            for step_index in range(self.steps_per_scenario):
+                keyword, template, mu, sigma = STEP_PROFILES[min(step_index, len(STEP_PROFILES) - 1)]
+                name = template.format(user=f"SYN{index % 7}", tcode=self.random.choice(TRANSACTIONS),
+                                       field=self.random.choice(FIELDS), value=f"V{index}",
+                                       button=self.random.choice(BUTTONS), message="Grabado")
+                if failing_step is not None and step_index > failing_step:
+                    result = {'status': 'skipped', 'duration': 0}
+                else:
+                    duration = self.random.lognormvariate(mu, sigma) * module_slowness
+                    result = {'status': 'passed', 'duration': int(duration * 1e9),
+                              'start_time': started.strftime('%H:%M:%S')}
+                    started += timedelta(seconds=duration)
+                    if step_index == failing_step:
+                        result['status'] = 'failed'
+                        result['error_message'] = self.random.choice(ERRORS)
+                steps.append({'keyword': keyword, 'name': name, 'step_type': keyword.lower(), 'result': result})
+
+            scenarios.append({
+                'feature_index': feature_index,
+                'name': f"Escenario sintético {index}",
+                'tags': ['synth'] + (['flaky'] if flaky else []),
+                'status': 'failed' if fails else 'passed',
+                'steps': steps
+            })
+        return scenarios
+
+    def write_module(self, module_name, scenarios):
+        module_dir = self.root / "modules" / module_name
+        (module_dir / "features").mkdir(parents=True, exist_ok=True)
+        (module_dir / "steps").mkdir(parents=True, exist_ok=True)
+        (module_dir / "reports").mkdir(parents=True, exist_ok=True)
+        (module_dir / "__init__.py").write_text("", encoding='utf-8')
+        (module_dir / "steps" / "synthetic_steps.py").write_text(STEPS_TEMPLATE, encoding='utf-8')
+
+        for feature_index in range(self.features_per_module):
+            lines = [f"Feature: {module_name} parte {feature_index}", ""]
+            for scenario in scenarios:
+                if scenario['feature_index'] != feature_index:
+                    continue
+                lines.append(f"  @{' @'.join(scenario['tags'])}")
+                lines.append(f"  Scenario: {scenario['name']}")
+                scenario['line'] = len(lines)
+                for step in scenario['steps']:
+                    lines.append(f"    {step['keyword']} {step['name']}")
+                lines.append("")
+            (module_dir / "features" / f"synthetic_{feature_index:02d}.feature").write_text(
+                "\n".join(lines), encoding='utf-8')
+
+    def write_manifest(self, module_name, module_config):
+        """Manifiesto ``modules/<m>/module.json`` que descubre el registro de módulos"""
+        with open(self.root / "modules" / module_name / "module.json", 'w', encoding='utf-8') as f:
+            json.dump(module_config, f, indent=2, ensure_ascii=False)
+
+    def write_report(self, module_name, scenarios):
+        """Reporte JSON de behave en ``modules/<m>/reports/<m>_report.json`` (lo que recoge el runner)"""
+        features = []
+        for feature_index in range(self.features_per_module):
+            filename = f"modules/{module_name}/features/synthetic_{feature_index:02d}.feature"
+            elements = []
+            for scenario in scenarios:
+                if scenario['feature_index'] != feature_index:
+                    continue
+                line = scenario.get('line', 0)
+                elements.append({
+                    'type': 'scenario',
+                    'keyword': 'Scenario',
+                    'name': scenario['name'],
+                    'location': f"{filename}:{line}",
+                    'tags': scenario['tags'],
+                    'status': scenario['status'],
+                    'steps': [dict(step, location=f"{filename}:{line + offset + 1}")
+                              for offset, step in enumerate(scenario['steps'])]
+                })
+            features.append({'keyword': 'Feature', 'name': f"{module_name} parte {feature_index}",
+                             'location': f"{filename}:1", 'status': 'passed', 'elements': elements})
+
+        report_path = self.root / "modules" / module_name / "reports" / f"{module_name}_report.json"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(features, f, ensure_ascii=False)
+        return report_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de suites sintéticas SAP")
+    parser.add_argument("--root", default=os.getenv("SYNTH_ROOT", "synthetic_suite"),
+                        help="Directorio destino (se crea <root>/modules)")
+    parser.add_argument("--modules", type=int, default=int(os.getenv("SYNTH_MODULES", "10")))
+    parser.add_argument("--features", type=int, default=int(os.getenv("SYNTH_FEATURES", "2")),
+                        help="Features por módulo")
+    parser.add_argument("--scenarios", type=int, default=int(os.getenv("SYNTH_SCENARIOS", "50")),
+                        help="Escenarios por módulo")
+    parser.add_argument("--steps", type=int, default=int(os.getenv("SYNTH_STEPS", "5")),
+                        help="Pasos por escenario")
+    parser.add_argument("--failure-rate", type=float, default=float(os.getenv("SYNTH_FAILURE_RATE", "0.05")))
+    parser.add_argument("--flaky-rate", type=float, default=float(os.getenv("SYNTH_FLAKY_RATE", "0.02")))
+    parser.add_argument("--max-dependencies", type=int, default=int(os.getenv("SYNTH_MAX_DEPENDENCIES", "3")))
+    parser.add_argument("--seed", type=int, default=int(os.getenv("SYNTH_SEED", "42")))
+    parser.add_argument("--config", help="Archivo JSON con cualquiera de los parámetros anteriores")
+    parser.add_argument("--no-reports", action="store_true", help="No escribir reportes JSON de behave simulados")
+    args = parser.parse_args()
+
+    params = {
+        'modules': args.modules, 'features_per_module': args.features, 'scenarios_per_module': args.scenarios,
+        'steps_per_scenario': args.steps, 'failure_rate': args.failure_rate, 'flaky_rate': args.flaky_rate,
+        'max_dependencies': args.max_dependencies, 'seed': args.seed
+    }
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            params.update(json.load(f))
+
+    generator = SyntheticSuiteGenerator(args.root, **params)
+    generator.generate(write_reports=not args.no_reports)
+    total = generator.modules * generator.scenarios_per_module
+    print(f"🧪 Suite sintética: {generator.modules} módulos, {total} escenarios en {generator.root}")
+    print(f"   Manifiestos: {generator.root / 'modules'}/*/module.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
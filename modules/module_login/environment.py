@@ -0,0 +1,320 @@
+import os
+import sys
+import logging
+import time
+import traceback
+from pathlib import Path
+
+# Ajustar PYTHONPATH si es necesario
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.config.config import (CredentialPoolConfig, EvidenceConfig, ProfilingConfig, SessionBudgetConfig,
+                               SessionHealthConfig, StepRetryConfig)
+from src.core import credentials
+from src.core.com_profiler import ComProfiler
+from src.core.session_budget import SessionBudget, scenario_priority
+from src.core.session_health import SessionHealthMonitor, retry_on_session_loss
+from src.core.step_retry import RetryPolicy, StepRetrier
+from src.core.sap_login import get_sapgui_object
+from src.reporting.evidence_store import EvidenceStore, step_key
+from src.reporting.checkpoint import CheckpointJournal, scenario_element, scenario_extras
+from src.reporting.capture_pipeline import CapturePipeline
+from src.reporting.sidecars import resolve_report_path, write_sidecar
+from src.utils.step_log_handler import StepLogHandler
+from src.utils.logger import configure_logging
+from src.utils import log_context
+from src.utils.tracing import get_tracer, span
+
+# Config logging (pipeline asíncrono; LOG_FORMAT=json para logs estructurados)
+configure_logging()
+
+def _trace_begin(context, key, name, category, **args):
+    if context.tracer:
+        context.tracer.begin(key, name, category, **args)
+
+def _trace_end(context, key, **args):
+    if context.tracer:
+        context.tracer.end(key, **args)
+
+def before_all(context):
+    # Traza run → módulo → feature → escenario → paso → llamada SAP (SAP_TRACE=true)
+    context.tracer = get_tracer(f"behave_{os.getenv('SAP_MODULE', 'local')}")
+    _trace_begin(context, 'behave', 'behave', 'module', module=os.getenv('SAP_MODULE'))
+    # Logs reales por paso: buffer circular correlacionado con feature/escenario/paso
+    context.step_log_handler = StepLogHandler.install()
+    logging.info("Iniciando ejecución de pruebas BDD")
+    context.evidence_store = EvidenceStore()
+    # Un usuario SAP propio por worker (SAP_USERS / SAP_USERS_FILE): sin sesiones duplicadas entre procesos
+    context.credential_pool = credentials.CredentialPool.from_config()
+    context.credential = None
+    if context.credential_pool:
+        context.credential = context.credential_pool.lease(os.getenv('SAP_MODULE') or f"behave-{os.getpid()}",
+                                                           timeout=CredentialPoolConfig.LEASE_TIMEOUT)
+        credentials.activate(context.credential)
+    # Presupuesto global de sesiones SAP (SAP_BUDGET_*): cada escenario espera turno antes de conectarse
+    context.session_budget = SessionBudget.from_config()
+    context.budget_ticket = None
+    # Perfil de llamadas COM por paso/elemento (la sesión de SAPLogin se envuelve al conectar)
+    context.com_profiler = ComProfiler().activate() if ProfilingConfig.COM_PROFILE else None
+    context.evidence_dir = context.evidence_store.root
+    # Sub-resultados de los pasos por filas (archivo <reporte>_rows.json)
+    context.row_results = {}
+    # Salud de la sesión SAP: sondeo entre pasos, reconexión y un reintento por escenario
+    context.session_health = None
+    if SessionHealthConfig.ENABLED:
+        context.session_health = SessionHealthMonitor(
+            probe_interval=SessionHealthConfig.PROBE_INTERVAL,
+            reconnect_attempts=SessionHealthConfig.RECONNECT_ATTEMPTS,
+            reconnect_backoff=SessionHealthConfig.RECONNECT_BACKOFF
+        )
+    # Reintento acotado de pasos ante errores transitorios (ocupado, control aún no disponible).
+    # Sin SAP_STEP_RETRY la política base es un solo intento: solo reintentan los escenarios con tag
+    if StepRetryConfig.ENABLED:
+        policy = RetryPolicy(StepRetryConfig.ATTEMPTS, StepRetryConfig.BACKOFF, StepRetryConfig.MODE)
+    else:
+        policy = RetryPolicy(1, StepRetryConfig.BACKOFF)
+    context.step_retry = StepRetrier(policy).install(getattr(context._runner, 'step_registry', None))
+    # Diario de checkpoints del runner: escenarios ya completados se omiten al retomar
+    context.checkpoint = CheckpointJournal.from_env()
+    context.completed_scenarios = {}
+    if context.checkpoint:
+        context.completed_scenarios = context.checkpoint.completed_scenarios(os.getenv('SAP_MODULE'))
+
+    # Modo auditoría: captura asíncrona en cada paso
+    context.capture_pipeline = None
+    if EvidenceConfig.CAPTURE_EVERY_STEP:
+        context.capture_pipeline = CapturePipeline(
+            context.evidence_store,
+            max_queue=EvidenceConfig.CAPTURE_QUEUE_SIZE,
+            drop_policy=EvidenceConfig.CAPTURE_DROP_POLICY,
+            block_timeout=EvidenceConfig.CAPTURE_BLOCK_TIMEOUT,
+            attach_to_allure=EvidenceConfig.CAPTURE_ATTACH_ALLURE
+        )
+        logging.info("📷 Captura en cada paso habilitada")
+
+def after_all(context):
+    context.step_log_handler.set_context()
+    if context.capture_pipeline:
+        context.capture_pipeline.close()
+    # Esperar a que el hilo codificador termine y persistir el índice de evidencias
+    context.evidence_store.close()
+    logging.info("Finalizada ejecución de pruebas BDD")
+
+    # Guardar los logs por paso junto al JSON de behave
+    context.step_log_handler.uninstall()
+    report_path = resolve_report_path(context)
+    write_sidecar(report_path, "logs", context.step_log_handler.records())
+    if context.com_profiler:
+        context.com_profiler.deactivate()
+        write_sidecar(report_path, "com_profile", context.com_profiler.snapshot())
+    if context.row_results:
+        write_sidecar(report_path, "rows", context.row_results)
+    if context.session_health:
+        write_sidecar(report_path, "session_health", context.session_health.snapshot())
+    if context.credential_pool:
+        context.credential_pool.release_all()
+        credentials.activate(None)
+        write_sidecar(report_path, "credentials", context.credential_pool.snapshot())
+    if context.session_budget:
+        context.session_budget.release_all()
+        write_sidecar(report_path, "session_budget", context.session_budget.snapshot())
+    if context.step_retry:
+        retried = context.step_retry.snapshot()
+        if retried:
+            recovered = sum(1 for record in retried.values() if record['recovered'])
+            logging.info(f"🔁 {len(retried)} pasos reintentados por errores transitorios ({recovered} recuperados)")
+
+    _trace_end(context, 'behave')
+    if context.tracer:
+        context.tracer.write()
+
+def before_feature(context, feature):
+    context.step_log_handler.set_context(feature=str(feature.location))
+    # El módulo sale de la ruta modules/<module_x>/features si el runner no lo publicó
+    module = os.getenv("SAP_MODULE") or next(
+        (part for part in Path(feature.filename).parts if part.startswith("module_")), None)
+    log_context.bind(module=module, feature=feature.name)
+    _trace_begin(context, 'feature', feature.name, 'feature', location=str(feature.location))
+    if context.session_health:
+        for scenario in feature.scenarios:
+            retry_on_session_loss(scenario, context.session_health)
+
+def after_feature(context, feature):
+    _trace_end(context, 'feature', status=feature.status.name)
+
+def before_scenario(context, scenario):
+    context.step_log_handler.set_context(feature=context.step_log_handler.feature_id,
+                                         scenario=str(scenario.location))
+    log_context.bind(scenario=scenario.name, step=None)
+    _trace_begin(context, 'scenario', scenario.name, 'scenario', location=str(scenario.location))
+    if context.com_profiler:
+        context.com_profiler.set_context(str(scenario.location))
+    logging.info(f"Iniciando escenario: {scenario.name}")
+    context.sap_login = None
+    context.current_scenario = scenario
+    context.capture_session = None
+    context.current_step = None
+    context.budget_ticket = None
+    if context.step_retry:
+        context.step_retry.begin_scenario()
+    context.resumed_scenario = str(scenario.location) in context.completed_scenarios
+    if context.resumed_scenario:
+        logging.info(f"⏭️ Escenario completado en la ejecución interrumpida: {scenario.name}")
+        scenario.skip("completado antes de retomar")
+    elif context.session_budget:
+        # Cola justa por prioridad (@priority(N) o la del módulo); sin turno a tiempo el escenario falla
+        context.budget_ticket = context.session_budget.acquire(
+            f"{os.getenv('SAP_MODULE') or 'behave'}: {scenario.name}", credentials.active_credential().username,
+            priority=scenario_priority(scenario, SessionBudgetConfig.PRIORITY), timeout=SessionBudgetConfig.TIMEOUT)
+
+def after_scenario(context, scenario):
+    handler = context.step_log_handler
+    handler.set_context(feature=handler.feature_id, scenario=handler.scenario_id)
+    if context.step_retry:
+        # Intentos y errores transitorios de cada paso en el JSON de behave (y en el checkpoint)
+        context.step_retry.annotate(scenario, getattr(context._runner, 'formatters', []))
+    lost = context.session_health and scenario.status == "failed" and _session_lost(context, scenario)
+    # Con la sesión perdida, la conexión muerta la descarta el monitor antes del reintento
+    if not lost and getattr(context, 'sap_login', None):
+        context.sap_login.close_connection()
+    if context.session_budget:
+        context.session_budget.release(context.budget_ticket)
+        context.budget_ticket = None
+    if context.capture_pipeline:
+        # Adjuntar a Allure en este hilo, mientras el escenario sigue siendo el actual (sin esperar al codificador)
+        context.capture_pipeline.attach_completed(scenario.location)
+    logging.info(f"Finalizado escenario: {scenario.name}")
+    _trace_end(context, 'scenario', status=scenario.status.name)
+    if context.checkpoint and not context.resumed_scenario:
+        _checkpoint_scenario(context, scenario)
+
+def _session_lost(context, scenario):
+    failed_step = next((step for step in scenario.steps if step.status == "failed"), None)
+    exception = getattr(failed_step, 'exception', None)
+    if not context.session_health.is_lost(context.sap_login, exception):
+        return False
+    logging.warning(f"🔌 Escenario '{scenario.name}' falló por pérdida de la sesión SAP")
+    scenario.session_lost = True
+    scenario.session_error = exception or getattr(failed_step, 'error_message', None)
+    scenario.dead_login = context.sap_login
+    return True
+
+def _checkpoint_scenario(context, scenario):
+    # Registro durable del escenario (resultado, logs y filas) por si el proceso muere después
+    try:
+        extras = scenario_extras(str(scenario.location), {'logs': context.step_log_handler.records(),
+                                                          'rows': context.row_results})
+        context.checkpoint.append('scenario', module=os.getenv('SAP_MODULE'),
+                                  feature=context.feature.name, feature_location=str(context.feature.location),
+                                  location=str(scenario.location), status=scenario.status.name,
+                                  element=scenario_element(scenario), **extras)
+    except Exception as e:
+        logging.warning(f"⚠️ No se pudo registrar el checkpoint del escenario: {e}")
+
+# -----------------------------
+# TIMINGS + SCREENSHOTS SAP GUI
+# -----------------------------
+def _get_sap_session():
+    try:
+        SapGuiAuto = get_sapgui_object()
+        application = SapGuiAuto.GetScriptingEngine
+        connection = application.Children(0)
+        session = connection.Children(0)
+        return session
+    except Exception as e:
+        logging.warning(f"No se pudo obtener sesión SAP: {e}")
+        return None
+
+def _is_nested(step):
+    # Pasos ejecutados con context.execute_steps (p. ej. por fila): los cubre el paso que los invoca
+    return step.filename == "<string>"
+
+def before_step(context, step):
+    if _is_nested(step):
+        return
+    step._env_start_time = time.time()
+    context.current_step = step
+    handler = context.step_log_handler
+    context.current_step_key = step_key(context.current_scenario.location, step.location)
+    handler.set_context(feature=handler.feature_id, scenario=handler.scenario_id,
+                        step=context.current_step_key)
+    log_context.bind(step=f"{step.keyword} {step.name}")
+    _trace_begin(context, 'step', f"{step.keyword} {step.name}", 'step', location=str(step.location))
+    if context.session_health:
+        # Sondeo periódico: una sesión muerta se reemplaza antes de que el paso la use
+        context.session_health.check(context.sap_login)
+    if context.com_profiler:
+        context.com_profiler.set_context(handler.step_id)
+
+def after_step(context, step):
+    if _is_nested(step):
+        return
+    _trace_end(context, 'step', status=step.status.name)
+    with span("after_step", "hook"):
+        _after_step(context, step)
+
+def _annotate_result(step, **fields):
+    # Solo formatters que exponen step.result (behave 1.2.6 no lo tiene): nunca debe romper el hook
+    result = getattr(step, 'result', None)
+    for name, value in fields.items():
+        try:
+            setattr(result, name, value)
+        except AttributeError:
+            pass
+
+def _after_step(context, step):
+    step._env_end_time = time.time()
+    duration_seconds = step._env_end_time - getattr(step, "_env_start_time", step._env_end_time)
+
+    # Guardar duración en ns (para JSON de behave) y segundos
+    try:
+        step.result.duration = int(duration_seconds * 1e9)  # ns
+        step.result.duration_seconds = duration_seconds
+    except Exception:
+        pass
+
+    # Modo auditoría: el hook solo dispara la captura, el pipeline hace el resto
+    if context.capture_pipeline:
+        if context.capture_session is None:
+            context.capture_session = _get_sap_session()
+        if context.capture_session:
+            key = step_key(context.current_scenario.location, step.location)
+            if not context.capture_pipeline.capture(context.capture_session, key, step.name):
+                # Captura descartada o sesión inválida: re-obtener la sesión en el siguiente paso
+                context.capture_session = None
+
+    # Screenshot si falla: la captura cruda se entrega al almacén de evidencias,
+    # que la comprime y deduplica en segundo plano
+    elif step.status == "failed":
+        bmp_path = context.evidence_store.incoming_path(step.name)
+
+        try:
+            session = _get_sap_session()
+            if session:
+                session.findById("wnd[0]").hardCopy(str(bmp_path))
+                key = step_key(context.current_scenario.location, step.location)
+                context.evidence_store.submit(bmp_path, key, name=step.name)
+                logging.info(f"📷 Screenshot capturado para {key}")
+                # La captura cruda se borra al codificarla: la ruta final se resuelve por clave en el índice
+                _annotate_result(step, evidence_key=key)
+            else:
+                logging.warning("No hay sesión SAP activa, no se capturó screenshot")
+        except Exception as e:
+            logging.error(f"Error capturando screenshot SAP: {e}")
+            _annotate_result(step, screenshot_error=str(e))
+
+    # Si hay excepción, guardar trace
+    if step.status == "failed":
+        exc = getattr(step, 'exception', None)
+        if exc is not None:
+            tb = "".join(traceback.format_exception(None, exc, getattr(exc, "__traceback__", None)))
+            _annotate_result(step, error_message=str(exc), traceback=tb)
+
+    # Los logs posteriores (hooks de escenario) vuelven a la clave del escenario
+    handler = context.step_log_handler
+    handler.set_context(feature=handler.feature_id, scenario=handler.scenario_id)
+    log_context.bind(step=None)
+    if context.com_profiler:
+        context.com_profiler.set_context(handler.scenario_id)
+
+
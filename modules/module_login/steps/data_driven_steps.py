@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from behave import when, then
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _leased_session(context):
+    """Sesión única del escenario: reutiliza el login vigente o inicia uno (se cierra en after_scenario)"""
+    from src.core.sap_login import SAPLogin
+
+    if not getattr(context, 'sap_login', None) or not getattr(context.sap_login, 'session', None):
+        context.sap_login = SAPLogin()
+        assert context.sap_login.login(), "Login no exitoso para el procesamiento por filas"
+    return context.sap_login.session
+
+
+@when('proceso las filas de "{data_file}" en lotes de {batch_size:d}')
+@when('proceso las filas de "{data_file}"')
+def step_process_rows(context, data_file, batch_size=None):
+    """Ejecuta los pasos del docstring una vez por fila; ``<columna>`` toma el valor de la fila"""
+    from src.config.config import DataDrivenConfig
+    from src.core.data_driven import DataDrivenRunner, fill_template, iter_rows, resolve_data_path
+    from src.core.sap_utils import reset_to_initial_screen
+
+    assert context.text, "El paso requiere un docstring con los pasos a ejecutar por fila"
+    data_path = resolve_data_path(context.feature.filename, data_file)
+    assert data_path.exists(), f"Archivo de datos no encontrado: {data_path}"
+
+    def run_row(session, row):
+        context.data_row = row
+        context.execute_steps(fill_template(context.text, row))
+
+    runner = DataDrivenRunner(lambda: _leased_session(context),
+                              batch_size=batch_size or DataDrivenConfig.BATCH_SIZE,
+                              max_failures=DataDrivenConfig.MAX_ROW_FAILURES,
+                              row_limit=DataDrivenConfig.ROW_LIMIT,
+                              reset_session=reset_to_initial_screen)
+    summary = runner.run(iter_rows(data_path), run_row, source=data_path.name)
+    context.data_row = None
+    context.data_driven_result = summary
+    # Sub-resultados por fila: los hooks los escriben en <reporte>_rows.json
+    context.row_results[context.current_step_key] = summary
+    logger.info(f"📊 {data_path.name}: {summary['passed']}/{summary['total']} filas correctas "
+                f"en {summary['duration']}s (p95 {summary['p95']}s)")
+
+
+@then('todas las filas deben procesarse correctamente')
+def step_verify_rows(context):
+    summary = context.data_driven_result
+    assert summary['total'] > 0, "El archivo de datos no tiene filas"
+    failed = [row for row in summary['rows'] if row['status'] == 'failed']
+    detail = "; ".join(f"fila {row['index']}: {row['error_message']}" for row in failed[:5])
+    assert not failed, f"{len(failed)} de {summary['total']} filas fallaron — {detail}"
+    assert not summary['stopped'], "El procesamiento se detuvo antes de terminar el archivo"
@@ -2,7 +2,7 @@ import os
 import sys
 from pathlib import Path
 from src.core.sap_login import SAPLogin
-from src.config.config import Credentials
+from src.core.step_retry import safe_checkpoint
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from behave import given, when, then
@@ -15,11 +15,10 @@ logger = logging.getLogger(__name__)
 def step_valid_credentials(context):
     try:
         from src.core.sap_login import SAPLogin
-        from src.config.config import Credentials
 
         context.sap_login = SAPLogin()
-        assert Credentials.USERNAME != "", "Username no configurado"
-        assert Credentials.PASSWORD != "", "Password no configurado"
+        assert context.sap_login.credential.username != "", "Username no configurado"
+        assert context.sap_login.credential.password != "", "Password no configurado"
         logger.info("Credenciales válidas configuradas")
     except ImportError as e:
         logger.error(f"Error de importación: {e}")
@@ -29,14 +28,14 @@ def step_valid_credentials(context):
 @given('que tengo credenciales inválidas')
 def step_invalid_credentials(context):
     from src.core.sap_login import SAPLogin
-    from src.config.config import Credentials
+    from src.core.credentials import Credential, active_credential
 
-    context.sap_login = SAPLogin()
-    context.original_username = Credentials.USERNAME
-    Credentials.USERNAME = "usuario_invalido"
+    # Credencial propia del escenario: la configuración y el usuario arrendado no se modifican
+    context.sap_login = SAPLogin(credential=Credential("usuario_invalido", active_credential().password))
 
 
 @when('inicio sesión en SAP')
+@safe_checkpoint
 def step_login_sap(context):
     context.login_result = context.sap_login.login()
 
@@ -54,7 +53,10 @@ def step_verify_access(context):
 @then('debo recibir un mensaje de error')
 def step_verify_error(context):
     assert context.login_result == False, "Se esperaba error de login"
-    if hasattr(context, 'original_username'):
-        from src.config.config import Credentials
-        Credentials.USERNAME = context.original_username
+
+
+@when('ejecuto la transacción "{tcode}"')
+def step_execute_transaction(context, tcode):
+    from modules.module_login.functions.sap_transactions import execute_transaction
+    assert execute_transaction(tcode, context.sap_login.session), f"No se pudo ejecutar la transacción {tcode}"
 
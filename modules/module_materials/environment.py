@@ -0,0 +1,40 @@
+import os
+import sys
+import logging
+
+# Ajustar PYTHONPATH si es necesario
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# Mismos hooks que module_login (logs por paso, evidencias, perfil COM, trazas)
+from modules.module_login import environment as login_hooks
+from modules.module_login.environment import (  # noqa: F401
+    before_feature, after_feature, before_scenario, after_scenario, before_step, after_step
+)
+from src.config.config import ProvisioningConfig, SessionBudgetConfig
+from src.core import credentials
+
+def before_all(context):
+    login_hooks.before_all(context)
+    # Materiales creados en segundo plano (sesión dedicada) mientras corren los escenarios
+    context.material_pool = None
+    if ProvisioningConfig.ENABLED:
+        from modules.module_materials.functions.material_factory import start_material_pool
+        # Con pool de credenciales, la sesión dedicada usa otro usuario (se libera en after_all)
+        credential = None
+        if context.credential_pool:
+            credential = context.credential_pool.try_lease(f"{os.getenv('SAP_MODULE') or 'behave'}-aprovisionamiento")
+            if credential is None:
+                logging.warning("⚠️ Sin usuario SAP libre: el aprovisionamiento comparte el usuario del worker")
+        # La sesión dedicada también consume del presupuesto de sesiones mientras repone el pool
+        gate = None
+        if context.session_budget:
+            gate = context.session_budget.gate(f"{os.getenv('SAP_MODULE') or 'behave'}-aprovisionamiento",
+                                               (credential or credentials.active_credential()).username,
+                                               priority=SessionBudgetConfig.PRIORITY, kind="provisioning")
+        context.material_pool = start_material_pool(credential, gate)
+
+def after_all(context):
+    if context.material_pool:
+        # Los materiales no consumidos quedan guardados para la siguiente ejecución
+        context.material_pool.close()
+    login_hooks.after_all(context)
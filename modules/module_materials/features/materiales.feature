@@ -0,0 +1,10 @@
+@mm01 @materiales
+Feature: Maestro de materiales
+  Como analista de compras
+  Quiero consultar materiales creados para pruebas
+  Para validar las transacciones MM sin crearlos en cada escenario
+
+  Scenario: Visualizar un material de prueba
+    Given un material de prueba disponible
+    When visualizo el material en la transacción MM03
+    Then el material debe existir en SAP
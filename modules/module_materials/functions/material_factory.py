@@ -0,0 +1,86 @@
+import re
+import uuid
+import logging
+from datetime import datetime
+
+from src.core import com_profiler
+from src.core.sap_login import SAPLogin
+from src.core.sap_utils import close_sap_popups
+
+logger = logging.getLogger(__name__)
+
+POOL_NAME = "materials"
+STATUS_BAR = "wnd[0]/sbar"
+MATERIAL_NUMBER = re.compile(r"(\d{6,18})")
+DEFAULT_SPEC = {
+    "industry": "M",
+    "material_type": "FERT",
+    "base_unit": "UN",
+    "material_group": "01"
+}
+
+# Campos de MM01 (pantalla inicial y vista Datos básicos 1)
+INITIAL_FIELDS = {
+    "industry": "wnd[0]/usr/cmbRMMG1-MBRSH",
+    "material_type": "wnd[0]/usr/cmbRMMG1-MTART"
+}
+BASIC_DATA = "wnd[0]/usr/tabsTABSPR1/tabpSP01/ssubTABFRA1:SAPLMGMM:2004/subSUB1:SAPLMGD1:1002"
+BASIC_FIELDS = {
+    "description": f"{BASIC_DATA}/txtMAKT-MAKTX",
+    "base_unit": "wnd[0]/usr/tabsTABSPR1/tabpSP01/ssubTABFRA1:SAPLMGMM:2004/subSUB2:SAPLMGD1:2001/ctxtMARA-MEINS",
+    "material_group": "wnd[0]/usr/tabsTABSPR1/tabpSP01/ssubTABFRA1:SAPLMGMM:2004/subSUB2:SAPLMGD1:2001/ctxtMARA-MATKL"
+}
+
+
+def create_material(session, spec=None):
+    """Crea un maestro de material con MM01 (numeración interna); retorna sus datos"""
+    spec = dict(DEFAULT_SPEC, **(spec or {}))
+    spec.setdefault("description", f"QA AUTO {uuid.uuid4().hex[:8].upper()}")
+
+    session.StartTransaction("MM01")
+    for field, element_id in INITIAL_FIELDS.items():
+        session.findById(element_id).key = spec[field]
+    session.findById("wnd[0]").sendVKey(0)
+    # Selección de vistas: Datos básicos 1 viene marcada por defecto
+    if session.findById("wnd[1]", False):
+        session.findById("wnd[1]/tbar[0]/btn[0]").press()
+    for field, element_id in BASIC_FIELDS.items():
+        session.findById(element_id).text = spec[field]
+    session.findById("wnd[0]").sendVKey(11)
+
+    message = session.findById(STATUS_BAR).text
+    match = MATERIAL_NUMBER.search(message or "")
+    if not match:
+        close_sap_popups(session)
+        raise RuntimeError(f"MM01 no creó el material: {message or 'sin mensaje'}")
+    material = dict(spec, material=match.group(1), created_at=datetime.now().isoformat())
+    logger.info(f"🧱 Material {material['material']} creado ({material['description']})")
+    return material
+
+
+def connect_provisioning_session(credential=None):
+    """Sesión dedicada para el pool; fuera del profiler COM para no sumar tiempo a los pasos"""
+    sap_login = SAPLogin(credential=credential)
+    sap_login.establish_connection()
+    sap_login.session = com_profiler.unwrap(sap_login.session)
+    if not sap_login.login():
+        raise RuntimeError("Login no exitoso para la sesión de aprovisionamiento")
+    return sap_login
+
+
+def start_material_pool(credential=None, gate=None):
+    """Pool de materiales según ``ProvisioningConfig``, ya arrancado.
+
+    ``credential`` es el usuario de la sesión dedicada y ``gate`` su turno en el presupuesto de sesiones.
+    """
+    from functools import partial
+    from pathlib import Path
+    from src.config.config import ProvisioningConfig
+    from src.core.provisioning import ProvisioningPool, ProvisioningStore
+
+    store = ProvisioningStore(Path(ProvisioningConfig.STORE_DIR) / f"{POOL_NAME}.json",
+                              max_age_hours=ProvisioningConfig.MAX_AGE_HOURS)
+    return ProvisioningPool(POOL_NAME, create_material, partial(connect_provisioning_session, credential),
+                            low_watermark=ProvisioningConfig.LOW_WATERMARK,
+                            high_watermark=ProvisioningConfig.HIGH_WATERMARK,
+                            store=store, gate=gate).start()
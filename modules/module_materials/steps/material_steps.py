@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from behave import given, when, then
+from src.core.step_retry import safe_checkpoint
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _scenario_session(context):
+    """Sesión del escenario: reutiliza el login vigente o inicia uno (se cierra en after_scenario)"""
+    from src.core.sap_login import SAPLogin
+
+    if not getattr(context, 'sap_login', None) or not getattr(context.sap_login, 'session', None):
+        context.sap_login = SAPLogin()
+        assert context.sap_login.login(), "Login no exitoso"
+    return context.sap_login.session
+
+
+@given('un material de prueba disponible')
+@safe_checkpoint
+def step_material_available(context):
+    """Toma un material del pool de aprovisionamiento (o lo crea en línea si está deshabilitado)"""
+    from src.config.config import ProvisioningConfig
+    from modules.module_materials.functions.material_factory import create_material
+
+    pool = getattr(context, 'material_pool', None)
+    if pool:
+        context.material = pool.lease(timeout=ProvisioningConfig.LEASE_TIMEOUT)
+    else:
+        context.material = create_material(_scenario_session(context))
+    logger.info(f"🧱 Material de prueba: {context.material['material']}")
+
+
+@when('visualizo el material en la transacción MM03')
+def step_display_material(context):
+    session = _scenario_session(context)
+    session.StartTransaction("MM03")
+    session.findById("wnd[0]/usr/ctxtRMMG1-MATNR").text = context.material['material']
+    session.findById("wnd[0]").sendVKey(0)
+    if session.findById("wnd[1]", False):
+        session.findById("wnd[1]/tbar[0]/btn[0]").press()
+
+
+@then('el material debe existir en SAP')
+def step_material_exists(context):
+    message = context.sap_login.session.findById("wnd[0]/sbar").text
+    assert not message.startswith("E"), f"MM03 reportó un error: {message}"
+    logger.info(f"✅ Material {context.material['material']} visible en MM03")
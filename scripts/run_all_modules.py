@@ -1,54 +1,346 @@
+import os
 import sys
 import json
+import time
+import argparse
 from pathlib import Path
 from datetime import datetime
 import subprocess  # Agregado: Import necesario para subprocess en run_module
 
-def run_all_modules():
-    """Ejecuta todos los módulos en secuencia con reportes modulares"""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.utils import tracing
+
+PROFILE_DIR = Path("reports") / "consolidated"
+
+def run_all_modules(fail_on_regression=False, collect_only=False, profile=False, resume=False, parallel=1,
+                    coordinator=None):
+    """Ejecuta todos los módulos (en secuencia, con ``parallel`` workers o repartidos por un coordinador)"""
 
     modules_dir = Path("modules")
     modules = [d.name for d in modules_dir.iterdir() if d.is_dir() and d.name.startswith("module_")]
 
     enabled_modules = get_enabled_modules(modules)
 
+    # Diario de checkpoints: cada escenario y módulo terminado queda registrado en disco
+    journal, checkpoint_state = (None, None) if collect_only else open_checkpoint(resume, enabled_modules)
+
     print(f"🎯 Ejecutando {len(enabled_modules)} módulos habilitados...")
     results = {}
     all_test_cases = []
-
+    interrupted = []
+
+    # Traza de la ejecución completa (SAP_TRACE=true); los subprocesos behave escriben la suya
+    tracer = tracing.get_tracer("runner")
+    if tracer:
+        tracer.begin('run', 'run', 'run', modules=len(enabled_modules))
+
+    module_cases = {}
+
+    def execute(module):
+        results[module], module_cases[module] = execute_module(
+            module, collect_only, profile, journal, checkpoint_state, interrupted)
+
+    def store(module, payload, worker):
+        results[module], module_cases[module] = store_remote_result(module, payload, worker, journal, interrupted)
+
+    if coordinator is not None and not collect_only:
+        # Los módulos terminados antes de la interrupción no se vuelven a repartir
+        remote = [module for module in enabled_modules if module not in checkpoint_state['modules']]
+        for module in enabled_modules:
+            if module not in remote:
+                execute(module)
+        run_distributed(remote, coordinator, store)
+    else:
+        workers = 1 if collect_only else parallel_workers(parallel, len(enabled_modules))
+        if workers > 1:
+            run_parallel(enabled_modules, workers, execute)
+        else:
+            for module in enabled_modules:
+                execute(module)
+    # El reporte sigue el orden de dependencias aunque en paralelo los módulos terminen en otro orden
+    results = {module: results[module] for module in enabled_modules}
     for module in enabled_modules:
-        print(f"\n{'=' * 60}")
-        print(f"🚀 EJECUTANDO: {module}")
-        print('=' * 60)
-
-        success = run_module(module)
-        results[module] = success
+        all_test_cases.extend(module_cases[module] or [])
+
+    with tracing.span("consolidated_report", "report"):
+        if profile:
+            from src.utils import profiling
+            regression_report = profiling.trace_allocations(
+                generate_consolidated_report, profiling.profile_dir(PROFILE_DIR),
+                profiling.profile_name("consolidated_report"), results, all_test_cases)
+        else:
+            regression_report = generate_consolidated_report(results, all_test_cases)
 
-        module_data = collect_module_data(module)
-        if module_data:
-            all_test_cases.extend(module_data)
+    if tracer:
+        tracer.end('run')
+        trace_dir = tracer.write().parent
+        print(f"🧭 Traza de la ejecución: {tracing.merge_traces(trace_dir)}")
 
-        status = "✅" if success else "❌"
-        print(f"{status} {module}: {'ÉXITO' if success else 'FALLO'}")
+    if journal and not interrupted:
+        journal.append('run_end', success=all(results.values()))
 
-    generate_consolidated_report(results, all_test_cases)
+    if fail_on_regression and regression_report and regression_report['regressions']:
+        print(f"❌ {len(regression_report['regressions'])} regresiones de rendimiento: la ejecución se marca como fallida")
+        return False
 
     return all(results.values())
 
 
+def execute_module(module, collect_only, profile, journal, checkpoint_state, interrupted):
+    """Ejecuta (o recoge) un módulo; retorna (éxito, features del JSON de behave)"""
+    print(f"\n{'=' * 60}")
+    print(f"🚀 EJECUTANDO: {module}")
+    print('=' * 60)
+
+    if collect_only:
+        # Solo recoger el JSON existente (p. ej. suites sintéticas o re-generar reportes)
+        module_data = collect_module_data(module)
+        success = bool(module_data) and not any(
+            element.get('status') == 'failed' for feature in module_data for element in feature.get('elements', []))
+    elif module in checkpoint_state['modules']:
+        # Terminado antes de la interrupción: su reporte JSON sigue en modules/<m>/reports
+        print(f"⏭️  {module} ya se completó en la ejecución interrumpida")
+        success = checkpoint_state['modules'][module]
+        module_data = collect_module_data(module)
+    else:
+        journal.append('module_start', module=module)
+        report_path = Path("modules") / module / "reports" / f"{module}_report.json"
+        started = time.time()
+        with tracing.span(module, "module"):
+            success = run_module(module, profile)
+        if not report_written(report_path, started):
+            # El worker murió antes de escribir su JSON: el módulo queda pendiente para --resume
+            print(f"⚠️  {module} se interrumpió sin reporte: quedará pendiente para --resume")
+            interrupted.append(module)
+        module_data = collect_module_data(module)
+        # Escenarios omitidos al retomar: se restauran desde el diario
+        journaled = checkpoint_state['scenarios'].get(module, {})
+        if journaled and module not in interrupted:
+            from src.reporting.checkpoint import merge_scenarios
+            restored = merge_scenarios(module_data, journaled, report_path)
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(module_data, f, indent=2, ensure_ascii=False)
+            success = success and not any(record['status'] == 'failed' for record in journaled.values())
+            print(f"♻️  {restored} escenarios restaurados desde el checkpoint")
+        if module not in interrupted:
+            journal.append('module_end', module=module, success=success)
+    status = "✅" if success else "❌"
+    print(f"{status} {module}: {'ÉXITO' if success else 'FALLO'}")
+    return success, module_data
+
+
+def parallel_workers(requested, module_count):
+    """Workers en paralelo: nunca más que módulos ni que usuarios en el pool de credenciales"""
+    workers = max(1, min(requested, module_count))
+    if workers == 1:
+        return 1
+    from src.config.config import CredentialPoolConfig, SessionBudgetConfig
+    from src.core.credentials import CredentialPoolError, load_credentials
+
+    try:
+        users = len(load_credentials(CredentialPoolConfig.USERS, CredentialPoolConfig.USERS_FILE))
+    except CredentialPoolError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    if users and users < workers:
+        # Cada worker behave arrienda un usuario durante toda su ejecución: los demás solo esperarían
+        print(f"🔑 --parallel {requested} limitado a {users} workers: el pool tiene {users} usuarios SAP")
+        workers = users
+    elif not users:
+        print("⚠️  Sin pool de usuarios (SAP_USERS): los workers en paralelo comparten el usuario SAP")
+    limits = {'sistema': SessionBudgetConfig.SYSTEM_SESSIONS, 'usuario': SessionBudgetConfig.USER_SESSIONS,
+              'conexión': SessionBudgetConfig.CONNECTION_SESSIONS}
+    if any(limit > 0 for limit in limits.values()):
+        print("🎟️  Presupuesto de sesiones: " + ", ".join(f"{scope} {limit}" for scope, limit in limits.items() if limit > 0))
+    else:
+        print("⚠️  Sin presupuesto de sesiones (SAP_BUDGET_*): los workers no limitan las sesiones SAP abiertas")
+    return workers
+
+
+def run_parallel(modules, workers, execute):
+    """Ejecuta ``execute(módulo)`` con ``workers`` hilos; cada módulo arranca al terminar sus dependencias.
+
+    Entre los módulos listos se elige primero el de mayor ``priority`` en su manifiesto.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    dependencies = {module: set(module_config(module).get('dependencies', [])) & set(modules) for module in modules}
+    pending = sorted(modules, key=lambda module: -module_config(module).get('priority', 0))
+    done = set()
+    running = {}
+    print(f"⚡ {len(modules)} módulos con {workers} workers en paralelo")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="module") as executor:
+        while pending or running:
+            for module in [module for module in pending if dependencies[module] <= done][:workers - len(running)]:
+                pending.remove(module)
+                running[executor.submit(execute, module)] = module
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done.add(running.pop(future))
+                future.result()
+
+
+def run_distributed(modules, address, on_result):
+    """Coordinador: reparte ``modules`` entre los workers (``--worker``) y espera sus resultados"""
+    from src.config.config import CoordinatorConfig
+    from src.core.coordinator import Coordinator, CoordinatorError
+    from src.utils.log_context import get_run_id
+
+    coordinator = Coordinator(modules, dependencies={module: module_config(module).get('dependencies', [])
+                                                     for module in modules},
+                              priorities={module: module_config(module).get('priority', 0) for module in modules},
+                              on_result=on_result, worker_timeout=CoordinatorConfig.WORKER_TIMEOUT,
+                              heartbeat_interval=CoordinatorConfig.HEARTBEAT_INTERVAL,
+                              max_attempts=CoordinatorConfig.MAX_ATTEMPTS, run_id=get_run_id())
+    try:
+        url = coordinator.serve(address or CoordinatorConfig.ADDRESS, CoordinatorConfig.TOKEN)
+    except CoordinatorError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    print(f"📡 Coordinador en {url}: {len(modules)} módulos para repartir")
+    print(f"   Workers: python scripts/run_all_modules.py --worker {url}")
+    try:
+        coordinator.wait(CoordinatorConfig.IDLE_TIMEOUT)
+    finally:
+        coordinator.shutdown()
+    for worker in coordinator.status()['workers']:
+        state = "vivo" if worker['alive'] else "muerto"
+        print(f"🖥️  {worker['id']} ({worker['host']}, {state}): {worker['completed']} módulos completados")
+
+
+def store_remote_result(module, payload, worker, journal, interrupted):
+    """Guarda el reporte y los sidecars que envió un worker como si el módulo hubiera corrido aquí"""
+    from src.reporting.sidecars import KINDS, sidecar_path, write_sidecar
+
+    report_path = Path("modules") / module / "reports" / f"{module}_report.json"
+    completed = bool(payload.get('completed')) and payload.get('features') is not None
+    if completed:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(payload['features'], f, indent=2, ensure_ascii=False)
+        sidecars = payload.get('sidecars') or {}
+        for kind in KINDS:
+            if kind in sidecars:
+                write_sidecar(report_path, kind, sidecars[kind])
+            else:
+                # Un sidecar de una ejecución anterior en este host no corresponde al resultado recibido
+                sidecar_path(report_path, kind).unlink(missing_ok=True)
+    else:
+        print(f"⚠️  {module} se interrumpió sin reporte ({worker or 'sin workers'}): quedará pendiente para --resume")
+        interrupted.append(module)
+    success = completed and bool(payload.get('success'))
+    if completed:
+        journal.append('module_end', module=module, success=success, worker=worker)
+    status = "✅" if success else "❌"
+    print(f"{status} {module}: {'ÉXITO' if success else 'FALLO'} ({worker})")
+    return success, collect_module_data(module) if completed else []
+
+
+def run_worker(url, parallel=1, profile=False, name=None):
+    """Worker: pide módulos al coordinador, los ejecuta en este host y le envía reporte y sidecars"""
+    from src.config.config import CoordinatorConfig
+    from src.core.coordinator import CoordinatorClient, CoordinatorError, Worker
+
+    client = CoordinatorClient(url, CoordinatorConfig.TOKEN)
+    worker = Worker(client, lambda module: execute_assignment(module, profile),
+                    slots=parallel_workers(parallel, parallel), name=name)
+    try:
+        worker.register()
+    except CoordinatorError as e:
+        print(f"❌ {e}")
+        return False
+    # Mismo run ID que el coordinador: logs y trazas de todos los hosts quedan correlacionados
+    if worker.run_id:
+        os.environ["SAP_RUN_ID"] = worker.run_id
+    print(f"🖥️  Worker {worker.worker_id} conectado a {url} ({worker.slots} slots)")
+    completed = worker.run()
+    for item in completed:
+        status = "✅" if item['success'] else "❌"
+        note = "" if item['accepted'] else " (descartado: reasignado a otro worker)"
+        print(f"{status} {item['module']} (intento {item['attempt']}){note}")
+    print(f"👋 Coordinador sin más trabajo: {len(completed)} módulos ejecutados en este worker")
+    return True
+
+
+def execute_assignment(module, profile=False):
+    """Ejecuta un módulo asignado por el coordinador; retorna el payload de su resultado"""
+    from src.reporting.sidecars import KINDS, load_sidecar, sidecar_path
+
+    print(f"🚀 EJECUTANDO: {module} (asignado por el coordinador)")
+    report_path = Path("modules") / module / "reports" / f"{module}_report.json"
+    started = time.time()
+    with tracing.span(module, "module"):
+        success = run_module(module, profile)
+    payload = {'success': success, 'completed': report_written(report_path, started)}
+    if payload['completed']:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            payload['features'] = json.load(f)
+        executed = any(element.get('status') in ('passed', 'failed')
+                       for feature in payload['features'] for element in feature.get('elements', []))
+        if not success and not executed:
+            # behave falló sin ejecutar escenarios (before_all, usuario SAP, entorno del host): falla del worker
+            print(f"⚠️  {module} falló en este host sin ejecutar escenarios: el coordinador lo reasignará")
+            return {'success': False, 'completed': False}
+        # Solo los sidecars de esta ejecución (los de ejecuciones previas en el host se quedan aquí)
+        payload['sidecars'] = {kind: load_sidecar(report_path, kind) for kind in KINDS
+                               if sidecar_path(report_path, kind).exists()
+                               and sidecar_path(report_path, kind).stat().st_mtime >= started}
+    status = "✅" if success else "❌"
+    print(f"{status} {module}: {'ÉXITO' if success else 'FALLO'}")
+    return payload
+
+
+def module_config(module):
+    """Entrada del registro de módulos (dependencias, prioridad); vacía si no se puede cargar"""
+    try:
+        from src.config.module_registry import get_registry
+        return get_registry().get(module) or {}
+    except ImportError:
+        return {}
+
+
+def open_checkpoint(resume, modules):
+    """Diario de la ejecución (nuevo o el de la última interrumpida con ``--resume``) y su estado"""
+    from src.reporting.checkpoint import CheckpointJournal, JOURNAL_ENV, find_resumable
+    from src.utils.log_context import get_run_id
+
+    journal = find_resumable() if resume else None
+    if resume and journal is None:
+        print("⚠️  No hay ejecuciones interrumpidas para retomar: se inicia una nueva")
+    if journal:
+        state = journal.state()
+        # Retomar con el mismo run ID: logs, trazas y tiempos quedan correlacionados
+        if state['run_id']:
+            os.environ["SAP_RUN_ID"] = state['run_id']
+        done = sum(len(scenarios) for scenarios in state['scenarios'].values())
+        print(f"♻️  Retomando {journal.path.name}: {len(state['modules'])} módulos y {done} escenarios completados")
+        journal.append('run_resume', run_id=get_run_id(), modules=modules)
+    else:
+        journal = CheckpointJournal.for_run(get_run_id())
+        state = journal.state()
+        journal.append('run_start', run_id=get_run_id(), modules=modules)
+    # Los workers behave heredan la ruta y registran cada escenario terminado
+    os.environ[JOURNAL_ENV] = str(journal.path)
+    return journal, state
+
+
 def get_enabled_modules(available_modules):
-    """Retorna módulos habilitados para ejecución"""
+    """Retorna módulos habilitados para ejecución, en orden de dependencias"""
     try:
+        from src.config.module_registry import ModuleRegistryError
         from src.config.modules_config import get_enabled_modules
         enabled_config = get_enabled_modules()
-        enabled = [mod for mod in available_modules if mod in enabled_config]
-        return enabled
     except ImportError:
         print("⚠️  No se pudo cargar configuración de módulos, ejecutando todos")
         return available_modules
+    except ModuleRegistryError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    enabled = [mod for mod in enabled_config if mod in available_modules]
+    return enabled
 
 
-def run_module(module_name):
+def run_module(module_name, profile=False):
     """Función run_module importada o definida aquí"""
     try:
         # Intentar importar del script existente
@@ -75,13 +367,38 @@ def run_module(module_name):
             "--outfile", str(json_report_path)
         ]
 
+        # Worker behave bajo cProfile: el perfil queda junto a los reportes del módulo
+        worker_profile = None
+        if profile:
+            from src.utils import profiling
+            worker_profile = profiling.profile_dir(module_report_dir) / f"{profiling.profile_name(module_name)}_behave.prof"
+            cmd = profiling.cprofile_command(cmd, worker_profile)
+
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            # Correlación de logs: el subproceso hereda el run ID y conoce su módulo
+            from src.utils.log_context import get_run_id
+            env = dict(os.environ, SAP_RUN_ID=get_run_id(), SAP_MODULE=module_name,
+                       SAP_SESSION_PRIORITY=str(module_config(module_name).get('priority', 0)))
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300, env=env)
+            if worker_profile:
+                profiling.convert_worker_profile(worker_profile)
             return result.returncode == 0
         except:
             return False
 
 
+def report_written(report_path, since):
+    """True si behave terminó de escribir el JSON del módulo después de ``since``"""
+    try:
+        if report_path.stat().st_mtime < since:
+            return False
+        with open(report_path, 'r', encoding='utf-8') as f:
+            json.load(f)
+        return True
+    except Exception:
+        return False
+
+
 def collect_module_data(module_name):
     """Colecta datos de reporte del módulo"""
     module_report_path = Path("modules") / module_name / "reports" / f"{module_name}_report.json"
@@ -126,18 +443,86 @@ def generate_consolidated_report(results, all_test_cases):
     # ✅ NUEVO: Generar reporte HTML consolidado
     try:
         from src.reporting.html_reporter import HTMLReporter
+        from src.reporting.sidecars import load_sidecar
 
         # Parsear los test_cases crudos de Behave
         all_parsed_test_cases = []
         total_duration = 0
-        reporter = HTMLReporter()  # Instancia temporal para usar métodos de parsing
-        for feature in all_test_cases:  # all_test_cases es lista de features de JSON Behave
-            if 'elements' in feature:
-                for element in feature['elements']:
-                    if element['type'] == 'scenario':
-                        scenario_analysis = reporter._analyze_scenario_detailed(element)
-                        all_parsed_test_cases.append(scenario_analysis)
-                        total_duration += scenario_analysis['duration']
+        # La misma instancia parsea y genera: conserva logs, perfil COM y filas de cada módulo
+        reporter = HTMLReporter("reports/consolidated")
+        credential_usage = {}
+        session_budget = {}
+        for module in results:
+            # Logs reales por paso escritos junto al JSON de cada módulo
+            reporter.load_step_logs(Path("modules") / module / "reports" / f"{module}_report.json")
+            reporter.load_com_profile(Path("modules") / module / "reports" / f"{module}_report.json")
+            reporter.load_row_results(Path("modules") / module / "reports" / f"{module}_report.json")
+            reporter.load_session_health(Path("modules") / module / "reports" / f"{module}_report.json")
+            usage = load_sidecar(Path("modules") / module / "reports" / f"{module}_report.json", "credentials")
+            if usage:
+                credential_usage[module] = usage
+            budget = load_sidecar(Path("modules") / module / "reports" / f"{module}_report.json", "session_budget")
+            if budget:
+                from src.core.session_budget import merge_budget
+                merge_budget(session_budget, budget)
+        for module, usage in credential_usage.items():
+            # Contención del pool de usuarios SAP: arriendos que esperaron a que otro worker liberara
+            users = ", ".join(lease['username'] for lease in usage.get('leases', []))
+            print(f"🔑 {module}: {users} (espera {usage.get('wait_seconds', 0)}s, "
+                  f"{usage.get('contended', 0)} arriendos con contención, {usage.get('timeouts', 0)} agotados)")
+        if session_budget:
+            # Esperas por un turno de sesión: p95 por tipo y ámbito cuello de botella para dimensionar SAP_BUDGET_*
+            for kind, stats in session_budget['by_kind'].items():
+                print(f"🎟️  {kind}: {stats['count']} solicitudes, espera p95 {stats['p95_wait_seconds']}s "
+                      f"(máx {stats['max_wait_seconds']}s)")
+            for scope, stats in session_budget['by_bottleneck'].items():
+                print(f"🎟️  cuello de botella {scope}: {stats['count']} esperas, {stats['wait_seconds']}s en total")
+        with tracing.span("parse_behave_json", "report"):
+            for feature in all_test_cases:  # all_test_cases es lista de features de JSON Behave
+                if 'elements' in feature:
+                    for element in feature['elements']:
+                        if element['type'] == 'scenario':
+                            scenario_analysis = reporter._analyze_scenario_detailed(element)
+                            all_parsed_test_cases.append(scenario_analysis)
+                            total_duration += scenario_analysis['duration']
+
+        # Comparar contra ejecuciones anteriores y registrar tiempos por paso en el almacén columnar
+        regression_report = None
+        try:
+            from src.config.config import RegressionConfig
+            from src.reporting.timing_store import StepTimingStore
+            from src.reporting.regression import RegressionDetector
+
+            from src.utils.log_context import get_run_id
+
+            run_id = get_run_id()
+            timing_store = StepTimingStore()
+            detector = RegressionDetector(timing_store, window=RegressionConfig.WINDOW,
+                                          min_samples=RegressionConfig.MIN_SAMPLES,
+                                          threshold=RegressionConfig.THRESHOLD,
+                                          min_ratio=RegressionConfig.MIN_RATIO,
+                                          min_delta=RegressionConfig.MIN_DELTA)
+            with tracing.span("regression_compare", "report"):
+                regression_report = detector.compare(all_parsed_test_cases, run_id=run_id)
+            print(f"🐢 Regresiones de rendimiento: {len(regression_report['regressions'])}")
+
+            with tracing.span("timing_store_append", "report"):
+                rows = timing_store.append_test_cases(run_id, all_parsed_test_cases)
+            print(f"⏱️  {rows} tiempos de pasos registrados (run {run_id})")
+        except Exception as e:
+            print(f"⚠️  Error en el análisis de tiempos de pasos: {e}")
+
+        # Índice de inestabilidad por paso: el runner es el único que lo escribe
+        try:
+            from src.config.config import StepRetryConfig
+            from src.core.step_retry import FlakinessStore, executed_steps, step_retries
+
+            retried = step_retries(all_test_cases)
+            FlakinessStore(StepRetryConfig.FLAKINESS_STORE).update(executed_steps(all_test_cases), retried)
+            if retried:
+                print(f"🔁 {len(retried)} pasos reintentados por errores transitorios de SAP GUI")
+        except Exception as e:
+            print(f"⚠️  No se pudo actualizar el índice de inestabilidad: {e}")
 
         # Crear datos consolidados
         consolidated_data = {
@@ -148,22 +533,65 @@ def generate_consolidated_report(results, all_test_cases):
             'test_cases': all_parsed_test_cases,  # Ahora parseados
             'generation_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'execution_summary': results,
-            'total_duration': round(total_duration, 2)  # Agregado para consistencia
+            'total_duration': round(total_duration, 2),  # Agregado para consistencia
+            'regressions': regression_report,
+            'credentials': credential_usage or None,
+            'session_budget': session_budget or None
         }
 
         # Generar reporte
-        reporter = HTMLReporter("reports/consolidated")
         report_path = reporter.generate_consolidated_report(consolidated_data)
 
         if report_path:
             print(f"📋 Reporte consolidado generado: {report_path}")
+            if regression_report is not None:
+                detector.write_json(regression_report, report_path.replace('.html', '_regressions.json'))
+
+            # Tendencias: solo indexa los _analysis.json nuevos
+            try:
+                from src.reporting.trend_report import TrendReporter
+                print(f"📈 Reporte de tendencias: {TrendReporter('reports/consolidated').generate()}")
+            except Exception as e:
+                print(f"⚠️  No se pudo generar reporte de tendencias: {e}")
         else:
             print("⚠️  No se pudo generar reporte consolidado")
 
+        return regression_report
+
     except Exception as e:
         print(f"⚠️  Error generando reporte consolidado: {e}")
+        return None
 
 
 if __name__ == "__main__":
-    success = run_all_modules()
+    parser = argparse.ArgumentParser(description="Ejecutor de todos los módulos SAP")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Marcar la ejecución como fallida si hay regresiones de rendimiento")
+    parser.add_argument("--collect-only", action="store_true",
+                        help="No ejecutar behave: consolidar los reportes JSON ya existentes de cada módulo")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfilar runner y workers behave (cProfile + tracemalloc, pilas colapsadas)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retomar la última ejecución interrumpida: omite módulos y escenarios ya completados")
+    parser.add_argument("--parallel", type=int, default=1, metavar="N",
+                        help="Ejecutar hasta N módulos a la vez (respeta dependencias y el pool de usuarios SAP)")
+    parser.add_argument("--coordinator", nargs="?", const="", metavar="HOST:PUERTO",
+                        help="Repartir los módulos entre workers remotos (por defecto SAP_COORDINATOR_ADDRESS)")
+    parser.add_argument("--worker", metavar="URL",
+                        help="Ejecutar como worker del coordinador en URL (con --parallel N slots)")
+    parser.add_argument("--worker-name", help="Nombre del worker en el coordinador (por defecto el host)")
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.exit(0 if run_worker(args.worker, args.parallel, args.profile, args.worker_name) else 1)
+
+    run_kwargs = dict(fail_on_regression=args.fail_on_regression, collect_only=args.collect_only,
+                      profile=args.profile, resume=args.resume, parallel=args.parallel,
+                      coordinator=args.coordinator)
+    if args.profile:
+        from src.utils import profiling
+        success = profiling.profile_call(run_all_modules, profiling.profile_dir(PROFILE_DIR),
+                                         profiling.profile_name("runner"), **run_kwargs)
+    else:
+        success = run_all_modules(**run_kwargs)
     sys.exit(0 if success else 1)
\ No newline at end of file
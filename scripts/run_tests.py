@@ -1,6 +1,5 @@
 import sys
 import os
-import subprocess
 from pathlib import Path
 import argparse
 
@@ -16,22 +15,33 @@ def run_test():
     parser.add_argument("--tags", help="Tags específicos a ejecutar")
     parser.add_argument("--all", action="store_true", help="Ejecutar todos los módulos")
     parser.add_argument("--list", action="store_true", help="Listar módulos disponibles")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfilar runner y workers behave (cProfile + tracemalloc, pilas colapsadas)")
 
     args = parser.parse_args()
 
     print("🚀 EJECUTOR DE PRUEBAS SAP FRAMEWORK")
     print("=" * 50)
 
-    try:
+    def dispatch():
         if args.list:
             return list_modules()
         elif args.all:
-            return run_all_modules()
+            return run_all_modules(args.profile)
         elif args.module:
-            return run_single_module(args.module, args.tags)
+            return run_single_module(args.module, args.tags, args.profile)
         else:
             return interactive_mode()
 
+    try:
+        if args.profile:
+            from src.utils import profiling
+            # El perfil del runner va junto a los reportes del módulo (o en reports/ si son todos)
+            base_dir = Path("modules") / args.module / "reports" if args.module else Path("reports")
+            return profiling.profile_call(dispatch, profiling.profile_dir(base_dir),
+                                          profiling.profile_name("runner"))
+        return dispatch()
+
     except KeyboardInterrupt:
         print("\n👋 Ejecución cancelada por el usuario")
         return False
@@ -71,8 +81,9 @@ def list_modules():
     return True
 
 
-def run_single_module(module_name, tags=None):
+def run_single_module(module_name, tags=None, profile=False):
     """Ejecuta un módulo específico"""
+    import subprocess
     print(f"\n🎯 EJECUTANDO MÓDULO: {module_name}")
     if tags:
         print(f"   Tags: {tags}")
@@ -101,9 +112,18 @@ def run_single_module(module_name, tags=None):
     if tags:
         cmd.extend(["--tags", tags])
 
+    if profile:
+        from src.utils import profiling
+        profile_output_dir = profiling.profile_dir(module_report_dir)
+        worker_profile = profile_output_dir / f"{profiling.profile_name(module_name)}_behave.prof"
+        cmd = profiling.cprofile_command(cmd, worker_profile)
+
     try:
         print("📋 Ejecutando pruebas...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        # El subproceso hereda el run ID: el reporte solo muestra las evidencias de esta ejecución
+        from src.utils.log_context import get_run_id
+        env = dict(os.environ, SAP_RUN_ID=get_run_id(), SAP_MODULE=module_name)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300, env=env)
 
         # Mostrar output
         if result.stdout:
@@ -111,12 +131,20 @@ def run_single_module(module_name, tags=None):
         if result.stderr:
             print(result.stderr)
 
+        if profile:
+            profiling.convert_worker_profile(worker_profile)
+
         # Generar reporte HTML
         if result.returncode == 0:
             try:
                 from src.reporting.html_reporter import HTMLReporter
                 reporter = HTMLReporter(str(html_report_dir))
-                html_report = reporter.generate_html_report(str(json_report_path))
+                if profile:
+                    html_report = profiling.trace_allocations(
+                        reporter.generate_html_report, profile_output_dir,
+                        profiling.profile_name(f"{module_name}_report"), str(json_report_path))
+                else:
+                    html_report = reporter.generate_html_report(str(json_report_path))
                 if html_report:
                     print(f"📊 Reporte HTML generado: {html_report}")
             except Exception as e:
@@ -136,7 +164,7 @@ def run_single_module(module_name, tags=None):
         return False
 
 
-def run_all_modules():
+def run_all_modules(profile=False):
     """Ejecuta todos los módulos disponibles"""
     print("\n🎯 EJECUTANDO TODOS LOS MÓDULOS")
     print("-" * 40)
@@ -158,7 +186,7 @@ def run_all_modules():
     for module in modules:
         print(f"\n{'=' * 50}")
         print(f"🚀 EJECUTANDO: {module}")
-        success = run_single_module(module)
+        success = run_single_module(module, profile=profile)
         results[module] = success
         status = "✅" if success else "❌"
         print(f"{status} {module}: {'ÉXITO' if success else 'FALLO'}")
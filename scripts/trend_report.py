@@ -0,0 +1,27 @@
+import sys
+import argparse
+from pathlib import Path
+
+
+def main():
+    """Genera el reporte de tendencias a partir de los reportes consolidados históricos"""
+
+    # Configurar path
+    sys.path.insert(0, str(Path.cwd()))
+
+    parser = argparse.ArgumentParser(description="Reporte de tendencias SAP")
+    parser.add_argument("--dir", default="reports/consolidated", help="Directorio de reportes consolidados")
+    parser.add_argument("--output", help="Ruta del HTML de salida")
+    parser.add_argument("--window", type=int, help="Analizar solo las últimas N ejecuciones")
+
+    args = parser.parse_args()
+
+    from src.reporting.trend_report import TrendReporter
+
+    report_path = TrendReporter(args.dir, window=args.window).generate(args.output)
+    print(f"📈 Reporte de tendencias generado: {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ setup(
         "pytest==7.4.0",
         "behave==1.2.6",
         "html-testRunner==1.2.1",
-        "python-dotenv==1.0.0"
+        "python-dotenv==1.0.0",
+        "numpy==1.26.4"
     ],
 )
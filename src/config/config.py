@@ -1,14 +1,200 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+_snapshot = None
+
+def load_settings():
+    """Snapshot del entorno (con ``.env`` aplicado) tomado en el primer acceso a la configuración"""
+    global _snapshot
+    if _snapshot is None:
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        _snapshot = dict(os.environ)
+    return _snapshot
+
+def reload_settings():
+    """Descarta el snapshot y los valores ya resueltos (p. ej. tras cambiar variables de entorno)"""
+    global _snapshot
+    _snapshot = None
+    Setting.generation += 1
+
+def _as_bool(value):
+    return value.lower() in ("1", "true", "yes")
+
+class Setting:
+    """Atributo de configuración que se resuelve contra el snapshot en el primer acceso"""
+    generation = 0
+
+    def __init__(self, env_name, default, cast=str):
+        self.env_name = env_name
+        self.default = default
+        self.cast = cast
+        self._resolved = None
+
+    def __get__(self, instance, owner):
+        if self._resolved is None or self._resolved[0] != Setting.generation:
+            self._resolved = (Setting.generation, self.cast(load_settings().get(self.env_name, self.default)))
+        return self._resolved[1]
 
 class SAPConfig:
-    SAP_LOGON_PATH = os.getenv("SAP_LOGON_PATH", r"C:\Program Files (x86)\SAP\FrontEnd\SAPgui\saplogon.exe")
-    CONNECTION_NAME = os.getenv("SAP_CONNECTION", "SAP EWM S/4 (PRE-PRODUCTIVO)")
-    DEFAULT_CLIENT = os.getenv("SAP_CLIENT", "400")
-    DEFAULT_LANGUAGE = os.getenv("SAP_LANGUAGE", "ES")
+    SAP_LOGON_PATH = Setting("SAP_LOGON_PATH", r"C:\Program Files (x86)\SAP\FrontEnd\SAPgui\saplogon.exe")
+    CONNECTION_NAME = Setting("SAP_CONNECTION", "SAP EWM S/4 (PRE-PRODUCTIVO)")
+    DEFAULT_CLIENT = Setting("SAP_CLIENT", "400")
+    DEFAULT_LANGUAGE = Setting("SAP_LANGUAGE", "ES")
+    # gui (SAP GUI real vía COM) | simulated (backend local para benchmarks y Linux)
+    BACKEND = Setting("SAP_BACKEND", "gui", str.lower)
+    # Espera tras enviar el login antes de buscar popups
+    LOGIN_WAIT = Setting("SAP_LOGIN_WAIT", "3", float)
 
 class Credentials:
-    USERNAME = os.getenv("SAP_USERNAME", "camedinar")
-    PASSWORD = os.getenv("SAP_PASSWORD", "Pruebas2025")
+    USERNAME = Setting("SAP_USERNAME", "camedinar")
+    PASSWORD = Setting("SAP_PASSWORD", "Pruebas2025")
+
+class CredentialPoolConfig:
+    # Usuarios para workers en paralelo: "usuario:clave,usuario2:clave2" o un archivo (JSON o líneas usuario:clave)
+    USERS = Setting("SAP_USERS", "")
+    USERS_FILE = Setting("SAP_USERS_FILE", "")
+    # Tabla de arriendos compartida entre procesos (cada worker usa un usuario distinto)
+    LEASE_DIR = Setting("SAP_USERS_LEASE_DIR", "reports/credentials")
+    LEASE_TIMEOUT = Setting("SAP_USERS_LEASE_TIMEOUT", "300", float)
+    # Un arriendo más viejo que esto se considera abandonado aunque no se pueda comprobar el proceso
+    STALE_HOURS = Setting("SAP_USERS_STALE_HOURS", "12", float)
+
+class SessionBudgetConfig:
+    # Límite de sesiones SAP abiertas a la vez (0 = sin límite): todo el sistema, por usuario y por host
+    SYSTEM_SESSIONS = Setting("SAP_BUDGET_SYSTEM_SESSIONS", "0", int)
+    USER_SESSIONS = Setting("SAP_BUDGET_USER_SESSIONS", "0", int)
+    CONNECTION_SESSIONS = Setting("SAP_BUDGET_CONNECTION_SESSIONS", "0", int)
+    # Tabla de turnos compartida (una unidad de red la comparte entre hosts)
+    DIR = Setting("SAP_BUDGET_DIR", "reports/session_budget")
+    TIMEOUT = Setting("SAP_BUDGET_TIMEOUT", "600", float)
+    # Segundos de espera que suman un punto de prioridad (evita esperas indefinidas)
+    AGING_SECONDS = Setting("SAP_BUDGET_AGING", "60", float)
+    # Prioridad de los escenarios del worker (el runner publica la del manifiesto del módulo)
+    PRIORITY = Setting("SAP_SESSION_PRIORITY", "0", int)
+
+class CoordinatorConfig:
+    # Modo coordinador/worker de run_all_modules.py (módulos repartidos entre varios hosts)
+    ADDRESS = Setting("SAP_COORDINATOR_ADDRESS", "127.0.0.1:8765")
+    # Secreto compartido: el coordinador rechaza solicitudes sin él (obligatorio fuera de loopback)
+    TOKEN = Setting("SAP_COORDINATOR_TOKEN", "")
+    HEARTBEAT_INTERVAL = Setting("SAP_WORKER_HEARTBEAT", "10", float)
+    # Un worker sin latidos durante este tiempo se da por muerto y su trabajo se reasigna
+    WORKER_TIMEOUT = Setting("SAP_WORKER_TIMEOUT", "60", float)
+    MAX_ATTEMPTS = Setting("SAP_ASSIGNMENT_ATTEMPTS", "2", int)
+    # Trabajo pendiente sin ningún worker vivo durante este tiempo se marca fallido
+    IDLE_TIMEOUT = Setting("SAP_COORDINATOR_IDLE_TIMEOUT", "600", float)
+
+class LoggingConfig:
+    LEVEL = Setting("LOG_LEVEL", "INFO", str.upper)
+    DIR = Setting("LOG_DIR", "logs")
+    # text | json (una línea JSON por registro con run/módulo/escenario/paso/sesión)
+    FORMAT = Setting("LOG_FORMAT", "text", str.lower)
+    # size | time | none
+    ROTATION = Setting("LOG_ROTATION", "size", str.lower)
+    ROTATION_WHEN = Setting("LOG_ROTATION_WHEN", "midnight")
+    MAX_BYTES = Setting("LOG_MAX_BYTES", str(10 * 1024 * 1024), int)
+    BACKUP_COUNT = Setting("LOG_BACKUP_COUNT", "7", int)
+    # Muestreo de categorías ruidosas: "prefijo=max/segundos,..." (el sondeo de popups es la más ruidosa)
+    SAMPLING = Setting("LOG_SAMPLING", "src.core.sap_utils.popups=20/60")
+    # Registros guardados por paso en el buffer circular de StepLogHandler
+    STEP_LOG_CAPACITY = Setting("SAP_STEP_LOG_CAPACITY", "200", int)
+
+class TracingConfig:
+    # Trazas Chrome trace-event por proceso (run → módulo → feature → escenario → paso → llamada SAP)
+    ENABLED = Setting("SAP_TRACE", "false", _as_bool)
+    DIR = Setting("SAP_TRACE_DIR", "reports/traces")
+
+class ModuleRegistryConfig:
+    DIR = Setting("SAP_MODULES_DIR", "modules")
+    # JSON con módulos adicionales sin manifiesto (p. ej. suites sintéticas)
+    EXTRA_CONFIG = Setting("SAP_EXTRA_MODULES_CONFIG", "")
+
+class CheckpointConfig:
+    # Diario de la ejecución que publica el runner para los workers behave
+    JOURNAL = Setting("SAP_CHECKPOINT_JOURNAL", "")
+
+class EvidenceConfig:
+    DIR = Setting("EVIDENCE_DIR", "reports/evidence")
+    # png | webp
+    FORMAT = Setting("EVIDENCE_FORMAT", "png", str.lower)
+    # Modo auditoría: captura de pantalla en cada paso (opt-in)
+    CAPTURE_EVERY_STEP = Setting("SAP_CAPTURE_EVERY_STEP", "false", _as_bool)
+    CAPTURE_QUEUE_SIZE = Setting("SAP_CAPTURE_QUEUE_SIZE", "32", int)
+    # block | drop_newest | drop_oldest
+    CAPTURE_DROP_POLICY = Setting("SAP_CAPTURE_DROP_POLICY", "block")
+    CAPTURE_BLOCK_TIMEOUT = Setting("SAP_CAPTURE_BLOCK_TIMEOUT", "0.5", float)
+    CAPTURE_ATTACH_ALLURE = Setting("SAP_CAPTURE_ATTACH_ALLURE", "true", _as_bool)
+    # Ejecuciones cuyas evidencias se conservan en el índice (las más antiguas se descartan)
+    KEEP_RUNS = Setting("EVIDENCE_KEEP_RUNS", "10", int)
+
+class ReportConfig:
+    # Procesos para renderizar los shards por módulo (0 = uno por CPU, nunca más que módulos)
+    WORKERS = Setting("SAP_REPORT_WORKERS", "0", int)
+    # Por debajo de este número de escenarios los shards se renderizan en el proceso actual
+    PARALLEL_MIN_SCENARIOS = Setting("SAP_REPORT_PARALLEL_MIN_SCENARIOS", "500", int)
+
+class RegressionConfig:
+    # Almacén columnar de tiempos por paso (línea base de las comparaciones)
+    TIMINGS_DIR = Setting("SAP_TIMINGS_DIR", "reports/timings")
+    # Ventana de ejecuciones previas usada como línea base
+    WINDOW = Setting("SAP_REGRESSION_WINDOW", "20", int)
+    MIN_SAMPLES = Setting("SAP_REGRESSION_MIN_SAMPLES", "5", int)
+    # Desviaciones robustas (MAD) sobre la mediana para marcar regresión
+    THRESHOLD = Setting("SAP_REGRESSION_THRESHOLD", "3.0", float)
+    MIN_RATIO = Setting("SAP_REGRESSION_MIN_RATIO", "1.2", float)
+    MIN_DELTA = Setting("SAP_REGRESSION_MIN_DELTA", "0.5", float)
+
+class DataDrivenConfig:
+    # Filas por lote; entre lotes la sesión vuelve a la pantalla inicial
+    BATCH_SIZE = Setting("SAP_DATA_BATCH_SIZE", "50", int)
+    # Detener tras N filas fallidas (0 = procesar todas)
+    MAX_ROW_FAILURES = Setting("SAP_DATA_MAX_FAILURES", "0", int)
+    # Procesar solo las primeras N filas (0 = todas), útil para pruebas de humo
+    ROW_LIMIT = Setting("SAP_DATA_ROW_LIMIT", "0", int)
+
+class ProvisioningConfig:
+    # Datos de prueba creados en segundo plano en una sesión dedicada (opcional: abre otro login SAP)
+    ENABLED = Setting("SAP_PROVISIONING", "false", _as_bool)
+    # Reponer cuando queden menos de LOW objetos listos, hasta llegar a HIGH
+    LOW_WATERMARK = Setting("SAP_POOL_LOW_WATERMARK", "2", int)
+    HIGH_WATERMARK = Setting("SAP_POOL_HIGH_WATERMARK", "5", int)
+    LEASE_TIMEOUT = Setting("SAP_POOL_LEASE_TIMEOUT", "120", float)
+    # Objetos no consumidos se guardan aquí y se reutilizan en la siguiente ejecución
+    STORE_DIR = Setting("SAP_POOL_STORE_DIR", "reports/provisioning")
+    MAX_AGE_HOURS = Setting("SAP_POOL_MAX_AGE_HOURS", "24", float)
+
+class SessionHealthConfig:
+    # Sondeo de la sesión entre pasos y reintento del escenario si la sesión se perdió (opcional)
+    ENABLED = Setting("SAP_SESSION_HEALTH", "false", _as_bool)
+    PROBE_INTERVAL = Setting("SAP_SESSION_PROBE_INTERVAL", "30", float)
+    RECONNECT_ATTEMPTS = Setting("SAP_RECONNECT_ATTEMPTS", "3", int)
+    RECONNECT_BACKOFF = Setting("SAP_RECONNECT_BACKOFF", "2", float)
+
+class StepRetryConfig:
+    # Reintento del paso ante errores transitorios de SAP GUI (ocupado, control aún no disponible).
+    # false: solo reintentan los escenarios/features con @retry, @retry(N) o @retry_from_checkpoint
+    ENABLED = Setting("SAP_STEP_RETRY", "false", _as_bool)
+    # Intentos totales por paso (1 = sin reintentos); los tags @retry(N) y @no_retry lo ajustan
+    ATTEMPTS = Setting("SAP_STEP_RETRY_ATTEMPTS", "3", int)
+    BACKOFF = Setting("SAP_STEP_RETRY_BACKOFF", "0.5", float)
+    # step (solo el paso) | checkpoint (además repite desde el último paso seguro)
+    MODE = Setting("SAP_STEP_RETRY_MODE", "step", str.lower)
+    # Índice de inestabilidad por paso entre ejecuciones
+    FLAKINESS_STORE = Setting("SAP_FLAKINESS_STORE", "reports/flakiness.json")
+
+class SimulatorConfig:
+    # Backend simulado (SAP_BACKEND=simulated): latencias en ms y probabilidades por ida y vuelta
+    LATENCY_MS = Setting("SAP_SIM_LATENCY_MS", "0", float)
+    JITTER_MS = Setting("SAP_SIM_JITTER_MS", "0", float)
+    SERVER_MS = Setting("SAP_SIM_SERVER_MS", "0", float)
+    POPUP_RATE = Setting("SAP_SIM_POPUP_RATE", "0", float)
+    DISCONNECT_RATE = Setting("SAP_SIM_DISCONNECT_RATE", "0", float)
+    BUSY_RATE = Setting("SAP_SIM_BUSY_RATE", "0", float)
+    SEED = Setting("SAP_SIM_SEED", "")
+
+class ProfilingConfig:
+    # Proxy que mide cada llamada COM (findById, propiedades, press, sendVKey...)
+    COM_PROFILE = Setting("SAP_COM_PROFILE", "true", _as_bool)
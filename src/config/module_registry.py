@@ -0,0 +1,191 @@
+import json
+import heapq
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "module.json"
+MANIFEST_FIELDS = {
+    "name": str,
+    "description": str,
+    "tags": list,
+    "dependencies": list,
+    "enabled": bool,
+    "execution_order": int,
+    "priority": int
+}
+
+
+class ModuleRegistryError(Exception):
+    """Manifiesto inválido, dependencia desconocida o ciclo en el grafo de módulos"""
+
+
+class ModuleRegistry:
+    """Registro de módulos compilado una vez: orden topológico y cierres transitivos precalculados.
+
+    Los manifiestos ``modules/<m>/module.json`` son la fuente de cada módulo.
+    ``SAP_EXTRA_MODULES_CONFIG`` solo agrega módulos sin manifiesto: si repite uno
+    con valores distintos se lanza ``ModuleRegistryError`` en vez de elegir uno en silencio.
+    """
+
+    def __init__(self, modules):
+        self.modules = modules
+        self._validate()
+        self.order = self._topological_order()
+        self._position = {name: index for index, name in enumerate(self.order)}
+        self._prerequisites = {}
+        for name in self.order:
+            closure = set(self.modules[name]['dependencies'])
+            for dependency in self.modules[name]['dependencies']:
+                closure |= self._prerequisites[dependency]
+            self._prerequisites[name] = frozenset(closure)
+        affected = {name: set() for name in self.order}
+        for name in self.order:
+            for prerequisite in self._prerequisites[name]:
+                affected[prerequisite].add(name)
+        self._affected = {name: frozenset(dependents) for name, dependents in affected.items()}
+
+    @classmethod
+    def compile(cls, modules_dir="modules", extra_config=None):
+        """Descubre los manifiestos bajo ``modules_dir`` y construye el registro"""
+        modules = {name: dict(config) for name, config in (extra_config or {}).items()}
+        conflicts = []
+
+        modules_dir = Path(modules_dir)
+        if modules_dir.exists():
+            for manifest_path in sorted(modules_dir.glob(f"module_*/{MANIFEST_FILENAME}")):
+                name = manifest_path.parent.name
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                except Exception as e:
+                    raise ModuleRegistryError(f"Manifiesto ilegible {manifest_path}: {e}")
+                if not isinstance(manifest, dict):
+                    raise ModuleRegistryError(f"Manifiesto {manifest_path}: se esperaba un objeto JSON")
+                extra = modules.get(name, {})
+                conflicts.extend(f"{manifest_path}: '{field}' es {manifest[field]!r} en el manifiesto "
+                                 f"y {extra[field]!r} en SAP_EXTRA_MODULES_CONFIG"
+                                 for field in MANIFEST_FIELDS
+                                 if field in manifest and field in extra and manifest[field] != extra[field])
+                modules[name] = dict(extra, **manifest, manifest=str(manifest_path))
+        if conflicts:
+            raise ModuleRegistryError("Configuración de módulos contradictoria:\n  " + "\n  ".join(conflicts))
+
+        for name, config in modules.items():
+            config.setdefault("name", name)
+            config.setdefault("description", "")
+            config.setdefault("tags", [])
+            config.setdefault("dependencies", [])
+            config.setdefault("enabled", True)
+            config.setdefault("execution_order", 0)
+            # Prioridad en la cola del presupuesto de sesiones y al repartir workers en paralelo
+            config.setdefault("priority", 0)
+        return cls(modules)
+
+    def _validate(self):
+        errors = []
+        for name, config in self.modules.items():
+            source = config.get("manifest", name)
+            for field, expected in MANIFEST_FIELDS.items():
+                # bool es subclase de int: execution_order=True no es válido
+                if not isinstance(config[field], expected) or (expected is int and isinstance(config[field], bool)):
+                    errors.append(f"{source}: '{field}' debe ser {expected.__name__}")
+            for dependency in config["dependencies"] if isinstance(config["dependencies"], list) else []:
+                if dependency == name:
+                    errors.append(f"{source}: el módulo depende de sí mismo")
+                elif dependency not in self.modules:
+                    errors.append(f"{source}: dependencia desconocida '{dependency}'")
+        if errors:
+            raise ModuleRegistryError("Configuración de módulos inválida:\n  " + "\n  ".join(errors))
+
+        for name, config in self.modules.items():
+            if config["enabled"]:
+                disabled = [dep for dep in config["dependencies"] if not self.modules[dep]["enabled"]]
+                if disabled:
+                    logger.warning(f"⚠️ {name} depende de módulos deshabilitados: {', '.join(disabled)}")
+
+    def _topological_order(self):
+        """Kahn con desempate por ``execution_order`` y nombre; lanza error con el ciclo encontrado"""
+        pending = {name: len(config["dependencies"]) for name, config in self.modules.items()}
+        dependents = {name: [] for name in self.modules}
+        for name, config in self.modules.items():
+            for dependency in config["dependencies"]:
+                dependents[dependency].append(name)
+
+        ready = [(self.modules[name]["execution_order"], name) for name, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, name = heapq.heappop(ready)
+            order.append(name)
+            for dependent in dependents[name]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, (self.modules[dependent]["execution_order"], dependent))
+
+        if len(order) < len(self.modules):
+            cycle = self._find_cycle({name for name, count in pending.items() if count > 0})
+            raise ModuleRegistryError(f"Ciclo de dependencias entre módulos: {' -> '.join(cycle)}")
+        return tuple(order)
+
+    def _find_cycle(self, candidates):
+        # Todo nodo sin resolver tiene una dependencia sin resolver: seguirlas termina en un ciclo
+        path, seen = [], {}
+        name = min(candidates)
+        while name not in seen:
+            seen[name] = len(path)
+            path.append(name)
+            name = min(dep for dep in self.modules[name]["dependencies"] if dep in candidates)
+        return path[seen[name]:] + [name]
+
+    def __contains__(self, name):
+        return name in self.modules
+
+    def __len__(self):
+        return len(self.modules)
+
+    def get(self, name):
+        return self.modules.get(name)
+
+    def enabled(self):
+        """Módulos habilitados en orden topológico"""
+        return {name: self.modules[name] for name in self.order if self.modules[name]["enabled"]}
+
+    def dependencies(self, name):
+        return list(self.modules.get(name, {}).get("dependencies", []))
+
+    def prerequisites(self, name):
+        """Todo lo que debe ejecutarse antes de ``name`` (cierre transitivo)"""
+        return self._prerequisites.get(name, frozenset())
+
+    def affected(self, name):
+        """Todo lo que depende, directa o indirectamente, de ``name``"""
+        return self._affected.get(name, frozenset())
+
+    def position(self, name):
+        return self._position[name]
+
+    def sort(self, names):
+        """Ordena una selección de módulos según el orden topológico (desconocidos al final)"""
+        return sorted(names, key=lambda name: (self._position.get(name, len(self.order)), name))
+
+
+_registry = None
+
+
+def get_registry(modules_dir=None):
+    """Registro compilado en el primer uso (``SAP_MODULES_DIR`` o ``modules`` relativo al cwd)"""
+    global _registry
+    if _registry is None:
+        from src.config.config import ModuleRegistryConfig
+        from src.config.modules_config import load_extra_modules_config
+        _registry = ModuleRegistry.compile(modules_dir or ModuleRegistryConfig.DIR,
+                                           load_extra_modules_config())
+        logger.debug(f"Registro de módulos compilado: {len(_registry)} módulos")
+    return _registry
+
+
+def reset_registry():
+    global _registry
+    _registry = None
@@ -1,26 +1,35 @@
+import os
+import json
 
-MODULES_CONFIG = {
-    "module_login": {
-        "name": "Modulo Login",
-        "description": "Pruebas de autenticacion SAP",
-        "tags": ["@login", "@auth"],
-        "dependencies": [],
-        "enabled": True,
-        "execution_order": 1
-    },
-    "module_materials": {
-        "name": "Modulo Materiales",
-        "description": "Pruebas de transacciones MM",
-        "tags": ["@mm01", "@materiales"],
-        "dependencies": ["module_login"],
-        "enabled": True,
-        "execution_order": 2
-    }
-}
+def __getattr__(name):
+    # Los manifiestos modules/<m>/module.json son la única fuente de dependencias y prioridades:
+    # MODULES_CONFIG se deriva del registro compilado en vez de declararlas por segunda vez aquí
+    if name == "MODULES_CONFIG":
+        from src.config.module_registry import get_registry
+        return get_registry().modules
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def load_extra_modules_config():
+    """Entradas adicionales desde un JSON (``SAP_EXTRA_MODULES_CONFIG``) para módulos sin manifiesto"""
+    from src.config.config import ModuleRegistryConfig
+    path = ModuleRegistryConfig.EXTRA_CONFIG
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 def get_enabled_modules():
-    return {name: config for name, config in MODULES_CONFIG.items()
-            if config['enabled']}
+    from src.config.module_registry import get_registry
+    return get_registry().enabled()
 
 def get_module_dependencies(module_name):
-    return MODULES_CONFIG.get(module_name, {}).get('dependencies', [])
+    from src.config.module_registry import get_registry
+    return get_registry().dependencies(module_name)
+
+def get_module_prerequisites(module_name):
+    from src.config.module_registry import get_registry
+    return get_registry().prerequisites(module_name)
+
+def get_affected_modules(module_name):
+    from src.config.module_registry import get_registry
+    return get_registry().affected(module_name)
@@ -0,0 +1,193 @@
+import inspect
+import threading
+import logging
+from time import perf_counter_ns
+
+from src.utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Métodos cuyo resultado es otro objeto de SAP GUI que también se perfila
+ELEMENT_METHODS = ('findById', 'FindById')
+SESSION_ELEMENT = 'session'
+OUTSIDE_STEP = '__fuera_de_paso__'
+
+_active = None
+
+
+def active_profiler():
+    """Profiler activo en el proceso (``None`` si el perfilado está deshabilitado)"""
+    return _active
+
+
+def wrap(session):
+    """Envuelve la sesión con el profiler activo; sin profiler retorna la sesión tal cual"""
+    if _active is None or session is None or isinstance(session, ProfiledObject):
+        return session
+    return ProfiledObject(session, _active, SESSION_ELEMENT)
+
+
+def unwrap(session):
+    """Sesión original sin proxy (p. ej. sesiones de fondo que no deben sumar al paso en curso)"""
+    if isinstance(session, ProfiledObject):
+        return session._target
+    return session
+
+
+class ComProfiler:
+    """Acumula el tiempo de cada llamada COM por (paso, elemento, llamada).
+
+    Cada entrada guarda ``[conteo, total_ns, max_ns]``. El paso en curso lo fijan
+    los hooks de behave con ``set_context``; las llamadas fuera de un paso se
+    atribuyen al escenario (o a ``OUTSIDE_STEP``).
+    """
+
+    def __init__(self):
+        self.context_key = OUTSIDE_STEP
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def activate(self):
+        global _active
+        _active = self
+        return self
+
+    def deactivate(self):
+        global _active
+        if _active is self:
+            _active = None
+
+    def set_context(self, key=None):
+        self.context_key = key or OUTSIDE_STEP
+
+    def record(self, element, call, elapsed_ns):
+        key = (self.context_key, element, call)
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                self._stats[key] = [1, elapsed_ns, elapsed_ns]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed_ns
+                if elapsed_ns > entry[2]:
+                    entry[2] = elapsed_ns
+
+    def snapshot(self):
+        """Perfil serializable: ``{'steps': {clave: {elemento: {llamada: [conteo, total_s, max_s]}}}}``"""
+        steps = {}
+        with self._lock:
+            items = list(self._stats.items())
+        for (context_key, element, call), (count, total_ns, max_ns) in items:
+            steps.setdefault(context_key, {}).setdefault(element, {})[call] = [
+                count, round(total_ns / 1e9, 6), round(max_ns / 1e9, 6)
+            ]
+        return {'version': 1, 'steps': steps}
+
+
+class ProfiledObject:
+    """Proxy de un objeto COM de SAP GUI que mide métodos, lecturas y asignaciones de propiedades"""
+    __slots__ = ('_target', '_profiler', '_element')
+
+    def __init__(self, target, profiler, element):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_profiler', profiler)
+        object.__setattr__(self, '_element', element)
+
+    def __getattr__(self, name):
+        start = perf_counter_ns()
+        value = getattr(self._target, name)
+        # Los CDispatch de pywin32 definen __call__: callable() no distingue un método de una
+        # propiedad que retorna otro objeto COM (session.Info, element.Children)
+        if inspect.ismethod(value) or inspect.isbuiltin(value) or inspect.isfunction(value):
+            return self._profiled_method(name, value)
+        self._profiler.record(self._element, f"get.{name}", perf_counter_ns() - start)
+        if _is_com_object(value):
+            return ProfiledObject(value, self._profiler, f"{self._element}.{name}")
+        return value
+
+    def __setattr__(self, name, value):
+        start = perf_counter_ns()
+        try:
+            setattr(self._target, name, value)
+        finally:
+            elapsed = perf_counter_ns() - start
+            self._profiler.record(self._element, f"set.{name}", elapsed)
+            tracer = get_tracer()
+            if tracer:
+                tracer.complete(f"set.{name}", "sap", start, elapsed, {'element': self._element})
+
+    def __repr__(self):
+        return f"<ProfiledObject {self._element}: {self._target!r}>"
+
+    def _profiled_method(self, name, method):
+        profiler = self._profiler
+        element = self._element
+        tracer = get_tracer()
+
+        def call(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                target_element = str(args[0]) if name in ELEMENT_METHODS and args else element
+                profiler.record(target_element, name, elapsed)
+                if tracer:
+                    tracer.complete(name, "sap", start, elapsed, {'element': target_element})
+            if name in ELEMENT_METHODS and result is not None:
+                return ProfiledObject(result, profiler, target_element)
+            return result
+
+        return call
+
+
+def _is_com_object(value):
+    """True para objetos COM de pywin32 (``CDispatch`` dinámico o clase generada por makepy)"""
+    # pywin32 guarda la interfaz en __dict__; hasattr() haría una llamada COM por el nombre
+    return '_oleobj_' in getattr(value, '__dict__', ())
+
+
+def merge_profiles(target, profile):
+    """Suma un perfil (``snapshot``) sobre otro ``{'steps': ...}`` en memoria"""
+    steps = target.setdefault('steps', {})
+    for context_key, elements in (profile or {}).get('steps', {}).items():
+        target_elements = steps.setdefault(context_key, {})
+        for element, calls in elements.items():
+            target_calls = target_elements.setdefault(element, {})
+            for call, (count, total, maximum) in calls.items():
+                current = target_calls.get(call)
+                if current is None:
+                    target_calls[call] = [count, total, maximum]
+                else:
+                    target_calls[call] = [current[0] + count, round(current[1] + total, 6), max(current[2], maximum)]
+    return target
+
+
+def summarize_profile(profile, keys=None, top=20):
+    """Desglose por tipo de llamada y elementos más costosos (opcionalmente solo para ``keys``)"""
+    by_call = {}
+    by_element = {}
+    for context_key, elements in (profile or {}).get('steps', {}).items():
+        if keys is not None and context_key not in keys:
+            continue
+        for element, calls in elements.items():
+            for call, (count, total, maximum) in calls.items():
+                for bucket, key in ((by_call, call), (by_element, (element, call))):
+                    entry = bucket.setdefault(key, [0, 0.0, 0.0])
+                    entry[0] += count
+                    entry[1] += total
+                    entry[2] = max(entry[2], maximum)
+
+    calls = sorted(({'call': call, 'count': count, 'total': round(total, 6), 'max': maximum}
+                    for call, (count, total, maximum) in by_call.items()),
+                   key=lambda item: item['total'], reverse=True)
+    hot_elements = sorted(({'element': element, 'call': call, 'count': count, 'total': round(total, 6),
+                            'mean': round(total / count, 6) if count else 0, 'max': maximum}
+                           for (element, call), (count, total, maximum) in by_element.items()),
+                          key=lambda item: item['total'], reverse=True)[:top]
+    return {
+        'total_calls': sum(item['count'] for item in calls),
+        'total_time': round(sum(item['total'] for item in calls), 6),
+        'by_call': calls,
+        'hot_elements': hot_elements
+    }
@@ -0,0 +1,466 @@
+import hmac
+import json
+import time
+import socket
+import ipaddress
+import logging
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "X-SAP-Token"
+# Estados de una asignación
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class CoordinatorError(Exception):
+    """El coordinador no respondió o rechazó la solicitud"""
+
+
+class UnknownWorker(CoordinatorError):
+    """El coordinador dio al worker por muerto (o nunca lo registró): debe registrarse de nuevo"""
+
+
+class Coordinator:
+    """Reparte módulos entre workers de varios hosts y recibe sus resultados.
+
+    Protocolo JSON sobre HTTP (``serve``): ``register``, ``lease``, ``heartbeat`` y
+    ``result``; ``GET /status`` muestra el estado. Un módulo se asigna cuando terminaron
+    sus dependencias, primero el de mayor prioridad. Si un worker deja de enviar
+    latidos durante ``worker_timeout`` o reporta que su behave murió sin reporte, sus
+    asignaciones vuelven a la cola (preferentemente para otro worker) hasta agotar
+    ``max_attempts``. ``on_result(módulo, payload, worker)`` recibe cada resultado final
+    en el hilo que llama a ``wait``.
+    """
+
+    def __init__(self, modules, dependencies=None, priorities=None, on_result=None, worker_timeout=60,
+                 heartbeat_interval=10, max_attempts=2, run_id=None):
+        self.order = list(modules)
+        self.dependencies = {module: set((dependencies or {}).get(module, ())) & set(modules) for module in modules}
+        self.priorities = priorities or {}
+        self.on_result = on_result
+        self.worker_timeout = worker_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.max_attempts = max(1, max_attempts)
+        self.run_id = run_id
+        self.assignments = {module: {'id': f"{module}#1", 'module': module, 'attempt': 1, 'status': PENDING,
+                                     'worker': None, 'excluded': set(), 'history': []} for module in modules}
+        self.workers = {}
+        self._ids = 0
+        self._condition = threading.Condition()
+        # Resultados finales pendientes de entregar a on_result (los entrega wait)
+        self._outbox = []
+        self.server = None
+
+    # --- Acciones del protocolo -------------------------------------------------------
+
+    def register(self, payload):
+        with self._condition:
+            self._ids += 1
+            worker_id = f"{payload.get('name') or 'worker'}-{self._ids}"
+            self.workers[worker_id] = {'id': worker_id, 'host': payload.get('host'), 'slots': payload.get('slots', 1),
+                                       'last_seen': time.monotonic(), 'alive': True, 'running': set(),
+                                       'completed': 0, 'told_done': False}
+        logger.info(f"🖥️ Worker {worker_id} registrado ({payload.get('host')}, {payload.get('slots', 1)} slots)")
+        return {'worker_id': worker_id, 'heartbeat_interval': self.heartbeat_interval, 'run_id': self.run_id}
+
+    def lease(self, payload):
+        with self._condition:
+            worker = self._touch(payload)
+            self._expire_workers()
+            if self.finished():
+                worker['told_done'] = True
+                self._condition.notify_all()
+                return {'assignment': None, 'done': True}
+            assignment = self._next_assignment(worker['id'])
+            if assignment is None:
+                return {'assignment': None, 'done': False, 'retry_after': min(5.0, self.heartbeat_interval)}
+            assignment.update(status=RUNNING, worker=worker['id'], leased_at=time.time())
+            worker['running'].add(assignment['id'])
+        logger.info(f"📤 {assignment['module']} asignado a {worker['id']} (intento {assignment['attempt']})")
+        return {'assignment': {'id': assignment['id'], 'module': assignment['module'],
+                               'attempt': assignment['attempt']}, 'done': False}
+
+    def heartbeat(self, payload):
+        with self._condition:
+            worker = self._touch(payload)
+            self._expire_workers()
+            # Asignaciones que el worker todavía corre pero que ya se reasignaron a otro
+            cancelled = [assignment_id for assignment_id in payload.get('running', [])
+                         if assignment_id not in worker['running']]
+        return {'ok': True, 'cancelled': cancelled}
+
+    def result(self, payload):
+        with self._condition:
+            worker = self._touch(payload)
+            assignment = next((a for a in self.assignments.values() if a['id'] == payload.get('assignment_id')), None)
+            if assignment is None or assignment['worker'] != worker['id'] or assignment['status'] != RUNNING:
+                # El worker fue dado por muerto y el módulo ya se reasignó: el resultado tardío se descarta
+                logger.warning(f"⚠️ Resultado descartado de {worker['id']} para {payload.get('assignment_id')}")
+                return {'ok': True, 'accepted': False}
+            worker['running'].discard(assignment['id'])
+            assignment['history'].append({'worker': worker['id'], 'attempt': assignment['attempt'],
+                                          'completed': bool(payload.get('completed')),
+                                          'success': bool(payload.get('success'))})
+            if not payload.get('completed'):
+                final = self._retry(assignment, f"{worker['id']} terminó sin reporte")
+            else:
+                assignment['status'] = DONE
+                worker['completed'] += 1
+                final = True
+            if final:
+                self._outbox.append((assignment['module'], payload, worker['id']))
+            self._condition.notify_all()
+        return {'ok': True, 'accepted': True}
+
+    def status(self):
+        with self._condition:
+            self._expire_workers()
+            return {
+                'run_id': self.run_id,
+                'finished': self.finished(),
+                'assignments': [{name: value for name, value in assignment.items()
+                                 if name not in ('excluded', 'retry_at')}
+                                for assignment in self.assignments.values()],
+                'workers': [{name: (sorted(value) if isinstance(value, set) else value)
+                             for name, value in worker.items() if name != 'last_seen'}
+                            for worker in self.workers.values()]
+            }
+
+    # --- Estado ------------------------------------------------------------------------
+
+    def finished(self):
+        return all(assignment['status'] in (DONE, FAILED) for assignment in self.assignments.values())
+
+    def wait(self, idle_timeout=600, linger=None):
+        """Entrega los resultados a ``on_result`` hasta que todos los módulos tengan el suyo.
+
+        Si hay trabajo pendiente y ningún worker vivo durante ``idle_timeout`` segundos, lo
+        pendiente se marca fallido. Al terminar espera hasta ``linger`` segundos a que los
+        workers vivos reciban el aviso de fin.
+        """
+        linger = self.heartbeat_interval * 2 if linger is None else linger
+        idle_since = time.monotonic()
+        while True:
+            with self._condition:
+                self._expire_workers()
+                if any(worker['alive'] for worker in self.workers.values()):
+                    idle_since = time.monotonic()
+                elif not self.finished() and time.monotonic() - idle_since > idle_timeout:
+                    logger.error(f"❌ Sin workers vivos durante {idle_timeout:.0f}s: lo pendiente se marca fallido")
+                    for assignment in self.assignments.values():
+                        if assignment['status'] in (PENDING, RUNNING):
+                            assignment['status'] = FAILED
+                            self._outbox.append((assignment['module'], {'success': False, 'completed': False}, None))
+                outbox, self._outbox = self._outbox, []
+                finished = self.finished() and not outbox
+                if not outbox and not finished:
+                    self._condition.wait(1.0)
+            for module, payload, worker_id in outbox:
+                self._deliver(module, payload, worker_id)
+            if finished:
+                break
+
+        deadline = time.monotonic() + linger
+        with self._condition:
+            while time.monotonic() < deadline and any(worker['alive'] and not worker['told_done']
+                                                      for worker in self.workers.values()):
+                self._expire_workers()
+                self._condition.wait(0.5)
+
+    def _touch(self, payload):
+        worker = self.workers.get(payload.get('worker_id'))
+        if worker is None or not worker['alive']:
+            raise UnknownWorker(f"Worker desconocido o dado por muerto: {payload.get('worker_id')}")
+        worker['last_seen'] = time.monotonic()
+        return worker
+
+    def _expire_workers(self):
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if worker['alive'] and now - worker['last_seen'] > self.worker_timeout:
+                worker['alive'] = False
+                logger.warning(f"💀 Worker {worker['id']} sin latidos por {self.worker_timeout:.0f}s: "
+                               f"se reasigna su trabajo")
+                for assignment_id in list(worker['running']):
+                    assignment = next(a for a in self.assignments.values() if a['id'] == assignment_id)
+                    assignment['history'].append({'worker': worker['id'], 'attempt': assignment['attempt'],
+                                                  'completed': False, 'success': False, 'dead': True})
+                    if self._retry(assignment, f"{worker['id']} murió"):
+                        self._outbox.append((assignment['module'], {'success': False, 'completed': False}, worker['id']))
+                worker['running'].clear()
+                self._condition.notify_all()
+
+    def _retry(self, assignment, reason):
+        """Devuelve la asignación a la cola; True si agotó los intentos (resultado final fallido)"""
+        worker_id = assignment['worker']
+        if worker_id in self.workers:
+            self.workers[worker_id]['running'].discard(assignment['id'])
+        if worker_id:
+            assignment['excluded'].add(worker_id)
+        if assignment['attempt'] >= self.max_attempts:
+            assignment['status'] = FAILED
+            logger.error(f"❌ {assignment['module']}: {reason}, sin más intentos ({assignment['attempt']})")
+            return True
+        assignment['attempt'] += 1
+        # Los workers que ya fallaron solo lo retoman si en ``worker_timeout`` no aparece otro
+        assignment.update(id=f"{assignment['module']}#{assignment['attempt']}", status=PENDING, worker=None,
+                          retry_at=time.monotonic() + self.worker_timeout)
+        logger.warning(f"🔁 {assignment['module']}: {reason}, se reasigna (intento {assignment['attempt']})")
+        self._condition.notify_all()
+        return False
+
+    def _next_assignment(self, worker_id):
+        settled = {module for module, assignment in self.assignments.items() if assignment['status'] in (DONE, FAILED)}
+        ready = [assignment for module, assignment in self.assignments.items()
+                 if assignment['status'] == PENDING and self.dependencies[module] <= settled]
+        ready.sort(key=lambda a: (-self.priorities.get(a['module'], 0), self.order.index(a['module'])))
+        alive = {worker['id'] for worker in self.workers.values() if worker['alive']}
+        for assignment in ready:
+            # Un módulo que falló en este worker va a otro, salvo que no quede ninguno que no lo haya intentado
+            if worker_id not in assignment['excluded'] or (
+                    alive <= assignment['excluded'] and time.monotonic() >= assignment.get('retry_at', 0)):
+                return assignment
+        return None
+
+    def _deliver(self, module, payload, worker_id):
+        if self.on_result is None:
+            return
+        try:
+            self.on_result(module, payload, worker_id)
+        except Exception as e:
+            logger.error(f"❌ Error procesando el resultado de {module}: {e}")
+
+    # --- Servidor HTTP -----------------------------------------------------------------
+
+    def serve(self, address, token=None):
+        """Atiende el protocolo en ``host:puerto`` desde un hilo de fondo; retorna la URL.
+
+        Sin ``token`` solo escucha en loopback: en otra interfaz cualquiera podría pedir y
+        reportar asignaciones.
+        """
+        host, _, port = address.rpartition(':')
+        if not token and not _is_loopback(host):
+            raise CoordinatorError(f"El coordinador en '{host or '0.0.0.0'}' requiere SAP_COORDINATOR_TOKEN "
+                                   f"(sin token solo se permite 127.0.0.1/localhost)")
+        handler = type('CoordinatorHandler', (_Handler,), {'coordinator': self, 'token': token or None})
+        self.server = ThreadingHTTPServer((host or '0.0.0.0', int(port)), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="coordinator", daemon=True).start()
+        url = f"http://{host if host not in ('', '0.0.0.0') else socket.gethostname()}:{self.server.server_address[1]}"
+        logger.info(f"📡 Coordinador escuchando en {url}")
+        return url
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    coordinator = None
+    token = None
+    actions = ('register', 'lease', 'heartbeat', 'result')
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/status':
+            return self._reply(404, {'error': f"Ruta desconocida: {self.path}"})
+        if not self._authorized():
+            return self._reply(403, {'error': "Token inválido"})
+        self._reply(200, self.coordinator.status())
+
+    def do_POST(self):
+        action = self.path.strip('/')
+        if action not in self.actions:
+            return self._reply(404, {'error': f"Acción desconocida: {action}"})
+        if not self._authorized():
+            return self._reply(403, {'error': "Token inválido"})
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            self._reply(200, getattr(self.coordinator, action)(payload))
+        except UnknownWorker as e:
+            self._reply(410, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"❌ Error atendiendo '{action}': {e}")
+            self._reply(400, {'error': str(e)})
+
+    def _authorized(self):
+        if not self.token:
+            return True
+        # Comparación en tiempo constante: no revela cuántos caracteres del token coinciden
+        return hmac.compare_digest(self.headers.get(TOKEN_HEADER, '').encode('utf-8'), self.token.encode('utf-8'))
+
+    def _reply(self, status, data):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def _is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+class CoordinatorClient:
+    """Cliente del protocolo del coordinador; reintenta mientras el coordinador no responda"""
+
+    def __init__(self, url, token=None, timeout=30, retry_seconds=60):
+        self.url = url.rstrip('/')
+        self.token = token or None
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+
+    def call(self, action, **payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        started = time.monotonic()
+        delay = 0.5
+        while True:
+            request = urllib.request.Request(f"{self.url}/{action}", data=body, headers=headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read() or b'{}')
+            except urllib.error.HTTPError as e:
+                detail = _error_detail(e)
+                if e.code == 410:
+                    raise UnknownWorker(detail)
+                raise CoordinatorError(f"{action}: HTTP {e.code} {detail}")
+            except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+                if time.monotonic() - started > self.retry_seconds:
+                    raise CoordinatorError(f"Coordinador {self.url} sin respuesta tras {self.retry_seconds:.0f}s: {e}")
+                logger.debug(f"Coordinador sin respuesta ({action}): {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+
+def _error_detail(error):
+    try:
+        return json.loads(error.read()).get('error', '')
+    except Exception:
+        return str(error)
+
+
+class Worker:
+    """Worker remoto: se registra, pide asignaciones con ``slots`` hilos y envía sus resultados.
+
+    ``execute(módulo)`` corre el módulo y retorna el payload del resultado (``success``,
+    ``completed``, ``features`` y ``sidecars``). Un hilo envía latidos hasta que terminan
+    todos los slots; si el coordinador lo dio por muerto, el worker se registra de nuevo y
+    sigue. Un slot que no logra pedir trabajo termina solo; los demás continúan.
+    """
+
+    def __init__(self, client, execute, slots=1, name=None):
+        self.client = client
+        self.execute = execute
+        self.slots = max(1, slots)
+        self.name = name or socket.gethostname()
+        self.worker_id = None
+        self.run_id = None
+        self.heartbeat_interval = 10
+        self.running = set()
+        self.completed = []
+        self._lock = threading.Lock()
+        self._register_lock = threading.Lock()
+        # _done: el coordinador no tiene más trabajo; _stop: todos los slots terminaron (fin de latidos)
+        self._done = threading.Event()
+        self._stop = threading.Event()
+
+    def register(self):
+        reply = self.client.call('register', name=self.name, host=socket.gethostname(), slots=self.slots)
+        with self._lock:
+            self.worker_id = reply['worker_id']
+        self.heartbeat_interval = reply.get('heartbeat_interval', self.heartbeat_interval)
+        self.run_id = reply.get('run_id')
+        return reply
+
+    def run(self):
+        """Trabaja hasta que el coordinador avise que no queda nada; retorna los resultados enviados"""
+        if self.worker_id is None:
+            self.register()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._slot_loop, name=f"worker-slot-{slot}", daemon=True)
+                   for slot in range(self.slots)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._stop.set()
+        return self.completed
+
+    def _slot_loop(self):
+        while not self._done.is_set():
+            try:
+                reply = self._call('lease')
+            except CoordinatorError as e:
+                # Solo termina este slot: los demás siguen con sus asignaciones y los latidos continúan
+                logger.error(f"❌ {threading.current_thread().name}: {e}")
+                return
+            if reply.get('done'):
+                # Todo tiene resultado: los demás slots tampoco recibirán trabajo
+                self._done.set()
+                return
+            assignment = reply.get('assignment')
+            if assignment is None:
+                self._done.wait(reply.get('retry_after', 2.0))
+                continue
+            with self._lock:
+                self.running.add(assignment['id'])
+            try:
+                payload = self.execute(assignment['module'])
+            except Exception as e:
+                logger.error(f"❌ {assignment['module']}: error ejecutando la asignación: {e}")
+                payload = {'success': False, 'completed': False, 'error': str(e)}
+            finally:
+                with self._lock:
+                    self.running.discard(assignment['id'])
+            try:
+                reply = self._call('result', assignment_id=assignment['id'], **payload)
+                self.completed.append({'module': assignment['module'], 'attempt': assignment['attempt'],
+                                       'success': payload.get('success'), 'accepted': reply.get('accepted')})
+            except CoordinatorError as e:
+                logger.error(f"❌ No se pudo enviar el resultado de {assignment['module']}: {e}")
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                running = sorted(self.running)
+            try:
+                reply = self._call('heartbeat', running=running)
+            except CoordinatorError as e:
+                logger.warning(f"⚠️ Latido fallido: {e}")
+                continue
+            for assignment_id in reply.get('cancelled', []):
+                logger.warning(f"⚠️ {assignment_id} fue reasignado a otro worker: su resultado se descartará")
+
+    def _call(self, action, **payload):
+        worker_id = self.worker_id
+        try:
+            return self.client.call(action, worker_id=worker_id, **payload)
+        except UnknownWorker:
+            with self._register_lock:
+                # Varios slots pueden enterarse a la vez: solo el primero se registra de nuevo
+                if self.worker_id == worker_id:
+                    logger.warning("⚠️ El coordinador no reconoce este worker: registrando de nuevo")
+                    self.register()
+            return self.client.call(action, worker_id=self.worker_id, **payload)
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import random
+import socket
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.shared_table import SharedTable, pid_alive
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.5
+
+
+class CredentialPoolError(Exception):
+    """No hay un usuario SAP libre en el pool (tiempo de espera agotado)"""
+
+
+class Credential:
+    """Usuario y clave de SAP; la clave nunca aparece en ``repr`` ni en los logs"""
+    __slots__ = ('username', 'password')
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+
+    def __repr__(self):
+        return f"Credential({self.username!r})"
+
+
+def parse_credentials(text):
+    """Pares ``usuario:clave`` separados por comas o saltos de línea (``#`` comenta la línea)"""
+    credentials = []
+    for line in (text or "").splitlines():
+        if line.strip().startswith('#'):
+            continue
+        for item in line.split(','):
+            username, separator, password = item.strip().partition(':')
+            if username and separator:
+                credentials.append(Credential(username.strip(), password.strip()))
+    return credentials
+
+
+def load_credentials(users=None, users_file=None):
+    """Usuarios de ``SAP_USERS`` o de ``SAP_USERS_FILE`` (JSON ``[{"username", "password"}]`` o texto)"""
+    credentials = parse_credentials(users)
+    if users_file:
+        path = Path(users_file)
+        if not path.exists():
+            raise CredentialPoolError(f"Archivo de usuarios no encontrado: {path}")
+        text = path.read_text(encoding='utf-8')
+        if path.suffix.lower() == '.json':
+            credentials += [Credential(item['username'], item['password']) for item in json.loads(text)]
+        else:
+            credentials += parse_credentials(text)
+    # Un usuario repetido no agrega capacidad: se conserva la primera aparición
+    unique = {}
+    for credential in credentials:
+        unique.setdefault(credential.username, credential)
+    return list(unique.values())
+
+
+class CredentialPool:
+    """Pool de usuarios SAP arrendados entre procesos: cada worker trabaja con un usuario distinto.
+
+    Los arriendos viven en ``<lease_dir>/leases.json`` (``SharedTable``: cada
+    lectura-escritura se hace bajo un mutex entre procesos).
+    Un arriendo se libera al terminar el worker; si el proceso murió (mismo host) o el
+    arriendo supera ``stale_hours``, otro worker lo recupera. ``stats`` registra la
+    contención: arriendos que tuvieron que esperar, tiempo de espera y esperas agotadas.
+    """
+
+    def __init__(self, credentials, lease_dir, stale_hours=12, poll_seconds=POLL_SECONDS):
+        self.credentials = list(credentials)
+        if not self.credentials:
+            raise CredentialPoolError("El pool de credenciales no tiene usuarios")
+        self.lease_dir = Path(lease_dir)
+        self.table = SharedTable(self.lease_dir / "leases.json")
+        self.stale_hours = stale_hours
+        self.poll_seconds = poll_seconds
+        self.host = socket.gethostname()
+        self.held = {}
+        self.stats = {'users': len(self.credentials), 'leases': 0, 'contended': 0, 'timeouts': 0,
+                      'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'reclaimed': 0}
+        self.leases = []
+
+    @classmethod
+    def from_config(cls):
+        """Pool según ``CredentialPoolConfig``; ``None`` si no se configuraron usuarios"""
+        from src.config.config import CredentialPoolConfig
+
+        credentials = load_credentials(CredentialPoolConfig.USERS, CredentialPoolConfig.USERS_FILE)
+        if not credentials:
+            return None
+        return cls(credentials, CredentialPoolConfig.LEASE_DIR, stale_hours=CredentialPoolConfig.STALE_HOURS)
+
+    def lease(self, worker, timeout=300):
+        """Arrienda un usuario libre para ``worker``; espera hasta ``timeout`` si todos están ocupados"""
+        started = time.perf_counter()
+        contended = False
+        while True:
+            with self._locked_table() as table:
+                credential = self._take(table, worker)
+                if credential is not None:
+                    break
+                holders = ", ".join(f"{user}→{record.get('worker')}" for user, record in table.items())
+            waited = time.perf_counter() - started
+            if not contended:
+                contended = True
+                self.stats['contended'] += 1
+                logger.info(f"⏳ {worker}: todos los usuarios SAP están arrendados ({holders}), esperando")
+            if waited >= timeout:
+                self.stats['timeouts'] += 1
+                self.stats['wait_seconds'] += waited
+                raise CredentialPoolError(f"{worker}: sin usuario SAP libre tras {waited:.0f}s "
+                                          f"({len(self.credentials)} usuarios en el pool)")
+            time.sleep(min(timeout - waited, self.poll_seconds * random.uniform(0.5, 1.5)))
+
+        return self._granted(credential, worker, time.perf_counter() - started, contended)
+
+    def try_lease(self, worker):
+        """Arrienda un usuario solo si hay uno libre ahora mismo; ``None`` si no.
+
+        Es un sondeo: un solo intento, sin contar contención ni esperas agotadas.
+        """
+        with self._locked_table() as table:
+            credential = self._take(table, worker)
+        if credential is None:
+            logger.debug(f"{worker}: sin usuario SAP libre en este momento")
+            return None
+        return self._granted(credential, worker, 0.0, False)
+
+    def _take(self, table, worker):
+        credential = next((c for c in self.credentials if c.username not in table), None)
+        if credential is not None:
+            table[credential.username] = {'worker': worker, 'pid': os.getpid(), 'host': self.host,
+                                          'leased_at': datetime.now().isoformat()}
+        return credential
+
+    def _granted(self, credential, worker, waited, contended):
+        self.held[credential.username] = credential
+        self.stats['leases'] += 1
+        self.stats['wait_seconds'] += waited
+        self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        self.leases.append({'username': credential.username, 'worker': worker, 'waited': round(waited, 3)})
+        logger.info(f"🔑 {worker}: usuario SAP {credential.username} arrendado"
+                    + (f" tras esperar {waited:.1f}s" if contended else ""))
+        return credential
+
+    def release(self, credential):
+        if credential is None or self.held.pop(credential.username, None) is None:
+            return
+        with self._locked_table() as table:
+            record = table.get(credential.username)
+            if record and record.get('pid') == os.getpid() and record.get('host') == self.host:
+                del table[credential.username]
+        logger.info(f"🔑 Usuario SAP {credential.username} liberado")
+
+    def release_all(self):
+        for credential in list(self.held.values()):
+            self.release(credential)
+
+    def snapshot(self):
+        return dict(self.stats, wait_seconds=round(self.stats['wait_seconds'], 3),
+                    max_wait_seconds=round(self.stats['max_wait_seconds'], 3), leases=list(self.leases))
+
+    @contextmanager
+    def _locked_table(self):
+        with self.table.locked() as table:
+            for username, record in list(table.items()):
+                if self._abandoned(record):
+                    logger.info(f"♻️ Arriendo de {username} recuperado ({record.get('worker')}, pid {record.get('pid')})")
+                    del table[username]
+                    self.stats['reclaimed'] += 1
+            yield table
+
+    def _abandoned(self, record):
+        if record.get('host') == self.host and not pid_alive(record.get('pid')):
+            return True
+        try:
+            age = datetime.now() - datetime.fromisoformat(record['leased_at'])
+        except Exception:
+            return True
+        return age.total_seconds() > self.stale_hours * 3600
+
+
+# Usuario arrendado por este proceso (lo fijan los hooks de behave); sin pool se usa Credentials
+_active = None
+
+
+def activate(credential):
+    global _active
+    _active = credential
+
+
+def active_credential():
+    """Credencial de los ``SAPLogin`` de este proceso: la arrendada o la de ``Credentials``"""
+    if _active is not None:
+        return _active
+    from src.config.config import Credentials
+    return Credential(Credentials.USERNAME, Credentials.PASSWORD)
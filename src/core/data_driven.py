@@ -0,0 +1,186 @@
+import re
+import csv
+import time
+import logging
+import itertools
+from datetime import datetime
+from pathlib import Path
+
+from src.utils import tracing
+from src.utils import log_context
+
+logger = logging.getLogger(__name__)
+
+# Marcadores ``<columna>`` en el texto de los pasos (misma sintaxis que Scenario Outline)
+PLACEHOLDER = re.compile(r"<([^<>\n]+)>")
+EXCEL_SUFFIXES = (".xlsx", ".xlsm")
+# Valores de fila guardados en el reporte (recortados para no inflar el JSON)
+MAX_VALUE_LENGTH = 80
+
+
+def resolve_data_path(feature_filename, data_file):
+    """Ruta del archivo de datos; las rutas relativas se resuelven junto al .feature"""
+    path = Path(data_file)
+    if path.is_absolute():
+        return path
+    return Path(feature_filename).parent / path
+
+
+def iter_rows(path, sheet=None):
+    """Filas del archivo como diccionarios, leídas bajo demanda (CSV o XLSX)"""
+    path = Path(path)
+    if path.suffix.lower() in EXCEL_SUFFIXES:
+        yield from _iter_excel_rows(path, sheet)
+    elif path.suffix.lower() in (".csv", ".txt"):
+        yield from _iter_csv_rows(path)
+    else:
+        raise ValueError(f"Formato de datos no soportado: {path.name} (use CSV o XLSX)")
+
+
+def _iter_csv_rows(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t|")
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.DictReader(f, dialect=dialect):
+            if any(value for value in row.values() if value):
+                yield {(key or '').strip(): (value or '').strip() for key, value in row.items()}
+
+
+def _iter_excel_rows(path, sheet=None):
+    try:
+        import openpyxl
+    except Exception:
+        raise RuntimeError("openpyxl no disponible: instálelo para leer datos desde Excel")
+    # read_only: las filas se leen del XML a medida que se consumen
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else f"col{index}"
+                  for index, value in enumerate(next(rows, ()))]
+        for values in rows:
+            if all(value is None or value == '' for value in values):
+                continue
+            yield {name: '' if value is None else str(value).strip() for name, value in zip(header, values)}
+    finally:
+        workbook.close()
+
+
+def fill_template(text, row):
+    """Reemplaza ``<columna>`` por el valor de la fila; los marcadores desconocidos se conservan"""
+    return PLACEHOLDER.sub(lambda match: row.get(match.group(1).strip(), match.group(0)), text)
+
+
+def _batches(rows, size):
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DataDrivenRunner:
+    """Ejecuta una acción por fila, en lotes, sobre una sola sesión SAP.
+
+    ``session_provider`` entrega la sesión arrendada (se pide al inicio de cada lote,
+    por lo que puede re-conectar si la anterior se perdió) y ``reset_session`` deja la
+    sesión en la pantalla inicial entre lotes. Cada fila produce un sub-resultado con
+    su estado, error y duración.
+    """
+
+    def __init__(self, session_provider, batch_size=50, max_failures=0, row_limit=0, reset_session=None):
+        self.session_provider = session_provider
+        self.batch_size = max(1, int(batch_size))
+        self.max_failures = max_failures
+        self.row_limit = row_limit
+        self.reset_session = reset_session
+
+    def run(self, rows, row_action, source=None):
+        """Consume ``rows`` de forma perezosa; retorna el resumen con los sub-resultados"""
+        results = []
+        failed = 0
+        stopped = False
+        started = time.perf_counter()
+        numbered = enumerate(rows, start=1)
+        if self.row_limit:
+            # Deja de leer el archivo al llegar al límite (no solo de ejecutar filas)
+            numbered = itertools.islice(numbered, self.row_limit)
+
+        for batch_index, batch in enumerate(_batches(numbered, self.batch_size), start=1):
+            if batch_index > 1 and self.reset_session:
+                try:
+                    self.reset_session(session)
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo reiniciar la sesión entre lotes: {e}")
+            session = self.session_provider()
+            batch_started = time.perf_counter()
+            batch_failed = 0
+            for index, row in batch:
+                result = self._run_row(session, row_action, index, row, batch_index)
+                results.append(result)
+                if result['status'] == 'failed':
+                    failed += 1
+                    batch_failed += 1
+                if self.max_failures and failed >= self.max_failures:
+                    stopped = True
+                    break
+            logger.info(f"📦 Lote {batch_index}: {len(batch)} filas, {batch_failed} fallidas, "
+                        f"{time.perf_counter() - batch_started:.2f}s")
+            if stopped:
+                logger.warning(f"⛔ Se alcanzó el máximo de {self.max_failures} filas fallidas; se detiene el lote")
+                break
+        log_context.bind(row=None)
+
+        durations = sorted(result['duration'] for result in results)
+        return {
+            'source': str(source) if source else None,
+            'batch_size': self.batch_size,
+            'total': len(results),
+            'passed': len(results) - failed,
+            'failed': failed,
+            'stopped': stopped,
+            'duration': round(time.perf_counter() - started, 4),
+            'p50': durations[len(durations) // 2] if durations else 0,
+            'p95': durations[min(len(durations) - 1, int(0.95 * len(durations)))] if durations else 0,
+            'rows': results
+        }
+
+    def _run_row(self, session, row_action, index, row, batch_index):
+        log_context.bind(row=index)
+        started_at = datetime.now()
+        error = None
+        start = time.perf_counter()
+        with tracing.span(f"row {index}", "row", batch=batch_index):
+            try:
+                row_action(session, row)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                logger.error(f"❌ Fila {index}: {error}")
+        return {
+            'index': index,
+            'batch': batch_index,
+            'status': 'failed' if error else 'passed',
+            'duration': round(time.perf_counter() - start, 4),
+            'start_time': started_at.strftime('%H:%M:%S'),
+            'data': {key: str(value)[:MAX_VALUE_LENGTH] for key, value in row.items()},
+            'error_message': error
+        }
+
+
+def summarize_rows(summary, max_rows=500):
+    """Resumen para el reporte: totales, percentiles, filas más lentas y fallidas"""
+    rows = summary.get('rows', [])
+    return dict(
+        {key: value for key, value in summary.items() if key != 'rows'},
+        slowest=sorted(rows, key=lambda row: row['duration'], reverse=True)[:5],
+        failures=[row for row in rows if row['status'] == 'failed'][:max_rows],
+        rows=rows[:max_rows],
+        truncated=max(0, len(rows) - max_rows)
+    )
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima entre reintentos cuando la creación de datos falla
+MAX_BACKOFF_SECONDS = 30
+
+
+class ProvisioningError(Exception):
+    """El pool no pudo entregar un objeto (tiempo agotado o aprovisionamiento detenido)"""
+
+
+class ProvisioningStore:
+    """Objetos no consumidos persistidos en JSON para reutilizarlos en ejecuciones posteriores.
+
+    ``claim`` renombra el archivo antes de leerlo: si varios procesos arrancan a la vez,
+    solo uno se queda con cada objeto guardado.
+    """
+
+    def __init__(self, path, max_age_hours=0):
+        self.path = Path(path)
+        self.max_age_hours = max_age_hours
+
+    def claim(self):
+        """Toma (y retira del archivo) los objetos guardados que no hayan expirado"""
+        claim_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.claim")
+        try:
+            os.replace(self.path, claim_path)
+        except FileNotFoundError:
+            return []
+        try:
+            with open(claim_path, 'r', encoding='utf-8') as f:
+                objects = json.load(f).get('objects', [])
+        except Exception as e:
+            logger.warning(f"⚠️ Almacén de aprovisionamiento ilegible {self.path}: {e}")
+            objects = []
+        finally:
+            claim_path.unlink(missing_ok=True)
+
+        fresh = [obj for obj in objects if not self._expired(obj)]
+        if len(fresh) < len(objects):
+            logger.info(f"🗑️ {len(objects) - len(fresh)} objetos expirados descartados de {self.path.name}")
+        return fresh
+
+    def save(self, objects):
+        """Agrega ``objects`` a lo que haya guardado otro proceso mientras tanto"""
+        objects = self.claim() + list(objects)
+        if not objects:
+            return 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': datetime.now().isoformat(), 'objects': objects}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return len(objects)
+
+    def _expired(self, obj):
+        if not self.max_age_hours:
+            return False
+        try:
+            created = datetime.fromisoformat(obj['created_at'])
+        except Exception:
+            return False
+        return datetime.now() - created > timedelta(hours=self.max_age_hours)
+
+
+class ProvisioningPool:
+    """Pool de datos de prueba creados por adelantado en una sesión SAP dedicada.
+
+    Un hilo de fondo repone el pool hasta ``high_watermark`` cada vez que los objetos
+    listos bajan de ``low_watermark`` (o hay escenarios esperando). ``connect`` abre la
+    sesión dedicada (objeto con ``session`` y ``close_connection()``, p. ej. ``SAPLogin``)
+    y ``factory(session)`` crea un objeto y lo retorna como diccionario serializable.
+    Al cerrar, los objetos no consumidos se guardan en ``store`` para la siguiente ejecución.
+    Con ``gate`` (``BudgetGate`` del presupuesto de sesiones) la sesión dedicada solo se
+    abre con turno y se cierra al terminar cada reposición, devolviendo el turno.
+    """
+
+    def __init__(self, name, factory, connect, low_watermark=2, high_watermark=5, store=None,
+                 max_failures=5, gate=None):
+        self.name = name
+        self.factory = factory
+        self.connect = connect
+        self.low_watermark = max(0, int(low_watermark))
+        self.high_watermark = max(1, int(high_watermark), self.low_watermark)
+        self.store = store
+        self.max_failures = max_failures
+        self.gate = gate
+        self.error = None
+        self._ready = deque()
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._connection = None
+        self._stats = {'reused': 0, 'created': 0, 'leased': 0, 'released': 0, 'failures': 0,
+                       'empty_leases': 0, 'wait_seconds': 0.0, 'create_seconds': 0.0}
+
+    def start(self):
+        """Recupera los objetos persistidos y arranca el hilo de reposición"""
+        if self.store:
+            reused = self.store.claim()
+            self._ready.extend(reused)
+            self._stats['reused'] = len(reused)
+            if reused:
+                logger.info(f"♻️ Pool {self.name}: {len(reused)} objetos reutilizados de ejecuciones previas")
+        self._thread = threading.Thread(target=self._run, name=f"provisioning-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def available(self):
+        with self._condition:
+            return len(self._ready)
+
+    def lease(self, timeout=120):
+        """Entrega un objeto listo; espera al hilo de reposición si el pool está vacío"""
+        started = time.perf_counter()
+        with self._condition:
+            if not self._ready:
+                self._stats['empty_leases'] += 1
+            self._waiting += 1
+            self._condition.notify_all()
+            try:
+                ready = self._condition.wait_for(
+                    lambda: self._ready or self.error or self._stop.is_set(), timeout)
+            finally:
+                self._waiting -= 1
+            waited = time.perf_counter() - started
+            self._stats['wait_seconds'] += waited
+            if not self._ready:
+                reason = self.error or ("pool cerrado" if self._stop.is_set() else f"sin objetos tras {timeout}s")
+                raise ProvisioningError(f"Pool {self.name}: {reason}")
+            obj = self._ready.popleft()
+            self._stats['leased'] += 1
+            # Avisar al hilo de reposición si se cruzó la marca baja
+            self._condition.notify_all()
+        if waited > 0.01:
+            logger.info(f"⏳ Pool {self.name}: objeto entregado tras esperar {waited:.2f}s")
+        return obj
+
+    def release(self, obj):
+        """Devuelve un objeto arrendado que el escenario no llegó a consumir"""
+        with self._condition:
+            self._ready.appendleft(obj)
+            self._stats['released'] += 1
+            self._condition.notify_all()
+
+    def close(self, timeout=60):
+        """Detiene la reposición (termina la creación en curso) y persiste lo no consumido"""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"⚠️ Pool {self.name}: el hilo de reposición no terminó en {timeout}s")
+        with self._condition:
+            remaining = list(self._ready)
+            self._ready.clear()
+        if self.store and remaining:
+            self.store.save(remaining)
+            logger.info(f"💾 Pool {self.name}: {len(remaining)} objetos guardados para la próxima ejecución")
+        logger.info(f"📊 Pool {self.name}: {self.stats()}")
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats, available=len(self._ready),
+                        wait_seconds=round(self._stats['wait_seconds'], 3),
+                        create_seconds=round(self._stats['create_seconds'], 3))
+
+    def _needs_refill(self):
+        return len(self._ready) < self.low_watermark or (self._waiting and not self._ready)
+
+    def _run(self):
+        _co_initialize()
+        failures = 0
+        try:
+            while not self._stop.is_set():
+                with self._condition:
+                    self._condition.wait_for(lambda: self._stop.is_set() or self._needs_refill())
+                    if self._stop.is_set():
+                        break
+                # Reponer hasta la marca alta (o hasta que se pida detener)
+                while not self._stop.is_set() and self.available() < self.high_watermark:
+                    try:
+                        obj = self._create()
+                    except Exception as e:
+                        failures += 1
+                        self._stats['failures'] += 1
+                        self._disconnect()
+                        logger.warning(f"⚠️ Pool {self.name}: error creando objeto ({failures}/{self.max_failures}): {e}")
+                        if failures >= self.max_failures:
+                            with self._condition:
+                                self.error = f"aprovisionamiento detenido tras {failures} errores: {e}"
+                                self._condition.notify_all()
+                            return
+                        self._stop.wait(min(MAX_BACKOFF_SECONDS, 2 ** failures))
+                        continue
+                    if obj is None:
+                        break
+                    failures = 0
+                    with self._condition:
+                        self._ready.append(obj)
+                        self._condition.notify_all()
+                if self.gate:
+                    # Pool lleno: la sesión dedicada no retiene un turno hasta la próxima reposición
+                    self._disconnect()
+        finally:
+            self._disconnect()
+
+    def _create(self):
+        if self._connection is None:
+            if not self._admit():
+                return None
+            self._connection = self.connect()
+        started = time.perf_counter()
+        with tracing.span(f"provision {self.name}", "provisioning"):
+            obj = self.factory(self._connection.session)
+        elapsed = time.perf_counter() - started
+        with self._condition:
+            self._stats['created'] += 1
+            self._stats['create_seconds'] += elapsed
+        logger.debug(f"Pool {self.name}: objeto creado en {elapsed:.2f}s")
+        return obj
+
+    def _admit(self):
+        """Turno de sesión para la sesión dedicada; False si se pidió detener el pool"""
+        if self.gate is None:
+            return True
+        if self.gate.acquire(cancel=lambda: self._stop.is_set() or self._waiting > 0):
+            return True
+        if self._stop.is_set():
+            return False
+        # Los escenarios que esperan este pool ya tienen su turno: esperar el nuestro sería un interbloqueo
+        logger.warning(f"⚠️ Pool {self.name}: escenarios esperando objetos y sin turno de sesión, "
+                       f"se abre la sesión dedicada por encima del presupuesto")
+        return self.gate.acquire(force=True)
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.close_connection()
+            except Exception as e:
+                logger.debug(f"Pool {self.name}: error cerrando la sesión dedicada: {e}")
+            self._connection = None
+        if self.gate:
+            self.gate.release()
+
+
+def _co_initialize():
+    # Los objetos COM de SAP GUI requieren inicializar COM en cada hilo que los usa
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except Exception:
+        pass
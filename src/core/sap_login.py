@@ -1,54 +1,105 @@
 import time
-import win32com.client
-import subprocess
 import sys
 from time import sleep
-from src.config.config import SAPConfig, Credentials
+from src.config.config import SAPConfig
 import logging
+from src.utils import log_context
+from src.core import com_profiler
+from src.core import session_health
+from src.core.credentials import active_credential
+from src.utils import tracing
 
 logger = logging.getLogger(__name__)
 
+_win32com = None
+
+def _load_win32com():
+    """pywin32 se importa en el primer uso (no existe fuera de Windows y su carga es costosa)"""
+    global _win32com
+    if _win32com is None:
+        try:
+            import win32com.client
+            _win32com = win32com
+        except Exception:
+            _win32com = False
+    return _win32com or None
+
+def get_sapgui_object(backend=None):
+    """Objeto SAPGUI del backend configurado (COM real o simulador local)"""
+    backend = backend or SAPConfig.BACKEND
+    if backend == "simulated":
+        from src.core import sap_simulator
+        return sap_simulator.get_object()
+    win32com = _load_win32com()
+    if win32com is None:
+        raise RuntimeError("pywin32 no disponible: use SAP_BACKEND=simulated fuera de Windows")
+    return win32com.client.GetObject("SAPGUI")
+
 def open_sap_logon():
+    import subprocess
     path = SAPConfig.SAP_LOGON_PATH
     subprocess.Popen(path)
-    sleep(10)
+    with tracing.span("wait", "wait", seconds=10, reason="saplogon"):
+        sleep(10)
 
 class SAPLogin:
-    def __init__(self):
+    def __init__(self, backend=None, credential=None):
+        self.backend = backend or SAPConfig.BACKEND
+        # Usuario arrendado por el worker (pool de credenciales) o el de Credentials
+        self.credential = credential or active_credential()
         self.SapGuiAuto = None
         self.application = None
         self.connection = None
         self.session = None
+        self.username = None
+        self.logged_in = False
 
     def establish_connection(self):
+        # Conexión restablecida por el monitor de salud tras perder la sesión anterior
+        standby = session_health.take_standby(self.credential.username)
+        if standby:
+            for name in ('SapGuiAuto', 'application', 'connection', 'session', 'username', 'logged_in'):
+                setattr(self, name, getattr(standby, name))
+            logger.info("🔌 Usando la sesión SAP restablecida por el monitor de salud")
+            return self.session
+
         try:
-            self.SapGuiAuto = win32com.client.GetObject("SAPGUI")
+            self.SapGuiAuto = get_sapgui_object(self.backend)
             logger.info("SAP GUI ya está abierto.")
         except:
             logger.info("SAP Logon no está abierto. Abriéndolo...")
             open_sap_logon()
-            self.SapGuiAuto = win32com.client.GetObject("SAPGUI")
-            sleep(5)
+            self.SapGuiAuto = get_sapgui_object(self.backend)
+            with tracing.span("wait", "wait", seconds=5, reason="scripting"):
+                sleep(5)
 
         self.application = self.SapGuiAuto.GetScriptingEngine
         self.connection = self.application.OpenConnection(SAPConfig.CONNECTION_NAME, True)
-        self.session = self.connection.Children(0)
+        # Con el profiler activo, la sesión es un proxy que mide cada llamada COM
+        self.session = com_profiler.wrap(self.connection.Children(0))
+        try:
+            log_context.bind(session=self.session.Id)
+        except Exception:
+            pass
         logger.info("Conexión establecida correctamente.")
         return self.session
 
     def login(self):
         if not self.session:
             self.establish_connection()
+        if self.logged_in:
+            return True
 
         try:
             logger.info("Realizando login...")
             self.session.findById("wnd[0]/usr/txtRSYST-MANDT").text = SAPConfig.DEFAULT_CLIENT
-            self.session.findById("wnd[0]/usr/txtRSYST-BNAME").text = Credentials.USERNAME
-            self.session.findById("wnd[0]/usr/pwdRSYST-BCODE").text = Credentials.PASSWORD
+            self.session.findById("wnd[0]/usr/txtRSYST-BNAME").text = self.credential.username
+            self.session.findById("wnd[0]/usr/pwdRSYST-BCODE").text = self.credential.password
             self.session.findById("wnd[0]/usr/txtRSYST-LANGU").text = SAPConfig.DEFAULT_LANGUAGE
             self.session.findById("wnd[0]").sendVKey(0)
 
-            sleep(3)  # Aumentar tiempo de espera
+            with tracing.span("wait", "wait", seconds=SAPConfig.LOGIN_WAIT, reason="post-login"):
+                sleep(SAPConfig.LOGIN_WAIT)  # Aumentar tiempo de espera
 
             # Cierre de modal de inicio de sesion
             from src.core.sap_utils import close_sap_popups
@@ -84,6 +135,8 @@ class SAPLogin:
             except Exception as modal_error:
                 logger.info(f"No se pudo cerrar modal o no existía: {modal_error}")
 
+            self.username = self.credential.username
+            self.logged_in = True
             logger.info("Login completado exitosamente.")
             return True
 
@@ -97,3 +150,4 @@ class SAPLogin:
         self.connection = None
         self.application = None
         self.SapGuiAuto = None
+        self.logged_in = False
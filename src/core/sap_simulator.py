@@ -0,0 +1,266 @@
+import time
+import struct
+import random
+import hashlib
+import logging
+import itertools
+import threading
+from types import SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+# Campos de la pantalla de login (mismos IDs que usa SAPLogin)
+LOGIN_FIELDS = ("wnd[0]/usr/txtRSYST-MANDT", "wnd[0]/usr/txtRSYST-BNAME",
+                "wnd[0]/usr/pwdRSYST-BCODE", "wnd[0]/usr/txtRSYST-LANGU")
+POPUP_BUTTONS = ("/usr/btnSPOP-OPTION1", "/tbar[0]/btn[0]", "/usr/btnBUTTON_1", "/usr/btnEND")
+INVALID_USERS = ("usuario_invalido",)
+STATUS_BAR = "wnd[0]/sbar"
+# Numeración interna de materiales (MM01); distinta por proceso para no repetir entre ejecuciones
+_material_numbers = itertools.count(100000000 + (int(time.time()) % 100000) * 1000)
+
+
+# RPC_E_DISCONNECTED: lo que lanza pywin32 al usar una sesión cuya conexión se cayó
+DISCONNECTED_HRESULT = -2147417848
+# RPC_E_CALL_REJECTED: SAP GUI ocupado procesando otra llamada (la misma llamada se puede repetir)
+BUSY_HRESULT = -2147418111
+
+
+class SimulatedComError(Exception):
+    """Equivalente al ``pywintypes.com_error`` que lanza SAP GUI al no encontrar un control"""
+
+    def __init__(self, message, hresult=None):
+        super().__init__(message)
+        self.hresult = hresult
+
+
+class SimulatorSettings:
+    """Latencias y comportamiento del backend simulado (en ms, configurables por entorno)"""
+
+    def __init__(self, latency_ms=None, jitter_ms=None, server_ms=None, popup_rate=None, seed=None,
+                 disconnect_rate=None, busy_rate=None):
+        from src.config.config import SimulatorConfig
+        self.latency_ms = float(latency_ms if latency_ms is not None else SimulatorConfig.LATENCY_MS)
+        self.jitter_ms = float(jitter_ms if jitter_ms is not None else SimulatorConfig.JITTER_MS)
+        # Tiempo de "servidor" en sendVKey/StartTransaction (ida y vuelta al application server)
+        self.server_ms = float(server_ms if server_ms is not None else SimulatorConfig.SERVER_MS)
+        self.popup_rate = float(popup_rate if popup_rate is not None else SimulatorConfig.POPUP_RATE)
+        # Probabilidad de perder la conexión en cada ida y vuelta al servidor (timeouts, VPN)
+        self.disconnect_rate = float(disconnect_rate if disconnect_rate is not None
+                                     else SimulatorConfig.DISCONNECT_RATE)
+        # Probabilidad de que SAP GUI rechace una ida y vuelta por estar ocupado (error transitorio)
+        self.busy_rate = float(busy_rate if busy_rate is not None else SimulatorConfig.BUSY_RATE)
+        self.random = random.Random(seed if seed is not None else (SimulatorConfig.SEED or None))
+
+    def delay(self, server=False):
+        delay_ms = self.latency_ms
+        if self.jitter_ms:
+            delay_ms += self.random.uniform(0, self.jitter_ms)
+        if server:
+            delay_ms += self.server_ms
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+
+class SimulatedElement:
+    """Control de SAP GUI (campo, botón o ventana)"""
+
+    def __init__(self, session, element_id):
+        self._session = session
+        self.Id = element_id
+        self.exists = True
+
+    @property
+    def text(self):
+        self._session.settings.delay()
+        return self._session.values.get(self.Id, "")
+
+    @text.setter
+    def text(self, value):
+        self._session.settings.delay()
+        self._session.values[self.Id] = value
+
+    def press(self):
+        self._session.server_call()
+        self._session.on_press(self.Id)
+
+    def sendVKey(self, key):
+        self._session.server_call()
+        self._session.on_vkey(self.Id, key)
+
+    def setFocus(self):
+        self._session.settings.delay()
+
+    def hardCopy(self, path, image_format=None):
+        self._session.settings.delay()
+        with open(path, 'wb') as f:
+            f.write(self._session.screen_bytes())
+        return path
+
+    def HardCopyToMemory(self, image_format=0):
+        self._session.settings.delay()
+        return self._session.screen_bytes()
+
+
+class SimulatedSession:
+    """Sesión con la pantalla de login, ventanas emergentes y transacciones"""
+
+    def __init__(self, connection, index, settings):
+        self.connection = connection
+        self.settings = settings
+        self.Id = f"{connection.Id}/ses[{index}]"
+        self.values = {}
+        self.windows = {"wnd[0]"}
+        self.logged_in = False
+        self.transaction = "S000"
+        self.status_message = ""
+        self.calls = 0
+        self.connected = True
+
+    def ensure_connected(self):
+        if not self.connected:
+            raise SimulatedComError("The object invoked has disconnected from its clients.", DISCONNECTED_HRESULT)
+
+    def server_call(self):
+        """Ida y vuelta al servidor: aquí se inyectan las desconexiones y los rechazos por ocupado"""
+        self.ensure_connected()
+        self.settings.delay(server=True)
+        if self.settings.disconnect_rate and self.settings.random.random() < self.settings.disconnect_rate:
+            self.connected = False
+            logger.info(f"🧪 Conexión simulada perdida: {self.Id}")
+            self.ensure_connected()
+        if self.settings.busy_rate and self.settings.random.random() < self.settings.busy_rate:
+            raise SimulatedComError("Call was rejected by callee.", BUSY_HRESULT)
+
+    def findById(self, element_id, raise_error=True):
+        self.calls += 1
+        self.ensure_connected()
+        self.settings.delay()
+        window = element_id.split('/', 1)[0]
+        if window not in self.windows:
+            if raise_error:
+                raise SimulatedComError(f"The control could not be found by id: {element_id}")
+            return None
+        return SimulatedElement(self, element_id)
+
+    def StartTransaction(self, transaction_code):
+        self.calls += 1
+        self.server_call()
+        if not self.logged_in:
+            raise SimulatedComError("Sesión sin login")
+        self.transaction = transaction_code.upper()
+        self._maybe_popup()
+
+    def EndTransaction(self):
+        self.settings.delay(server=True)
+        self.transaction = "S000"
+
+    @property
+    def Info(self):
+        # GuiSessionInfo: atributos, no diccionario
+        self.ensure_connected()
+        return SimpleNamespace(SystemName='SIM', Client=self.values.get(LOGIN_FIELDS[0], ''),
+                               User=self.values.get(LOGIN_FIELDS[1], ''), Transaction=self.transaction)
+
+    def on_vkey(self, element_id, key):
+        window = element_id.split('/', 1)[0]
+        if window == "wnd[0]" and key == 0 and not self.logged_in:
+            self._login()
+        elif window == "wnd[0]" and key == 11 and self.transaction == "MM01":
+            self._save_material()
+        elif window != "wnd[0]":
+            self.windows.discard(window)
+
+    def on_press(self, element_id):
+        window, _, control = element_id.partition('/')
+        if window != "wnd[0]" and f"/{control}" in POPUP_BUTTONS:
+            self.windows.discard(window)
+
+    def screen_bytes(self):
+        """BMP real y pequeño; pantallas iguales dan los mismos bytes (el almacén de evidencias deduplica)"""
+        state = f"{self.Id}|{self.transaction}|{sorted(self.windows)}|{self.status_message}"
+        return _bmp(hashlib.sha256(state.encode('utf-8')).digest())
+
+    def _login(self):
+        user = self.values.get(LOGIN_FIELDS[1], "")
+        if not user or user in INVALID_USERS or not self.values.get(LOGIN_FIELDS[2]):
+            self.status_message = "E: Nombre o clave de acceso incorrectos"
+            return
+        self.logged_in = True
+        self.status_message = ""
+        self._maybe_popup()
+
+    def _save_material(self):
+        self.status_message = f"Se ha creado el material {next(_material_numbers)}"
+        self.values[STATUS_BAR] = self.status_message
+
+    def _maybe_popup(self):
+        if self.settings.popup_rate and self.settings.random.random() < self.settings.popup_rate:
+            self.windows.add("wnd[1]")
+
+
+def _bmp(seed, width=16, height=8):
+    """BMP de 24 bits sin comprimir cuyos píxeles salen de ``seed`` (filas de 48 bytes: sin relleno)"""
+    pixels = (seed * (width * height * 3 // len(seed) + 1))[:width * height * 3]
+    header = struct.pack('<2sIHHI', b'BM', 54 + len(pixels), 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, len(pixels), 2835, 2835, 0, 0)
+    return header + info + pixels
+
+
+class SimulatedConnection:
+    def __init__(self, application, index, name, settings):
+        self.Id = f"/app/con[{index}]"
+        self.Description = name
+        self._sessions = [SimulatedSession(self, 0, settings)]
+
+    def Children(self, index):
+        return self._sessions[index]
+
+    def CloseConnection(self):
+        for session in self._sessions:
+            session.connected = False
+        self._sessions = []
+
+
+class SimulatedApplication:
+    """``GetScriptingEngine`` del backend simulado"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or SimulatorSettings()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def OpenConnection(self, name, sync=True):
+        self.settings.delay(server=True)
+        with self._lock:
+            connection = SimulatedConnection(self, len(self._connections), name, self.settings)
+            self._connections.append(connection)
+        return connection
+
+    def Children(self, index):
+        return self._connections[index]
+
+
+class SimulatedSapGui:
+    """Sustituto de ``win32com.client.GetObject("SAPGUI")``"""
+
+    def __init__(self, settings=None):
+        self.GetScriptingEngine = SimulatedApplication(settings)
+
+
+_gui = None
+
+
+def get_object(name="SAPGUI"):
+    """Objeto SAPGUI simulado, compartido dentro del proceso como el de SAP Logon"""
+    global _gui
+    if _gui is None:
+        _gui = SimulatedSapGui()
+        logger.info("🧪 Backend SAP simulado activo")
+    return _gui
+
+
+def reset(settings=None):
+    """Reinicia el backend simulado (nuevas conexiones y latencias)"""
+    global _gui
+    _gui = SimulatedSapGui(settings)
+    return _gui
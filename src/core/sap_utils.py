@@ -1,12 +1,17 @@
 import time
 import logging
 
+from src.utils import tracing
+
 logger = logging.getLogger(__name__)
+# Categoría de sondeo de popups: muy ruidosa en DEBUG, se muestrea vía LOG_SAMPLING
+popup_logger = logging.getLogger(f"{__name__}.popups")
 
 # Utilidad de tiempo
 def wait(seconds=5):
     logger.info(f"Esperando {seconds} segundos...")
-    time.sleep(seconds)
+    with tracing.span("wait", "wait", seconds=seconds):
+        time.sleep(seconds)
 
 # Utilidad para detectar modales
 def close_sap_popups(session):
@@ -20,6 +25,7 @@ def close_sap_popups(session):
 
         for window in popup_windows:
             try:
+                popup_logger.debug(f"Sondeando popup {window}")
                 if session.findById(window).exists:
                     for button in close_buttons:
                         try:
@@ -29,8 +35,15 @@ def close_sap_popups(session):
                         except:
                             continue
             except:
+                popup_logger.debug(f"Sin popup en {window}")
                 continue
 
     except Exception as e:
         logger.error(f"Error cerrando popups: {e}")
 
+def reset_to_initial_screen(session):
+    """Cierra popups y vuelve a la pantalla inicial (``/n``) sin cerrar la sesión"""
+    close_sap_popups(session)
+    session.findById("wnd[0]/tbar[0]/okcd").text = "/n"
+    session.findById("wnd[0]").sendVKey(0)
+
@@ -0,0 +1,290 @@
+import os
+import re
+import time
+import random
+import socket
+import logging
+import itertools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from src.utils import tracing
+from src.utils.shared_table import SharedTable, pid_alive
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.5
+# Un turno en cola sin sondeo reciente es de un proceso que murió esperando
+QUEUE_STALE_SECONDS = 30
+# Tag de feature/escenario: @priority(5)
+PRIORITY_TAG = re.compile(r"^priority\((-?\d+)\)$")
+# Ámbitos del presupuesto: sesiones del sistema, por usuario SAP y por conexión de SAP Logon en un host
+SCOPES = ("system", "user", "connection")
+
+
+class SessionBudgetError(Exception):
+    """Sin turno de sesión SAP dentro del tiempo de espera"""
+
+
+class SessionBudget:
+    """Presupuesto global de sesiones SAP compartido por todos los workers (procesos y hosts).
+
+    Antes de abrir una sesión, escenarios y aprovisionamiento piden un turno en cada
+    ámbito con límite (``system``, ``user``, ``connection``); lo devuelven al cerrarla.
+    Los turnos y la cola viven en ``<budget_dir>/budget.json`` (``SharedTable``).
+
+    La cola es justa: se atiende por prioridad y, a igual prioridad, por orden de llegada.
+    Cada ``aging_seconds`` de espera suman un punto de prioridad, de modo que los módulos
+    de baja prioridad no esperan indefinidamente. Un turno que no cabe bloquea los ámbitos
+    saturados que necesita: nadie detrás de él lo adelanta en esos ámbitos. Las esperas
+    quedan en ``snapshot()`` para dimensionar los límites.
+    """
+
+    def __init__(self, limits, budget_dir, aging_seconds=60, stale_hours=12, poll_seconds=POLL_SECONDS,
+                 system=None):
+        self.limits = {scope: int(limit) for scope, limit in limits.items() if limit and int(limit) > 0}
+        if not self.limits:
+            raise SessionBudgetError("El presupuesto de sesiones no tiene límites")
+        self.table = SharedTable(Path(budget_dir) / "budget.json")
+        self.aging_seconds = aging_seconds
+        self.stale_hours = stale_hours
+        self.poll_seconds = poll_seconds
+        self.host = socket.gethostname()
+        self.system = system or "SAP"
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.held = {}
+        self.stats = {'acquired': 0, 'contended': 0, 'timeouts': 0, 'overdrafts': 0, 'reclaimed': 0}
+        self.waits = []
+
+    @classmethod
+    def from_config(cls):
+        """Presupuesto según ``SessionBudgetConfig``; ``None`` si no hay límites configurados"""
+        from src.config.config import SAPConfig, SessionBudgetConfig
+
+        limits = {'system': SessionBudgetConfig.SYSTEM_SESSIONS, 'user': SessionBudgetConfig.USER_SESSIONS,
+                  'connection': SessionBudgetConfig.CONNECTION_SESSIONS}
+        if not any(limit > 0 for limit in limits.values()):
+            return None
+        return cls(limits, SessionBudgetConfig.DIR, aging_seconds=SessionBudgetConfig.AGING_SECONDS,
+                   system=SAPConfig.CONNECTION_NAME)
+
+    def scopes(self, username=None):
+        """Ámbitos con límite que consume una sesión de ``username`` abierta desde este host"""
+        keys = {'system': f"system:{self.system}", 'user': f"user:{username or '?'}",
+                'connection': f"connection:{self.host}:{self.system}"}
+        return {keys[scope]: limit for scope, limit in self.limits.items()}
+
+    def gate(self, holder, username=None, priority=0, kind="scenario"):
+        return BudgetGate(self, holder, username, priority, kind)
+
+    def acquire(self, holder, username=None, priority=0, kind="scenario", timeout=600, cancel=None, force=False):
+        """Turno para una sesión de ``holder``; espera en la cola hasta ``timeout``.
+
+        ``cancel`` se consulta en cada sondeo: si retorna verdadero se abandona la cola y se
+        retorna ``None``. Con ``force`` el turno se concede aunque exceda el límite.
+        """
+        ticket = f"{self.host}:{os.getpid()}:{next(self._ids)}"
+        record = {'holder': holder, 'kind': kind, 'priority': priority, 'scopes': self.scopes(username),
+                  'pid': os.getpid(), 'host': self.host, 'enqueued_at': time.time()}
+        started = time.perf_counter()
+        bottleneck = None
+        granted = False
+        try:
+            with tracing.span("wait", "wait", reason="session_budget", holder=holder):
+                while True:
+                    with self._locked_table() as table:
+                        queue, grants = table['queue'], table['grants']
+                        queue.setdefault(ticket, record)['heartbeat'] = time.time()
+                        admitted, saturated = (True, []) if force else self._admissible(ticket, table)
+                        if admitted:
+                            del queue[ticket]
+                            grants[ticket] = dict(record, granted_at=datetime.now().isoformat())
+                            granted = True
+                            break
+                        position = sorted(queue.values(), key=self._order_key).index(queue[ticket]) + 1
+                    waited = time.perf_counter() - started
+                    if bottleneck is None:
+                        bottleneck = sorted({scope.split(':', 1)[0] for scope in saturated})
+                        with self._lock:
+                            self.stats['contended'] += 1
+                        logger.info(f"⏳ {holder}: sin turno de sesión SAP ({', '.join(saturated)}), "
+                                    f"posición {position} en la cola")
+                    if cancel is not None and cancel():
+                        return None
+                    if timeout is not None and waited >= timeout:
+                        with self._lock:
+                            self.stats['timeouts'] += 1
+                        raise SessionBudgetError(f"{holder}: sin turno de sesión SAP tras {waited:.0f}s "
+                                                 f"(ámbitos saturados: {', '.join(saturated)})")
+                    delay = self.poll_seconds * random.uniform(0.5, 1.5)
+                    time.sleep(delay if timeout is None else max(0.0, min(timeout - waited, delay)))
+        finally:
+            waited = time.perf_counter() - started
+            if not granted:
+                self._dequeue(ticket)
+            self._record_wait(holder, kind, priority, waited, bottleneck, granted, force)
+
+        with self._lock:
+            self.held[ticket] = holder
+            self.stats['acquired'] += 1
+            self.stats['overdrafts'] += int(force)
+        if bottleneck is not None:
+            logger.info(f"🎟️ {holder}: turno de sesión SAP concedido tras esperar {waited:.1f}s")
+        return ticket
+
+    def release(self, ticket):
+        with self._lock:
+            if ticket is None or self.held.pop(ticket, None) is None:
+                return
+        with self._locked_table() as table:
+            table['grants'].pop(ticket, None)
+
+    def release_all(self):
+        with self._lock:
+            tickets = list(self.held)
+        for ticket in tickets:
+            self.release(ticket)
+
+    @contextmanager
+    def session(self, holder, username=None, priority=0, kind="scenario", timeout=600):
+        """Turno mientras dura el bloque ``with``"""
+        ticket = self.acquire(holder, username, priority, kind, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, limits=dict(self.limits), waits=list(self.waits))
+
+    def _admissible(self, ticket, table):
+        """(admitido, ámbitos saturados): recorre la cola en orden reservando capacidad"""
+        used = Counter(scope for grant in table['grants'].values() for scope in grant['scopes'])
+        blocked = set()
+        for candidate, record in sorted(table['queue'].items(), key=lambda item: self._order_key(item[1])):
+            saturated = [scope for scope, limit in record['scopes'].items()
+                         if scope in blocked or used[scope] >= limit]
+            if candidate == ticket:
+                return not saturated, saturated
+            if saturated:
+                # Sin adelantos en los ámbitos que este turno espera
+                blocked.update(saturated)
+            else:
+                # Cabe: se le reserva la capacidad, la tomará en su próximo sondeo
+                used.update(record['scopes'].keys())
+        return False, []
+
+    def _order_key(self, record):
+        waited = time.time() - record['enqueued_at']
+        aging = waited / self.aging_seconds if self.aging_seconds else 0
+        return -(record.get('priority', 0) + aging), record['enqueued_at']
+
+    @contextmanager
+    def _locked_table(self):
+        with self.table.locked() as table:
+            table.setdefault('grants', {})
+            table.setdefault('queue', {})
+            now = time.time()
+            for ticket, record in list(table['grants'].items()):
+                if self._abandoned(record):
+                    logger.info(f"♻️ Turno de sesión de {record.get('holder')} recuperado (pid {record.get('pid')})")
+                    del table['grants'][ticket]
+                    with self._lock:
+                        self.stats['reclaimed'] += 1
+            for ticket, record in list(table['queue'].items()):
+                if now - record.get('heartbeat', 0) > QUEUE_STALE_SECONDS or (
+                        record.get('host') == self.host and not pid_alive(record.get('pid'))):
+                    del table['queue'][ticket]
+            yield table
+
+    def _dequeue(self, ticket):
+        try:
+            with self._locked_table() as table:
+                table['queue'].pop(ticket, None)
+        except Exception as e:
+            logger.debug(f"No se pudo retirar {ticket} de la cola: {e}")
+
+    def _abandoned(self, record):
+        if record.get('host') == self.host and not pid_alive(record.get('pid')):
+            return True
+        try:
+            age = datetime.now() - datetime.fromisoformat(record['granted_at'])
+        except Exception:
+            return True
+        return age.total_seconds() > self.stale_hours * 3600
+
+    def _record_wait(self, holder, kind, priority, waited, bottleneck, granted, force):
+        with self._lock:
+            self.waits.append({'holder': holder, 'kind': kind, 'priority': priority, 'waited': round(waited, 3),
+                               'bottleneck': bottleneck or [], 'granted': granted, 'overdraft': force})
+
+
+class BudgetGate:
+    """Turno reutilizable de un mismo solicitante (p. ej. la sesión dedicada de un pool)"""
+
+    def __init__(self, budget, holder, username=None, priority=0, kind="scenario"):
+        self.budget = budget
+        self.holder = holder
+        self.username = username
+        self.priority = priority
+        self.kind = kind
+        self.ticket = None
+
+    def acquire(self, timeout=None, cancel=None, force=False):
+        """True si hay turno (ya tenido o concedido); False si ``cancel`` abandonó la cola"""
+        if self.ticket is None:
+            self.ticket = self.budget.acquire(self.holder, self.username, self.priority, self.kind,
+                                              timeout=timeout, cancel=cancel, force=force)
+        return self.ticket is not None
+
+    def release(self):
+        ticket, self.ticket = self.ticket, None
+        self.budget.release(ticket)
+
+
+def scenario_priority(scenario, default=0):
+    """Prioridad del tag ``@priority(N)`` del escenario o su feature; si no, ``default``"""
+    for tag in getattr(scenario, 'effective_tags', None) or ():
+        match = PRIORITY_TAG.match(tag)
+        if match:
+            return int(match.group(1))
+    return default
+
+
+def summarize_waits(waits):
+    """Esperas agregadas por tipo de solicitante y por ámbito cuello de botella"""
+    def stats(values):
+        values = sorted(values)
+        if not values:
+            return {'count': 0, 'wait_seconds': 0.0, 'p50_wait_seconds': 0.0, 'p95_wait_seconds': 0.0,
+                    'max_wait_seconds': 0.0}
+        return {'count': len(values), 'wait_seconds': round(sum(values), 3),
+                'p50_wait_seconds': values[len(values) // 2],
+                'p95_wait_seconds': values[min(len(values) - 1, int(len(values) * 0.95))],
+                'max_wait_seconds': values[-1]}
+
+    by_kind, by_bottleneck = {}, {}
+    for wait in waits:
+        by_kind.setdefault(wait['kind'], []).append(wait['waited'])
+        for scope in wait.get('bottleneck') or ():
+            by_bottleneck.setdefault(scope, []).append(wait['waited'])
+    return {'by_kind': {kind: stats(values) for kind, values in by_kind.items()},
+            'by_bottleneck': {scope: stats(values) for scope, values in by_bottleneck.items()}}
+
+
+def merge_budget(target, snapshot):
+    """Suma el ``snapshot`` de un módulo (sidecar) sobre ``target`` y recalcula el resumen"""
+    for name, value in (snapshot or {}).items():
+        if name == 'waits':
+            target.setdefault('waits', []).extend(value)
+        elif name == 'limits':
+            target['limits'] = value
+        elif isinstance(value, (int, float)):
+            target[name] = target.get(name, 0) + value
+    target.update(summarize_waits(target.get('waits', [])))
+    return target
@@ -0,0 +1,290 @@
+import time
+import logging
+
+from src.core import com_profiler
+from src.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# Clasificación de errores COM de SAP GUI
+SESSION_LOST = "session_lost"
+BUSY = "busy"
+ELEMENT_NOT_FOUND = "element_not_found"
+APPLICATION = "application"
+
+# HRESULT (pywintypes.com_error.hresult) que indican sesión o conexión perdida
+SESSION_LOST_HRESULTS = {
+    -2147417848,  # RPC_E_DISCONNECTED: el objeto se desconectó de sus clientes
+    -2147023174,  # RPC_S_SERVER_UNAVAILABLE
+    -2147023170,  # RPC_S_CALL_FAILED
+    -2147417856,  # RPC_E_SYS_CALL_FAILED
+    -2147221251,  # CO_E_OBJNOTCONNECTED
+}
+# SAP GUI ocupado: la llamada se puede repetir sin reconectar
+BUSY_HRESULTS = {
+    -2147417846,  # RPC_E_SERVERCALL_RETRYLATER
+    -2147418111,  # RPC_E_CALL_REJECTED
+}
+SESSION_LOST_TEXT = ("disconnected", "rpc server is unavailable", "not connected", "sesión sin login",
+                     "connection to partner", "conexión con el sistema", "session was terminated",
+                     "sesión finalizada")
+ELEMENT_NOT_FOUND_TEXT = ("could not be found by id", "no se encontró el control")
+
+
+def _com_details(exc):
+    """(hresult, texto) de un ``com_error`` de pywin32 o de un error equivalente"""
+    hresult = getattr(exc, 'hresult', None)
+    args = getattr(exc, 'args', ())
+    if hresult is None and args and isinstance(args[0], int):
+        hresult = args[0]
+    parts = [str(exc)]
+    # com_error.args = (hresult, strerror, excepinfo, argerror); excepinfo[2] trae la descripción de SAP
+    if len(args) > 2 and isinstance(args[2], tuple) and len(args[2]) > 2 and args[2][2]:
+        parts.append(str(args[2][2]))
+    return hresult, " ".join(parts).lower()
+
+
+def classify_com_error(exc):
+    """Clasifica un error (o su causa encadenada) como sesión perdida, ocupado, control inexistente o de aplicación"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        hresult, text = _com_details(exc)
+        if hresult in SESSION_LOST_HRESULTS or any(marker in text for marker in SESSION_LOST_TEXT):
+            return SESSION_LOST
+        if hresult in BUSY_HRESULTS:
+            return BUSY
+        if any(marker in text for marker in ELEMENT_NOT_FOUND_TEXT):
+            return ELEMENT_NOT_FOUND
+        exc = exc.__cause__ or exc.__context__
+    return APPLICATION
+
+
+def probe(session):
+    """Sondeo barato (lectura de ``Info``); fuera del profiler COM para no sumar al paso"""
+    if session is None:
+        return False
+    try:
+        com_profiler.unwrap(session).Info.Transaction
+        return True
+    except Exception as e:
+        logger.debug(f"Sondeo de sesión fallido: {e}")
+        return False
+
+
+class SessionHealthMonitor:
+    """Vigila la sesión SAP del escenario y la restablece cuando se pierde.
+
+    Los hooks de behave llaman a ``check`` entre pasos (sondeo cada ``probe_interval``
+    segundos) y a ``is_lost`` cuando un escenario falla. ``recover`` descarta la conexión
+    muerta, abre una nueva con login y la deja en espera: el siguiente ``SAPLogin`` del
+    mismo usuario la adopta en lugar de volver a conectarse.
+    """
+
+    def __init__(self, probe_interval=30.0, reconnect_attempts=3, reconnect_backoff=2.0, connect=None):
+        self.probe_interval = probe_interval
+        self.reconnect_attempts = max(1, reconnect_attempts)
+        self.reconnect_backoff = reconnect_backoff
+        self.connect = connect or _connect
+        self._last_probe = 0.0
+        self.stats = {'probes': 0, 'probe_failures': 0, 'reconnects': 0, 'reconnect_failures': 0,
+                      'retried': 0, 'recovered': 0, 'time_lost': 0.0}
+        self.events = []
+
+    def check(self, sap_login, force=False):
+        """Sondea la sesión si venció el intervalo; si está muerta la reemplaza en el mismo ``SAPLogin``"""
+        session = getattr(sap_login, 'session', None)
+        if session is None or (not force and time.monotonic() - self._last_probe < self.probe_interval):
+            return True
+        self._last_probe = time.monotonic()
+        self.stats['probes'] += 1
+        if probe(session):
+            return True
+        self.stats['probe_failures'] += 1
+        logger.warning("🔌 Sondeo de sesión SAP fallido: reconectando")
+        return self.recover(sap_login, reason="probe", replace=True) is not None
+
+    def is_lost(self, sap_login, exception=None):
+        """True si el fallo se debe a la sesión: error COM clasificado o sondeo fallido"""
+        if exception is not None:
+            kind = classify_com_error(exception)
+            if kind == SESSION_LOST:
+                return True
+            if kind == ELEMENT_NOT_FOUND:
+                # Un control inexistente en una sesión viva es un fallo de la prueba
+                return not probe(getattr(sap_login, 'session', None))
+        session = getattr(sap_login, 'session', None)
+        return session is not None and not probe(session)
+
+    def recover(self, sap_login=None, reason="error", replace=False):
+        """Descarta la conexión muerta y abre una nueva; retorna el ``SAPLogin`` restablecido o ``None``.
+
+        Con ``replace`` la nueva sesión se instala en el mismo ``sap_login`` (el escenario
+        continúa sin notarlo); si no, queda en espera para el siguiente ``SAPLogin``.
+        """
+        started = time.perf_counter()
+        if sap_login is not None:
+            _teardown(sap_login)
+        recovered = None
+        with tracing.span("reconnect", "session", reason=reason):
+            for attempt in range(1, self.reconnect_attempts + 1):
+                try:
+                    recovered = self.connect()
+                    break
+                except Exception as e:
+                    logger.warning(f"⚠️ Reconexión {attempt}/{self.reconnect_attempts} fallida: {e}")
+                    if attempt < self.reconnect_attempts:
+                        time.sleep(self.reconnect_backoff * attempt)
+        elapsed = time.perf_counter() - started
+        self.stats['time_lost'] += elapsed
+        if recovered is None:
+            self.stats['reconnect_failures'] += 1
+            logger.error(f"❌ No se pudo restablecer la sesión SAP tras {elapsed:.1f}s")
+            return None
+
+        self.stats['reconnects'] += 1
+        if replace and sap_login is not None:
+            _adopt(sap_login, recovered)
+            recovered = sap_login
+        else:
+            set_standby(recovered)
+        logger.info(f"🔌 Sesión SAP restablecida en {elapsed:.1f}s ({reason})")
+        return recovered
+
+    def record_retry(self, scenario, error, failed_attempt_seconds, reconnect_seconds, passed):
+        """Registra un escenario reintentado tras perder la sesión"""
+        self.stats['retried'] += 1
+        self.stats['recovered'] += int(passed)
+        self.stats['time_lost'] += failed_attempt_seconds
+        self.events.append({
+            'scenario': str(scenario.location),
+            'name': scenario.name,
+            'error': str(error)[:300] if error else None,
+            'failed_attempt': round(failed_attempt_seconds, 3),
+            'reconnect': round(reconnect_seconds, 3),
+            'time_lost': round(failed_attempt_seconds + reconnect_seconds, 3),
+            'retry_status': 'passed' if passed else 'failed'
+        })
+
+    def snapshot(self):
+        return dict(self.stats, time_lost=round(self.stats['time_lost'], 3), events=list(self.events))
+
+
+def retry_on_session_loss(scenario, monitor):
+    """Reintenta una vez el escenario si falló por sesión perdida (la marca la pone ``after_scenario``).
+
+    El intento fallido se retira del formatter JSON para que el reporte muestre el
+    resultado del reintento; el detalle queda en los eventos del monitor.
+    """
+    if hasattr(scenario, 'scenarios'):
+        for child in scenario.scenarios:
+            retry_on_session_loss(child, monitor)
+        return
+    # Depende de internals de behave 1.2.6 (fijado en requirements.txt): si faltan, sin reintento
+    run_once = getattr(scenario, 'run', None)
+    if not callable(run_once):
+        logger.warning("⚠️ behave no expone Scenario.run: reintento por sesión perdida desactivado")
+        return
+
+    def run(runner):
+        started = time.perf_counter()
+        failed = run_once(runner)
+        if not failed or not getattr(scenario, 'session_lost', False):
+            return failed
+        failed_attempt = time.perf_counter() - started
+        attempts = _failed_attempts(runner, scenario)
+        if attempts is None:
+            logger.warning("⚠️ El formatter JSON de behave no expone su estado: sin reintento")
+            return failed
+        error = scenario.session_error
+        lost_before = monitor.stats['time_lost']
+        logger.warning(f"🔁 Escenario '{scenario.name}' falló por sesión perdida: reintentando")
+        if monitor.recover(getattr(scenario, 'dead_login', None), reason="scenario") is None:
+            return failed
+        reconnect = monitor.stats['time_lost'] - lost_before
+        _discard_failed_attempt(attempts)
+        scenario.session_lost = False
+        failed = run_once(runner)
+        monitor.record_retry(scenario, error, failed_attempt, reconnect, passed=not failed)
+        if getattr(scenario, 'session_lost', False):
+            # Sin más reintentos: solo se descarta la conexión muerta
+            _teardown(scenario.dead_login)
+        return failed
+
+    scenario.run = run
+
+
+def _failed_attempts(runner, scenario):
+    """Formatters JSON cuyo último elemento es el intento fallido; None si behave no expone su estado"""
+    attempts = []
+    for formatter in getattr(runner, 'formatters', None) or []:
+        if getattr(formatter, 'name', None) != 'json':
+            continue
+        data = getattr(formatter, 'current_feature_data', None)
+        elements = data.get('elements') if isinstance(data, dict) else None
+        if not isinstance(elements, list) or not hasattr(formatter, 'current_scenario'):
+            return None
+        if elements and elements[-1].get('location') == str(scenario.location):
+            attempts.append((formatter, elements))
+    return attempts
+
+
+def _discard_failed_attempt(attempts):
+    for formatter, elements in attempts:
+        elements.pop()
+        # Sin escenario en curso el formatter no copia el estado del intento descartado a otro elemento
+        formatter.current_scenario = None
+
+
+# Conexión restablecida a la espera del siguiente SAPLogin
+_standby = None
+
+
+def set_standby(sap_login):
+    global _standby
+    if _standby is not None and _standby is not sap_login:
+        _teardown(_standby)
+    _standby = sap_login
+
+
+def take_standby(username):
+    """Entrega la conexión en espera si pertenece a ``username`` (las credenciales inválidas no la usan)"""
+    global _standby
+    if _standby is None or getattr(_standby, 'username', None) != username:
+        return None
+    standby, _standby = _standby, None
+    return standby
+
+
+def _connect():
+    from src.core.sap_login import SAPLogin
+
+    sap_login = SAPLogin()
+    if not sap_login.login():
+        raise RuntimeError("Login no exitoso al reconectar")
+    return sap_login
+
+
+def _adopt(target, source):
+    for name in ('SapGuiAuto', 'application', 'connection', 'session', 'username', 'logged_in'):
+        setattr(target, name, getattr(source, name, None))
+
+
+def _teardown(sap_login):
+    connection = getattr(sap_login, 'connection', None)
+    try:
+        if connection is not None:
+            connection.CloseConnection()
+    except Exception as e:
+        logger.debug(f"Conexión muerta no se pudo cerrar: {e}")
+    sap_login.close_connection()
+
+
+def merge_health(target, snapshot):
+    """Suma las estadísticas de un ``snapshot`` (sidecar de un módulo) sobre ``target``"""
+    for name, value in (snapshot or {}).items():
+        if name == 'events':
+            target.setdefault('events', []).extend(value)
+        elif isinstance(value, (int, float)):
+            target[name] = round(target.get(name, 0) + value, 3)
+    return target
@@ -0,0 +1,374 @@
+import os
+import re
+import json
+import time
+import logging
+import functools
+from datetime import datetime
+from pathlib import Path
+
+from src.core import session_health
+from src.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# Errores transitorios: la misma llamada puede funcionar segundos después sobre la misma sesión
+RETRYABLE_KINDS = (session_health.BUSY, session_health.ELEMENT_NOT_FOUND)
+# Modos: repetir solo el paso, o además volver al último paso seguro y repetir desde ahí
+STEP_MODE = "step"
+CHECKPOINT_MODE = "checkpoint"
+# Tags de feature/escenario: @retry, @retry(5), @no_retry, @retry_from_checkpoint
+RETRY_TAG = re.compile(r"^retry(?:\((\d+)\))?$")
+NO_RETRY_TAG = "no_retry"
+CHECKPOINT_TAG = "retry_from_checkpoint"
+MAX_BACKOFF_SECONDS = 10
+# Peso de la ejecución más reciente en el índice de inestabilidad (media móvil exponencial)
+FLAKINESS_ALPHA = 0.3
+MAX_ERRORS_PER_STEP = 5
+
+
+class RetryPolicy:
+    """Intentos por paso y espera exponencial acotada (``backoff * 2^(n-1)``) entre ellos"""
+
+    def __init__(self, attempts=1, backoff=0.5, mode=STEP_MODE, max_backoff=MAX_BACKOFF_SECONDS):
+        self.attempts = max(1, int(attempts))
+        self.backoff = max(0.0, float(backoff))
+        self.mode = mode if mode in (STEP_MODE, CHECKPOINT_MODE) else STEP_MODE
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt):
+        return min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+
+    def override(self, attempts=None, backoff=None, mode=None):
+        return RetryPolicy(self.attempts if attempts is None else attempts,
+                           self.backoff if backoff is None else backoff,
+                           mode or self.mode, self.max_backoff)
+
+
+def retryable(attempts=None, backoff=None, mode=None):
+    """Política propia de una definición de paso; va debajo de ``@given/@when/@then``"""
+    def decorate(func):
+        func._retry_policy = {'attempts': attempts, 'backoff': backoff, 'mode': mode}
+        return func
+    return decorate
+
+
+def safe_checkpoint(func):
+    """Marca un paso tras el cual la sesión se puede restaurar con ``/n`` (punto de reanudación)"""
+    func._retry_checkpoint = True
+    return func
+
+
+def retry_kind(exc):
+    """Tipo de error transitorio de SAP GUI, o ``None`` si el fallo no se debe reintentar"""
+    if exc is None or isinstance(exc, AssertionError):
+        return None
+    kind = session_health.classify_com_error(exc)
+    return kind if kind in RETRYABLE_KINDS else None
+
+
+class StepRetrier:
+    """Reintenta los pasos que fallan por errores transitorios (SAP ocupado, control aún no disponible).
+
+    ``install`` envuelve una sola vez las funciones del registro de pasos de behave; el
+    envoltorio busca el ``StepRetrier`` activo en ``context.step_retry``. Las aserciones
+    y la sesión perdida (de eso se encarga ``SessionHealthMonitor``) nunca se reintentan.
+    Cada paso acumula intentos, errores y si se recuperó; ``annotate`` los copia al JSON
+    de behave.
+    """
+
+    def __init__(self, policy=None, sleep=time.sleep):
+        self.policy = policy or RetryPolicy()
+        self.sleep = sleep
+        self.records = {}
+        self._scenario_records = {}
+        self._depth = 0
+        self._replaying = False
+        self.registry = None
+
+    def install(self, registry=None):
+        """Envuelve las definiciones de ``registry`` (el del runner: ``context._runner.step_registry``).
+
+        Depende de internals de behave 1.2.6 (fijado en requirements.txt); si el registro no
+        tiene la forma esperada retorna ``None`` y los pasos corren sin reintento.
+        """
+        if registry is None:
+            # behave.step_registry.registry puede haberse reemplazado tras cargar los pasos
+            try:
+                from behave.runner import the_step_registry as registry
+            except ImportError:
+                registry = None
+        steps = getattr(registry, 'steps', None)
+        if not isinstance(steps, dict) or not all(hasattr(matcher, 'func')
+                                                  for matchers in steps.values() for matcher in matchers):
+            logger.warning("⚠️ behave no expone el registro de pasos: reintento por paso desactivado")
+            return None
+        self.registry = registry
+        wrapped = 0
+        for matchers in steps.values():
+            for matcher in matchers:
+                if not getattr(matcher.func, '_retry_wrapped', False):
+                    matcher.func = _wrap(matcher.func)
+                    wrapped += 1
+        logger.debug(f"Reintento por paso instalado en {wrapped} definiciones")
+        return self
+
+    def begin_scenario(self):
+        self._scenario_records = {}
+
+    def policy_for(self, func, context):
+        policy = self.policy
+        scenario = getattr(context, 'current_scenario', None)
+        tags = set(getattr(scenario, 'effective_tags', None) or ())
+        for tag in tags:
+            match = RETRY_TAG.match(tag)
+            if match:
+                policy = policy.override(attempts=int(match.group(1) or max(policy.attempts, 3)))
+        if CHECKPOINT_TAG in tags:
+            policy = policy.override(mode=CHECKPOINT_MODE)
+        policy = policy.override(**getattr(func, '_retry_policy', {}))
+        if NO_RETRY_TAG in tags:
+            policy = policy.override(attempts=1, mode=STEP_MODE)
+        return policy
+
+    def run(self, func, context, args, kwargs):
+        policy = self.policy_for(func, context)
+        key = getattr(context, 'current_step_key', None) or func.__name__
+        record = self._record(key, func)
+        record['executions'] += 1
+        # Solo el paso del escenario (no los anidados con execute_steps) puede volver al checkpoint
+        outermost = self._depth == 0 and not self._replaying
+        restarted = False
+        attempt = 1
+        self._depth += 1
+        try:
+            while True:
+                try:
+                    result = func(context, *args, **kwargs)
+                except Exception as e:
+                    kind = retry_kind(e)
+                    if kind is None or not self._session_alive(context, kind):
+                        if attempt > 1:
+                            record['failed'] += 1
+                        raise
+                    _add_error(record, attempt, kind, e)
+                    if attempt < policy.attempts:
+                        delay = policy.delay(attempt)
+                        logger.warning(f"🔁 Paso '{record['name']}' falló por {kind}: intento "
+                                       f"{attempt + 1}/{policy.attempts} en {delay:.1f}s ({e})")
+                        self._wait_and_settle(context, delay)
+                        attempt += 1
+                        record['retries'] += 1
+                        continue
+                    if (policy.mode == CHECKPOINT_MODE and outermost and not restarted
+                            and self._restart_from_checkpoint(context, policy.delay(attempt))):
+                        restarted = True
+                        attempt += 1
+                        record['retries'] += 1
+                        record['checkpoint_restarts'] += 1
+                        continue
+                    record['failed'] += 1
+                    logger.error(f"❌ Paso '{record['name']}' agotó {attempt} intentos por {kind}")
+                    raise
+                if attempt > 1:
+                    record['recovered'] += 1
+                    logger.info(f"✅ Paso '{record['name']}' recuperado en el intento {attempt}")
+                return result
+        finally:
+            self._depth -= 1
+            record['max_attempts'] = max(record['max_attempts'], attempt)
+            record['mode'] = policy.mode
+
+    def annotate(self, scenario, formatters=()):
+        """Copia los reintentos del escenario a ``step.retries`` y al resultado de cada paso del JSON"""
+        prefix = f"{scenario.location}::"
+        by_location = {key[len(prefix):]: record for key, record in self._scenario_records.items()
+                       if key.startswith(prefix) and record['retries']}
+        if not by_location:
+            return 0
+        for step in getattr(scenario, 'all_steps', None) or ():
+            record = by_location.get(str(step.location))
+            if record:
+                step.retries = _public(record)
+        for formatter in formatters or ():
+            # Estado interno del formatter JSON de behave 1.2.6: si no existe, el JSON queda sin anotar
+            data = getattr(formatter, 'current_feature_data', None)
+            elements = data.get('elements') if isinstance(data, dict) else None
+            if not isinstance(elements, list) or not elements or not isinstance(elements[-1], dict) \
+                    or elements[-1].get('location') != str(scenario.location):
+                continue
+            for entry in elements[-1].get('steps', []):
+                record = by_location.get(entry.get('location'))
+                if record and isinstance(entry.get('result'), dict):
+                    entry['result']['retries'] = _public(record)
+        return len(by_location)
+
+    def snapshot(self):
+        return {key: _public(record) for key, record in self.records.items() if record['retries']}
+
+    def _record(self, key, func):
+        record = self.records.get(key)
+        if record is None:
+            record = self.records[key] = {'name': func.__name__, 'executions': 0, 'retries': 0,
+                                          'recovered': 0, 'failed': 0, 'checkpoint_restarts': 0,
+                                          'max_attempts': 1, 'mode': STEP_MODE, 'errors': []}
+        self._scenario_records[key] = record
+        return record
+
+    def _session_alive(self, context, kind):
+        # Un control inexistente en una sesión muerta lo resuelve el reintento de escenario
+        if kind != session_health.ELEMENT_NOT_FOUND:
+            return True
+        session = getattr(getattr(context, 'sap_login', None), 'session', None)
+        return session is None or session_health.probe(session)
+
+    def _wait_and_settle(self, context, delay):
+        with tracing.span("step retry", "retry", delay=delay):
+            if delay:
+                self.sleep(delay)
+            session = getattr(getattr(context, 'sap_login', None), 'session', None)
+            if session is not None:
+                from src.core.sap_utils import close_sap_popups
+                close_sap_popups(session)
+
+    def _restart_from_checkpoint(self, context, delay=0):
+        """Vuelve a la pantalla inicial y repite los pasos posteriores al último paso seguro"""
+        scenario = getattr(context, 'current_scenario', None)
+        step = getattr(context, 'current_step', None)
+        session = getattr(getattr(context, 'sap_login', None), 'session', None)
+        if scenario is None or step is None or session is None:
+            return False
+        steps = list(scenario.all_steps)
+        # Por identidad: behave compara pasos por texto y puede haber pasos repetidos
+        index = next((i for i, candidate in enumerate(steps) if candidate is step), None)
+        if index is None:
+            return False
+        checkpoint = next((i for i in range(index - 1, -1, -1)
+                           if steps[i].status == "passed" and self._is_checkpoint(steps[i])), None)
+        if checkpoint is None:
+            logger.info(f"↩️ Sin paso seguro antes de '{step.name}': no se reanuda desde checkpoint")
+            return False
+        replay = steps[checkpoint + 1:index]
+        logger.warning(f"↩️ Reanudando '{scenario.name}' desde '{steps[checkpoint].name}' "
+                       f"({len(replay)} pasos a repetir)")
+        self._replaying = True
+        try:
+            self._wait_and_settle(context, delay)
+            with tracing.span("checkpoint restart", "retry", steps=len(replay)):
+                from src.core.sap_utils import reset_to_initial_screen
+                reset_to_initial_screen(session)
+                if replay:
+                    context.execute_steps("\n".join(_step_source(s) for s in replay))
+            return True
+        except Exception as e:
+            logger.error(f"❌ No se pudo reanudar desde el checkpoint: {e}")
+            return False
+        finally:
+            self._replaying = False
+
+    def _is_checkpoint(self, step):
+        find_match = getattr(self.registry, 'find_match', None)
+        if find_match is None:
+            return False
+        match = find_match(step)
+        func = getattr(match, 'func', None)
+        return bool(getattr(getattr(func, '__wrapped__', func), '_retry_checkpoint', False))
+
+
+def _wrap(func):
+    @functools.wraps(func)
+    def run_with_retry(context, *args, **kwargs):
+        retrier = getattr(context, 'step_retry', None)
+        if retrier is None:
+            return func(context, *args, **kwargs)
+        return retrier.run(func, context, args, kwargs)
+
+    # functools.wraps deja __wrapped__: behave sigue reportando la ubicación del paso original
+    run_with_retry._retry_wrapped = True
+    return run_with_retry
+
+
+def _step_source(step):
+    """Texto Gherkin del paso (con docstring y tabla) para ``context.execute_steps``"""
+    # El tipo del paso (And/But no pueden abrir un bloque de execute_steps)
+    lines = [f"{step.step_type.title()} {step.name}"]
+    if step.text is not None:
+        lines += ['"""', *str(step.text).splitlines(), '"""']
+    if step.table is not None:
+        lines.append("| " + " | ".join(step.table.headings) + " |")
+        lines += ["| " + " | ".join(row.cells) + " |" for row in step.table.rows]
+    return "\n".join(lines)
+
+
+def _add_error(record, attempt, kind, exc):
+    if len(record['errors']) < MAX_ERRORS_PER_STEP:
+        record['errors'].append({'attempt': attempt, 'kind': kind, 'error': str(exc)[:300],
+                                 'time': datetime.now().strftime('%H:%M:%S')})
+
+
+def _public(record):
+    return dict(record, errors=list(record['errors']))
+
+
+def step_retries(features):
+    """``{clave de paso: reintentos}`` de los pasos reintentados en un JSON de behave"""
+    retries = {}
+    for feature in features or []:
+        for element in feature.get('elements', []):
+            for step in element.get('steps', []):
+                data = step.get('result', {}).get('retries')
+                if data:
+                    retries[f"{element.get('location')}::{step.get('location')}"] = dict(data, name=step.get('name'))
+    return retries
+
+
+class FlakinessStore:
+    """Índice de inestabilidad por paso entre ejecuciones (media móvil de ejecuciones con reintentos).
+
+    Lo actualiza un solo proceso (el runner) al final de la ejecución; el archivo se
+    reemplaza de forma atómica.
+    """
+
+    def __init__(self, path, alpha=FLAKINESS_ALPHA):
+        self.path = Path(path)
+        self.alpha = alpha
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('steps', {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Índice de inestabilidad ilegible {self.path}: {e}")
+            return {}
+
+    def update(self, executed, retries):
+        """``executed``: claves de los pasos ejecutados en la corrida; ``retries``: los que se reintentaron"""
+        steps = self.load()
+        now = datetime.now().isoformat()
+        for key in set(executed) | set(retries):
+            entry = steps.setdefault(key, {'runs': 0, 'flaky_runs': 0, 'failed_runs': 0, 'score': 0.0})
+            data = retries.get(key)
+            flaky = 1 if data else 0
+            entry['runs'] += 1
+            entry['flaky_runs'] += flaky
+            entry['failed_runs'] += 1 if data and data.get('failed') else 0
+            entry['score'] = round(self.alpha * flaky + (1 - self.alpha) * entry['score'], 4)
+            if data:
+                entry['name'] = data.get('name')
+                entry['last_retry'] = now
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': now, 'steps': steps}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return steps
+
+
+def executed_steps(features):
+    """Claves de los pasos que llegaron a ejecutarse (pasados o fallidos) en un JSON de behave"""
+    return {f"{element.get('location')}::{step.get('location')}"
+            for feature in features or [] for element in feature.get('elements', [])
+            for step in element.get('steps', [])
+            if step.get('result', {}).get('status') in ('passed', 'failed')}
@@ -4,16 +4,29 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-def attach_screenshot(session, name="screenshot"):
-    """Toma screenshot de SAP y lo adjunta al reporte Allure"""
-    try:
-        screenshot_path = f"reports/screenshots/{name}.png"
-        os.makedirs(os.path.dirname(screenshot_path), exist_ok=True)
+ATTACHMENT_TYPES = {
+    ".png": allure.attachment_type.PNG,
+    ".bmp": allure.attachment_type.BMP,
+    # allure-python no define WEBP en todas sus versiones: el tipo MIME también es válido
+    ".webp": getattr(allure.attachment_type, "WEBP", "image/webp"),
+}
+
+def attach_screenshot(session, name="screenshot", screenshot_path=None):
+    """Toma screenshot de SAP y lo adjunta al reporte Allure.
 
-        # En una implementación real, aquí iría el código para tomar screenshot de SAP
-        # session.findById("wnd[0]").hardCopy(screenshot_path)
+    Si se recibe ``screenshot_path`` (captura ya almacenada por el pipeline de
+    evidencias) se adjunta ese archivo sin volver a capturar.
+    """
+    try:
+        if screenshot_path is None:
+            screenshot_path = f"reports/screenshots/{name}.png"
+            os.makedirs(os.path.dirname(screenshot_path), exist_ok=True)
+            session.findById("wnd[0]").hardCopy(screenshot_path)
 
-        allure.attach.file(screenshot_path, name=name, attachment_type=allure.attachment_type.PNG)
+        extension = os.path.splitext(str(screenshot_path))[1].lower()
+        allure.attach.file(str(screenshot_path), name=name,
+                           attachment_type=ATTACHMENT_TYPES.get(extension),
+                           extension=extension.lstrip('.'))
         logger.info(f"Screenshot adjuntado: {name}")
 
     except Exception as e:
@@ -0,0 +1,227 @@
+import json
+import queue
+import threading
+import time
+import logging
+
+from src.reporting.evidence_store import EvidenceStore
+
+logger = logging.getLogger(__name__)
+
+DROP_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+# Tipo de imagen de HardCopyToMemory/hardCopy (0 = BMP)
+SAP_IMAGE_BMP = 0
+
+
+class CapturePipeline:
+    """Pipeline asíncrono de capturas por paso.
+
+    El hook solo toma la imagen de SAP GUI en memoria y la encola; un hilo de
+    fondo la escribe y la codifica en el ``EvidenceStore``. Las capturas listas se
+    adjuntan a Allure desde el hilo del hook (``attach_completed``), donde
+    allure-behave conoce el escenario en curso.
+    La cola es acotada: con ``block`` el hook espera hasta ``block_timeout``
+    (backpressure) y luego descarta; ``drop_newest`` descarta la captura nueva
+    y ``drop_oldest`` la más antigua pendiente.
+    """
+
+    def __init__(self, evidence_store=None, max_queue=32, drop_policy="block",
+                 block_timeout=0.5, attach_to_allure=True):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Política de descarte inválida: {drop_policy} (usar {', '.join(DROP_POLICIES)})")
+
+        self.evidence_store = evidence_store or EvidenceStore()
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.attach_to_allure = attach_to_allure
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._overheads = []
+        self._counters = {'captured': 0, 'processed': 0, 'dropped': 0, 'errors': 0}
+        self._queue_high_watermark = 0
+        self._allure = None
+        self._attachments = []
+
+        self._worker = threading.Thread(target=self._run, name="capture-pipeline", daemon=True)
+        self._worker.start()
+
+    def capture(self, session, key, name):
+        """Toma la captura y la encola; retorna False si se descartó"""
+        start = time.perf_counter()
+        try:
+            raw_bytes = self._grab(session)
+            item = (raw_bytes, key, name)
+            accepted = self._enqueue(item)
+            with self._lock:
+                self._counters['captured'] += 1
+                self._queue_high_watermark = max(self._queue_high_watermark, self._queue.qsize())
+            return accepted
+        except Exception as e:
+            with self._lock:
+                self._counters['errors'] += 1
+            logger.error(f"Error capturando pantalla de '{name}': {e}")
+            return False
+        finally:
+            with self._lock:
+                self._overheads.append(time.perf_counter() - start)
+
+    def close(self):
+        """Procesa lo pendiente, detiene el hilo y retorna las métricas"""
+        self._queue.put(None)
+        self._worker.join()
+        stats = self.stats()
+        logger.info(f"📷 Capturas: {stats['captured']} tomadas, {stats['processed']} procesadas, "
+                    f"{stats['dropped']} descartadas | overhead medio por paso "
+                    f"{stats['hook_overhead_ms']['mean']} ms (p95 {stats['hook_overhead_ms']['p95']} ms)")
+        self._write_stats(stats)
+        return stats
+
+    def stats(self):
+        """Métricas del pipeline, incluido el overhead añadido a cada paso"""
+        with self._lock:
+            overheads = sorted(self._overheads)
+            counters = dict(self._counters)
+            high_watermark = self._queue_high_watermark
+
+        def percentile(q):
+            if not overheads:
+                return 0
+            return round(overheads[min(len(overheads) - 1, int(q * len(overheads)))] * 1000, 3)
+
+        counters.update({
+            'drop_policy': self.drop_policy,
+            'queue_capacity': self._queue.maxsize,
+            'queue_high_watermark': high_watermark,
+            'hook_overhead_ms': {
+                'mean': round(sum(overheads) / len(overheads) * 1000, 3) if overheads else 0,
+                'p95': percentile(0.95),
+                'max': round(overheads[-1] * 1000, 3) if overheads else 0,
+                'total': round(sum(overheads) * 1000, 3)
+            }
+        })
+        return counters
+
+    def _grab(self, session):
+        """Imagen de la ventana principal en memoria (sin escritura a disco en el hook)"""
+        window = session.findById("wnd[0]")
+        try:
+            return bytes(window.HardCopyToMemory(SAP_IMAGE_BMP))
+        except Exception:
+            # SAP GUI antiguo sin HardCopyToMemory: volcar a archivo temporal
+            raw_path = self.evidence_store.incoming_path("capture")
+            window.hardCopy(str(raw_path), SAP_IMAGE_BMP)
+            return raw_path
+
+    def _enqueue(self, item):
+        if self.drop_policy == "block":
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                return self._drop(item)
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            if self.drop_policy == "drop_newest":
+                return self._drop(item)
+
+        # drop_oldest: liberar el hueco de la captura más antigua pendiente
+        try:
+            oldest = self._queue.get_nowait()
+            self._queue.task_done()
+            self._drop(oldest)
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return self._drop(item)
+
+    def _drop(self, item):
+        with self._lock:
+            self._counters['dropped'] += 1
+        if not isinstance(item[0], bytes):
+            # Captura de respaldo (hardCopy) en .incoming: nadie más la va a procesar
+            try:
+                item[0].unlink()
+            except OSError as e:
+                logger.debug(f"No se pudo borrar la captura descartada {item[0]}: {e}")
+        logger.warning(f"Cola de capturas llena ({self.drop_policy}): descartada captura de '{item[2]}'")
+        return False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._process(*item)
+                with self._lock:
+                    self._counters['processed'] += 1
+            except Exception as e:
+                with self._lock:
+                    self._counters['errors'] += 1
+                logger.error(f"Error procesando captura: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, raw, key, name):
+        if isinstance(raw, bytes):
+            stored_path = self.evidence_store.store_bytes(raw, key, name)
+        else:
+            with open(raw, 'rb') as f:
+                stored_path = self.evidence_store.store_bytes(f.read(), key, name, raw.suffix.lstrip('.'))
+            raw.unlink()
+
+        if self.attach_to_allure:
+            with self._lock:
+                self._attachments.append((key, name, stored_path))
+
+    def completed_attachments(self, scenario_location=None):
+        """``(nombre, ruta)`` de las capturas ya almacenadas y aún sin adjuntar (no espera a las encoladas).
+
+        Con ``scenario_location`` solo retorna las de ese escenario; las de escenarios
+        anteriores que terminaron tarde se descartan (siguen en el índice de evidencias).
+        """
+        if not self.attach_to_allure:
+            return []
+        with self._lock:
+            finished, self._attachments = self._attachments, []
+        prefix = f"{scenario_location}::"
+        attachments = [(name, stored_path) for key, name, stored_path in finished
+                       if scenario_location is None or key.startswith(prefix)]
+        if len(attachments) < len(finished):
+            logger.debug(f"{len(finished) - len(attachments)} capturas terminaron después de su escenario: sin adjuntar")
+        return attachments
+
+    def attach_completed(self, scenario_location=None):
+        """Adjunta a Allure las capturas ya almacenadas del escenario; llamar desde ``after_scenario``"""
+        attachments = self.completed_attachments(scenario_location)
+        allure_reporter = self._get_allure_reporter() if attachments else None
+        if allure_reporter is not None:
+            for name, stored_path in attachments:
+                allure_reporter.attach_screenshot(None, name=name, screenshot_path=stored_path)
+        return len(attachments)
+
+    def _get_allure_reporter(self):
+        if self._allure is None:
+            try:
+                from src.reporting import allure_reporter
+                self._allure = allure_reporter
+            except ImportError:
+                logger.info("Allure no disponible: capturas sin adjuntar al reporte Allure")
+                self.attach_to_allure = False
+        return self._allure
+
+    def _write_stats(self, stats):
+        stats_path = self.evidence_store.root / "capture_stats.json"
+        try:
+            with open(stats_path, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"Error escribiendo métricas de captura: {e}")
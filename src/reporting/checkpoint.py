@@ -0,0 +1,167 @@
+import os
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from src.reporting.sidecars import load_sidecar, write_sidecar
+
+logger = logging.getLogger(__name__)
+
+# El runner publica la ruta del diario para que los hooks de behave registren cada escenario
+JOURNAL_ENV = "SAP_CHECKPOINT_JOURNAL"
+CHECKPOINT_DIR = Path("reports") / "checkpoints"
+# Sidecars por escenario que se conservan en el diario (los del proceso interrumpido se pierden)
+SCENARIO_SIDECARS = ("logs", "rows")
+
+
+class CheckpointJournal:
+    """Diario JSONL de la ejecución: cada registro se escribe con ``fsync`` antes de continuar.
+
+    Eventos: ``run_start``/``run_resume``, ``module_start``, ``scenario`` (lo escriben los
+    hooks de behave), ``module_end`` y ``run_end``. Una ejecución sin ``run_end`` quedó
+    interrumpida y se puede retomar con ``run_all_modules.py --resume``.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @classmethod
+    def for_run(cls, run_id, checkpoint_dir=None):
+        return cls(Path(checkpoint_dir or CHECKPOINT_DIR) / f"{run_id}.jsonl")
+
+    @classmethod
+    def from_env(cls):
+        """Diario publicado por el runner en ``SAP_CHECKPOINT_JOURNAL``; ``None`` fuera del runner"""
+        from src.config.config import CheckpointConfig
+        path = CheckpointConfig.JOURNAL
+        return cls(path) if path else None
+
+    def append(self, event, **fields):
+        record = dict(event=event, time=datetime.now().isoformat(), **fields)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def records(self):
+        """Registros del diario; una última línea truncada (caída a mitad de escritura) se ignora"""
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"⚠️ Línea {number} ilegible en {self.path.name}, se ignora")
+        return records
+
+    def state(self):
+        """Estado reconstruido: run ID, módulos terminados y escenarios completados por módulo"""
+        state = {'run_id': None, 'finished': False, 'modules': {}, 'scenarios': {}}
+        for record in self.records():
+            event = record.get('event')
+            if event in ('run_start', 'run_resume'):
+                state['run_id'] = state['run_id'] or record.get('run_id')
+            elif event == 'scenario':
+                state['scenarios'].setdefault(record['module'], {})[record['location']] = record
+            elif event == 'module_end':
+                state['modules'][record['module']] = record.get('success', False)
+            elif event == 'run_end':
+                state['finished'] = True
+        return state
+
+    def completed_scenarios(self, module):
+        return self.state()['scenarios'].get(module, {})
+
+
+def find_resumable(checkpoint_dir=None):
+    """Diario más reciente de una ejecución que no llegó a ``run_end``"""
+    checkpoint_dir = Path(checkpoint_dir or CHECKPOINT_DIR)
+    if not checkpoint_dir.exists():
+        return None
+    for path in sorted(checkpoint_dir.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True):
+        journal = CheckpointJournal(path)
+        if not journal.state()['finished']:
+            return journal
+    return None
+
+
+def scenario_element(scenario):
+    """Escenario terminado en el mismo formato que el formatter JSON de behave"""
+    steps = []
+    for step in scenario.steps:
+        entry = {
+            'keyword': step.keyword,
+            'step_type': step.step_type,
+            'name': step.name,
+            'location': str(step.location),
+            'result': {'status': step.status.name, 'duration': step.duration}
+        }
+        if step.text:
+            entry['text'] = step.text
+        if step.error_message and step.status.name == 'failed':
+            entry['result']['error_message'] = step.error_message
+        if getattr(step, 'retries', None):
+            entry['result']['retries'] = step.retries
+        steps.append(entry)
+    element = {
+        'type': 'scenario',
+        'keyword': scenario.keyword,
+        'name': scenario.name,
+        'tags': list(scenario.tags),
+        'location': str(scenario.location),
+        'steps': steps,
+        'status': scenario.status.name
+    }
+    if scenario.description:
+        element['description'] = scenario.description
+    return element
+
+
+def scenario_extras(scenario_location, sidecars):
+    """Entradas de los sidecars (``{clave de paso: datos}``) que pertenecen al escenario"""
+    prefix = f"{scenario_location}::"
+    return {kind: {key: value for key, value in (data or {}).items()
+                   if key == scenario_location or key.startswith(prefix)}
+            for kind, data in sidecars.items()}
+
+
+def merge_scenarios(features, journaled, report_path=None):
+    """Sustituye los escenarios omitidos al retomar por los registrados en el diario.
+
+    ``features`` es el JSON de behave del módulo (se modifica en sitio). Si se indica
+    ``report_path``, los logs y filas de esos escenarios se agregan a sus sidecars.
+    Retorna la cantidad de escenarios restaurados.
+    """
+    pending = dict(journaled)
+    for feature in features:
+        elements = feature.get('elements', [])
+        for index, element in enumerate(elements):
+            record = pending.pop(element.get('location'), None)
+            if record:
+                elements[index] = dict(record['element'], module=element.get('module', record['module']))
+    # Escenarios sin contraparte en el JSON nuevo (p. ej. el módulo no volvió a ejecutarse)
+    for record in pending.values():
+        feature = next((f for f in features if f.get('location') == record.get('feature_location')), None)
+        if feature is None:
+            feature = {'keyword': 'Feature', 'name': record.get('feature', ''),
+                       'location': record.get('feature_location', ''), 'status': 'passed', 'elements': []}
+            features.append(feature)
+        feature.setdefault('elements', []).append(dict(record['element'], module=record['module']))
+    for feature in features:
+        if any(element.get('status') == 'failed' for element in feature.get('elements', [])):
+            feature['status'] = 'failed'
+
+    if report_path and journaled:
+        for kind in SCENARIO_SIDECARS:
+            data = load_sidecar(report_path, kind, {}) or {}
+            for record in journaled.values():
+                data.update(record.get(kind) or {})
+            if data:
+                write_sidecar(report_path, kind, data)
+    return len(journaled)
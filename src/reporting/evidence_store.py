@@ -0,0 +1,249 @@
+import io
+import os
+import json
+import queue
+import hashlib
+import datetime
+import threading
+import logging
+from pathlib import Path
+
+_image_module = None
+
+
+def _pil_image():
+    """Pillow se importa al codificar la primera captura; None si no está instalado"""
+    global _image_module
+    if _image_module is None:
+        try:
+            from PIL import Image
+            _image_module = Image
+        except Exception:
+            _image_module = False
+    return _image_module or None
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "evidence_index.json"
+INCOMING_DIRNAME = ".incoming"
+SUPPORTED_FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+
+def default_evidence_root():
+    """Directorio raíz de evidencias (compartido por hooks y reporter)"""
+    from src.config.config import EvidenceConfig
+    return Path(EvidenceConfig.DIR)
+
+
+def step_key(scenario_location, step_location):
+    """Clave estable de un paso: ubicación del escenario + ubicación del paso"""
+    return f"{scenario_location}::{step_location}"
+
+
+def run_entries(index, key, run_id):
+    """Evidencias de un paso registradas en la ejecución ``run_id``"""
+    return [entry for entry in index['steps'].get(key, []) if entry.get('run_id') == run_id]
+
+
+def prune_index(index, keep_runs, current_run=None):
+    """Conserva solo las evidencias de las últimas ``keep_runs`` ejecuciones (y de ``current_run``).
+
+    Los objetos que ya no referencia ningún paso salen del índice; sus archivos se
+    reutilizan si la misma pantalla vuelve a capturarse.
+    """
+    last_capture = {}
+    for entries in index['steps'].values():
+        for entry in entries:
+            run_id = entry.get('run_id')
+            if run_id:
+                last_capture[run_id] = max(last_capture.get(run_id, ''), entry.get('captured_at', ''))
+    kept_runs = set(sorted(last_capture, key=last_capture.get, reverse=True)[:max(keep_runs, 0)])
+    if current_run:
+        kept_runs.add(current_run)
+
+    steps = {}
+    for key, entries in index['steps'].items():
+        entries = [entry for entry in entries if entry.get('run_id') in kept_runs]
+        if entries:
+            steps[key] = entries
+    referenced = {entry['sha256'] for entries in steps.values() for entry in entries}
+    index['steps'] = steps
+    index['objects'] = {digest: known for digest, known in index['objects'].items() if digest in referenced}
+    return index
+
+
+def load_evidence_index(root=None):
+    """Carga el índice de evidencias (estructura vacía si no existe o está corrupto)"""
+    index_path = Path(root or default_evidence_root()) / INDEX_FILENAME
+    if index_path.exists():
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data.setdefault('objects', {})
+            data.setdefault('steps', {})
+            return data
+        except Exception as e:
+            logger.warning(f"Índice de evidencias ilegible ({index_path}): {e}")
+    return {'version': 1, 'objects': {}, 'steps': {}}
+
+
+class EvidenceStore:
+    """Almacén de evidencias direccionado por contenido.
+
+    Las capturas crudas (BMP de ``hardCopy``) se encolan y un hilo de fondo
+    las codifica a PNG/WebP, nombrando cada archivo por el SHA-256 de la
+    captura: pantallas idénticas se guardan una sola vez. El índice relaciona
+    cada paso (``step_key``) con las evidencias que le pertenecen, etiquetadas con
+    el ``run_id`` de la ejecución; al persistirlo se descartan las ejecuciones viejas.
+    """
+
+    def __init__(self, root=None, image_format=None, run_id=None, keep_runs=None):
+        self.root = Path(root or default_evidence_root())
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.incoming_dir = self.root / INCOMING_DIRNAME
+        self.incoming_dir.mkdir(exist_ok=True)
+
+        if image_format is None:
+            from src.config.config import EvidenceConfig
+            image_format = EvidenceConfig.FORMAT
+        image_format = image_format.lower()
+        if image_format not in SUPPORTED_FORMATS:
+            logger.warning(f"Formato de evidencia no soportado '{image_format}', usando png")
+            image_format = "png"
+        self.image_format = image_format
+
+        if run_id is None:
+            from src.utils.log_context import get_run_id
+            run_id = get_run_id()
+        self.run_id = run_id
+        if keep_runs is None:
+            from src.config.config import EvidenceConfig
+            keep_runs = EvidenceConfig.KEEP_RUNS
+        self.keep_runs = keep_runs
+
+        self.index_path = self.root / INDEX_FILENAME
+        self._index = load_evidence_index(self.root)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def incoming_path(self, name, extension="bmp"):
+        """Ruta temporal donde SAP GUI debe volcar la captura cruda"""
+        safe_name = "".join(c if (c.isalnum() or c in ('_', '-')) else '_' for c in name)[:80]
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return self.incoming_dir / f"{safe_name}_{ts}.{extension}"
+
+    def submit(self, raw_path, key, name=None):
+        """Encola una captura cruda para codificarla y registrarla bajo ``key``"""
+        self._ensure_worker()
+        self._queue.put((Path(raw_path), key, name or Path(raw_path).stem))
+
+    def lookup(self, key):
+        """Evidencias registradas para un paso en la ejecución actual"""
+        with self._lock:
+            return run_entries(self._index, key, self.run_id)
+
+    def flush(self):
+        """Espera a que se procesen las capturas pendientes y persiste el índice"""
+        if self._worker is not None:
+            self._queue.join()
+        self._write_index()
+
+    def close(self):
+        """Vacía la cola, detiene el hilo codificador y persiste el índice"""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+        self._write_index()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="evidence-encoder", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._store(*item)
+            except Exception as e:
+                logger.error(f"Error procesando evidencia {item[0] if item else ''}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def store_bytes(self, raw_bytes, key, name, extension="bmp"):
+        """Codifica y registra una captura en memoria de forma síncrona; retorna la ruta final"""
+        digest = hashlib.sha256(raw_bytes).hexdigest()
+
+        with self._lock:
+            known = self._index['objects'].get(digest)
+
+        if known is None or not (self.root / known['path']).exists():
+            known = self._encode(raw_bytes, extension, digest)
+            with self._lock:
+                self._index['objects'][digest] = known
+            logger.info(f"📷 Evidencia almacenada: {known['path']}")
+        else:
+            logger.info(f"📷 Evidencia duplicada, reutilizando: {known['path']}")
+
+        with self._lock:
+            self._index['steps'].setdefault(key, []).append({
+                'sha256': digest,
+                'path': known['path'],
+                'name': name,
+                'run_id': self.run_id,
+                'captured_at': datetime.datetime.now().isoformat()
+            })
+
+        return self.root / known['path']
+
+    def _store(self, raw_path, key, name):
+        with open(raw_path, 'rb') as f:
+            raw_bytes = f.read()
+        self.store_bytes(raw_bytes, key, name, raw_path.suffix.lstrip('.'))
+
+        try:
+            raw_path.unlink()
+        except OSError:
+            pass
+
+    def _encode(self, raw_bytes, extension, digest):
+        """Convierte la captura al formato comprimido; conserva el original si no hay Pillow"""
+        Image = _pil_image()
+        if Image is not None:
+            target = self.root / f"{digest}.{self.image_format}"
+            with Image.open(io.BytesIO(raw_bytes)) as image:
+                if self.image_format == "webp":
+                    image.save(target, SUPPORTED_FORMATS["webp"], lossless=True)
+                else:
+                    image.save(target, SUPPORTED_FORMATS["png"], optimize=True)
+        else:
+            target = self.root / f"{digest}.{extension}"
+            with open(target, 'wb') as f:
+                f.write(raw_bytes)
+
+        return {
+            'path': target.name,
+            'format': target.suffix.lstrip('.'),
+            'size': target.stat().st_size
+        }
+
+    def _write_index(self):
+        with self._lock:
+            # Fusionar con lo que otros procesos hayan escrito mientras tanto
+            on_disk = load_evidence_index(self.root)
+            on_disk['objects'].update(self._index['objects'])
+            for key, entries in self._index['steps'].items():
+                merged = on_disk['steps'].setdefault(key, [])
+                for entry in entries:
+                    if entry not in merged:
+                        merged.append(entry)
+            self._index = prune_index(on_disk, self.keep_runs, self.run_id)
+
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
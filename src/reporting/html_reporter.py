@@ -1,16 +1,28 @@
 import os
+import re
 import html
 import datetime
 import json
 import time
 import logging
+import platform
 from pathlib import Path
 
+from src.reporting.evidence_store import default_evidence_root, load_evidence_index, run_entries, step_key
+from src.reporting.sidecars import load_sidecar
+from src.reporting.models import StepRecord, ScenarioRecord, SuiteRecord, to_serializable
+from src.core.com_profiler import merge_profiles, summarize_profile
+from src.core.data_driven import summarize_rows
+from src.core.session_health import merge_health
+from src.utils import tracing
+
 logger = logging.getLogger(__name__)
 
+QUOTED_PARAMETER_RE = re.compile(r'"([^"]*)"')
+
 
 class HTMLReporter:
-    def __init__(self, report_dir=None):
+    def __init__(self, report_dir=None, evidence_root=None, run_id=None, evidence_index=None):
         if report_dir is None:
             self.report_dir = "reports/html-reports"
         else:
@@ -18,17 +30,71 @@ class HTMLReporter:
 
         os.makedirs(self.report_dir, exist_ok=True)
 
-        self.evidence_dir = Path(self.report_dir) / "evidence"
-        self.evidence_dir.mkdir(exist_ok=True)
+        # Índice del almacén de evidencias (capturas reales escritas por los hooks)
+        self.evidence_root = Path(evidence_root) if evidence_root else default_evidence_root()
+        self.evidence_index = evidence_index if evidence_index is not None else load_evidence_index(self.evidence_root)
+        # Solo las capturas de esta ejecución: las de ejecuciones anteriores no son evidencia del reporte
+        if run_id is None:
+            from src.utils.log_context import get_run_id
+            run_id = get_run_id()
+        self.run_id = run_id
+
+        # Logs reales por paso (archivo <reporte>_logs.json escrito por los hooks)
+        self.step_logs = {}
+        # Perfil de llamadas COM por paso/elemento (archivo <reporte>_com_profile.json)
+        self.com_profile = {'steps': {}}
+        self._com_profile_sources = set()
+        # Sub-resultados por fila de los pasos data-driven (archivo <reporte>_rows.json)
+        self.row_results = {}
+        # Reconexiones y escenarios reintentados por sesión perdida (archivo <reporte>_session_health.json)
+        self.session_health = {}
+        self._session_health_sources = set()
+        # Índice de inestabilidad por paso entre ejecuciones (se carga al generar la sección)
+        self.flakiness = None
+
+    def load_step_logs(self, json_path):
+        """Carga los logs por paso que acompañan a un JSON de behave"""
+        self.step_logs.update(load_sidecar(json_path, "logs", default={}))
+
+    def load_com_profile(self, json_path):
+        """Carga el perfil COM que acompaña a un JSON de behave (una sola vez por reporte)"""
+        json_path = str(Path(json_path).resolve())
+        if json_path in self._com_profile_sources:
+            return
+        self._com_profile_sources.add(json_path)
+        merge_profiles(self.com_profile, load_sidecar(json_path, "com_profile", default={}))
+
+    def load_row_results(self, json_path):
+        """Carga los sub-resultados por fila que acompañan a un JSON de behave"""
+        self.row_results.update(load_sidecar(json_path, "rows", default={}))
+
+    def load_session_health(self, json_path):
+        """Carga las estadísticas de salud de sesión que acompañan a un JSON de behave"""
+        json_path = str(Path(json_path).resolve())
+        if json_path in self._session_health_sources:
+            return
+        self._session_health_sources.add(json_path)
+        merge_health(self.session_health, load_sidecar(json_path, "session_health", default={}))
+
+    def load_flakiness(self):
+        """Índice de inestabilidad por paso que mantiene el runner (SAP_FLAKINESS_STORE)"""
+        if self.flakiness is None:
+            from src.config.config import StepRetryConfig
+            from src.core.step_retry import FlakinessStore
+            self.flakiness = FlakinessStore(StepRetryConfig.FLAKINESS_STORE).load()
+        return self.flakiness
 
     def parse_behave_json(self, json_path):
         """Parsea el reporte JSON de behave con tiempos REALES y detalles"""
         try:
             with open(json_path, 'r', encoding='utf-8') as f:
                 behave_data = json.load(f)
+            self.load_step_logs(json_path)
+            self.load_com_profile(json_path)
+            self.load_row_results(json_path)
+            self.load_session_health(json_path)
 
             test_cases = []
-            total_duration = 0
 
             for feature in behave_data:
                 if 'elements' not in feature:
@@ -37,26 +103,11 @@ class HTMLReporter:
                 for element in feature['elements']:
                     if element['type'] == 'scenario':
                         # ✅ NUEVO: Análisis detallado con tiempos reales
-                        scenario_analysis = self._analyze_scenario_detailed(element)
-                        test_cases.append(scenario_analysis)
-                        total_duration += scenario_analysis['duration']
+                        test_cases.append(self._analyze_scenario_detailed(element))
 
-            passed = sum(1 for case in test_cases if case['status'] == 'passed')
-            failed = sum(1 for case in test_cases if case['status'] == 'failed')
-            skipped = sum(1 for case in test_cases if case['status'] == 'skipped')
-            total = len(test_cases)
-
-            return {
-                'total': total,
-                'passed': passed,
-                'failed': failed,
-                'skipped': skipped,
-                'test_cases': test_cases,
-                'total_duration': round(total_duration, 2),
-                'average_duration': round(total_duration / total, 2) if total > 0 else 0,
-                'generation_time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'execution_environment': self._get_environment_info()
-            }
+            return SuiteRecord(test_cases,
+                               datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                               self._get_environment_info())
 
         except Exception as e:
             logger.error(f"Error parsing JSON report: {e}")
@@ -69,6 +120,7 @@ class HTMLReporter:
         steps_details = []
         start_time = None
         end_time = None
+        scenario_location = scenario.get('location', '')
 
         if 'steps' not in scenario:
             return self._create_scenario_structure(scenario, status, total_duration, steps_details, start_time,
@@ -92,102 +144,121 @@ class HTMLReporter:
 
             total_duration += step_duration
 
-            step_detail = {
-                'name': step.get('name', ''),
-                'keyword': step.get('keyword', ''),
-                'status': step_status,
-                'duration': round(step_duration, 3),
-                'error': step_result.get('error_message', ''),
-                'traceback': step_result.get('traceback', ''),
-                'start_time': step_result.get('start_time', ''),
-                'end_time': step_result.get('end_time', ''),
-                'evidence': self._generate_step_evidence(step, step_status)
-            }
-            steps_details.append(step_detail)
+            # La evidencia se genera solo si alguien la consulta
+            steps_details.append(StepRecord(
+                step.get('name', ''),
+                step.get('keyword', ''),
+                step_status,
+                round(step_duration, 3),
+                error=step_result.get('error_message', ''),
+                traceback=step_result.get('traceback', ''),
+                start_time=step_result.get('start_time', ''),
+                end_time=step_result.get('end_time', ''),
+                location=step.get('location', ''),
+                scenario_location=scenario_location,
+                retries=step_result.get('retries'),
+                evidence_factory=self._generate_step_evidence
+            ))
 
         return self._create_scenario_structure(scenario, status, round(total_duration, 3), steps_details, start_time,
                                                end_time)
 
     def _create_scenario_structure(self, scenario, status, duration, steps_details, start_time, end_time):
         """Crea estructura completa del escenario"""
-        return {
-            'name': scenario.get('name', 'Sin nombre'),
-            'description': scenario.get('description', ''),
-            'tags': [tag['name'] for tag in scenario.get('tags', [])],
-            'status': status,
-            'duration': duration,
-            'steps': steps_details,
-            'start_time': start_time,
-            'end_time': end_time,
-            'error': self._get_detailed_error(scenario),
-            'evidence_paths': self._collect_evidence_paths(steps_details)
-        }
-
-    def _generate_step_evidence(self, step, step_status):
+        return ScenarioRecord(
+            scenario.get('name', 'Sin nombre'),
+            scenario.get('description', ''),
+            [tag['name'] if isinstance(tag, dict) else tag for tag in scenario.get('tags', [])],
+            status,
+            duration,
+            steps_details,
+            start_time,
+            end_time,
+            self._get_detailed_error(scenario),
+            module=scenario.get('module', ''),
+            location=scenario.get('location', ''),
+            evidence_paths_factory=self._collect_evidence_paths
+        )
+
+    def _generate_step_evidence(self, step):
         """Genera evidencias para cada paso (screenshots, logs, etc.)"""
         evidence = {}
 
-        if step_status == 'failed':
-            evidence['screenshot'] = self._capture_screenshot(step.get('name', 'unknown'))
+        key = step_key(step.scenario_location, step.location)
+        screenshot = self._find_screenshot(key, step.status)
+        if screenshot:
+            evidence['screenshot'] = screenshot
+
+        evidence['logs'] = self._capture_step_logs(step, key)
 
-        evidence['logs'] = self._capture_step_logs(step)
+        if key in self.com_profile['steps']:
+            evidence['com_calls'] = summarize_profile(self.com_profile, keys={key}, top=5)
+
+        if key in self.row_results:
+            evidence['rows'] = summarize_rows(self.row_results[key])
 
         evidence['data'] = self._capture_step_data(step)
 
         return evidence
 
-    def _capture_screenshot(self, step_name):
-        """Captura screenshot (placeholder para implementación futura)"""
-        try:
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            screenshot_info = {
-                'planned_path': f"{self.evidence_dir}/screenshot_{step_name}_{timestamp}.png",
-                'status': 'not_implemented',
-                'message': 'Screenshot functionality ready for SAP GUI integration'
+    def _find_screenshot(self, key, step_status):
+        """Busca en el índice del almacén la captura registrada para el paso en esta ejecución"""
+        entries = run_entries(self.evidence_index, key, self.run_id)
+        if entries:
+            latest = entries[-1]
+            return {
+                'path': str(self.evidence_root / latest['path']),
+                'sha256': latest['sha256'],
+                'captured_at': latest.get('captured_at', ''),
+                'captures': len(entries),
+                'status': 'captured'
             }
-            return screenshot_info
-        except Exception as e:
-            return {'error': f'Screenshot capture failed: {str(e)}'}
-
-    def _capture_step_logs(self, step):
-        """Captura logs relacionados con el paso"""
-        timestamp = datetime.datetime.now().strftime('%H:%M:%S')
+        if step_status == 'failed':
+            return {
+                'status': 'not_captured',
+                'message': 'No se registró captura de pantalla para este paso'
+            }
+        return None
+
+    def _capture_step_logs(self, step, key):
+        """Logs reales emitidos durante el paso (capturados por StepLogHandler)"""
+        records = self.step_logs.get(key, [])
+        log_entries = []
+        for record in records:
+            timestamp = datetime.datetime.fromtimestamp(record['time']).strftime('%H:%M:%S')
+            log_entries.append(f"{timestamp} - {record['level']} - {record['logger']} - {record['message']}")
         return {
-            'timestamp': timestamp,
-            'step_name': step.get('name', ''),
-            'log_entries': [
-                f"{timestamp} - Executing step: {step.get('name', '')}",
-                f"{timestamp} - Step status: {step.get('result', {}).get('status', 'unknown')}"
-            ]
+            'timestamp': log_entries[0][:8] if log_entries else '',
+            'step_name': step.name,
+            'log_entries': log_entries
         }
 
     def _capture_step_data(self, step):
         """Captura datos de ejecución del paso"""
         return {
-            'execution_time': datetime.datetime.now().isoformat(),
-            'step_duration': step.get('result', {}).get('duration', 0) / 1000000000,
+            'execution_time': step.start_time,
+            'step_duration': step.duration,
             'parameters': self._extract_step_parameters(step)
         }
 
     def _extract_step_parameters(self, step):
         """Extrae parámetros del paso Gherkin"""
-        step_name = step.get('name', '')
         parameters = {}
 
         # Extraer valores entre comillas del paso
-        import re
-        quoted_values = re.findall(r'"([^"]*)"', step_name)
+        quoted_values = QUOTED_PARAMETER_RE.findall(step.name)
         if quoted_values:
             parameters['quoted_parameters'] = quoted_values
 
         return parameters
 
     def _collect_evidence_paths(self, steps_details):
-        """Colecta todas las rutas de evidencias del escenario"""
+        """Colecta las rutas de capturas del escenario (sin generar logs ni datos de cada paso)"""
         evidence_paths = []
         for step in steps_details:
-            if 'evidence' in step and 'screenshot' in step['evidence']:
-                evidence_paths.append(step['evidence']['screenshot'].get('planned_path', ''))
+            screenshot = self._find_screenshot(step_key(step.scenario_location, step.location), step.status)
+            if screenshot:
+                evidence_paths.append(screenshot.get('path', ''))
         return [path for path in evidence_paths if path]
 
     def _get_detailed_error(self, scenario):
@@ -208,7 +279,6 @@ class HTMLReporter:
 
     def _get_environment_info(self):
         """Obtiene información del entorno de ejecución"""
-        import platform
         return {
             'platform': platform.platform(),
             'python_version': platform.python_version(),
@@ -227,6 +297,11 @@ class HTMLReporter:
         report_path = os.path.join(self.report_dir,
                                    f"sap_test_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
 
+        if self.com_profile['steps'] and isinstance(results, SuiteRecord):
+            results.com_profile = summarize_profile(self.com_profile)
+        if self.session_health and isinstance(results, SuiteRecord):
+            results.session_health = self.session_health
+
         html_content = self._generate_enhanced_html_content(results)
 
         with open(report_path, 'w', encoding='utf-8') as f:
@@ -238,12 +313,14 @@ class HTMLReporter:
 
         return report_path
 
-    def _generate_enhanced_html_content(self, results):
+    def _generate_enhanced_html_content(self, results, title=None, index_link=None):
         """Genera contenido HTML con todos los detalles y evidencias"""
+        title = html.escape(f"Reporte Detallado SAP Automation - {title}" if title else "Reporte Detallado SAP Automation")
+        back_link = f'<p><a href="{html.escape(index_link)}" style="color: white;">⬅️ Volver al índice consolidado</a></p>' if index_link else ""
         return f"""<!DOCTYPE html>
 <html>
 <head>
-    <title>Reporte Detallado SAP Automation</title>
+    <title>{title}</title>
     <meta charset="UTF-8">
     <style>
         body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f8f9fa; }}
@@ -284,7 +361,8 @@ class HTMLReporter:
 </head>
 <body>
     <div class="header">
-        <h1>🚀 Reporte Detallado SAP Automation</h1>
+        <h1>🚀 {title}</h1>
+        {back_link}
         <p>📅 Generado: {results['generation_time']}</p>
         <p>⏱️ Duración total: <strong>{results['total_duration']} segundos</strong></p>
     </div>
@@ -322,6 +400,12 @@ class HTMLReporter:
         <p><strong>Directorio:</strong> {results['execution_environment']['working_directory']}</p>
     </div>
 
+    {self._generate_com_profile_html(results.get('com_profile'))}
+
+    {self._generate_session_health_html(results.get('session_health'))}
+
+    {self._generate_flaky_steps_html(self._flaky_steps(results['test_cases']))}
+
     <div class="test-cases">
         <h2>📋 Detalle de Ejecución - Paso a Paso</h2>
         {self._generate_detailed_test_cases_html(results['test_cases'])}
@@ -353,6 +437,224 @@ class HTMLReporter:
 </body>
 </html>"""
 
+    def _generate_regressions_html(self, regression_report):
+        """Sección de regresiones de rendimiento frente a ejecuciones anteriores"""
+        if not regression_report:
+            return ""
+
+        regressions = regression_report.get('regressions', [])
+        checked = regression_report.get('checked', {})
+        baseline_runs = len(regression_report.get('baseline_runs', []))
+        if not regressions:
+            return f"""
+    <div class="summary">
+        <h2>🐢 Regresiones de Rendimiento</h2>
+        <p>✅ Sin regresiones: {checked.get('steps', 0)} pasos y {checked.get('scenarios', 0)} escenarios comparados contra {baseline_runs} ejecuciones.</p>
+    </div>"""
+
+        rows = ""
+        for flag in regressions:
+            target = f"{flag['scenario']} → {flag['step']}" if flag['level'] == 'step' else flag['scenario']
+            rows += f"""
+            <tr>
+                <td>{'Paso' if flag['level'] == 'step' else 'Escenario'}</td>
+                <td>{html.escape(flag['module'])}</td>
+                <td>{html.escape(target)}</td>
+                <td>{flag['duration']}s</td>
+                <td>{flag['baseline_median']}s (n={flag['baseline_samples']})</td>
+                <td>{f"x{flag['ratio']}" if flag['ratio'] is not None else '-'}</td>
+                <td>{flag['z_score'] if flag['z_score'] is not None else '∞'}</td>
+            </tr>"""
+
+        return f"""
+    <div class="summary failed">
+        <h2>🐢 Regresiones de Rendimiento ({len(regressions)})</h2>
+        <p>Comparado contra {baseline_runs} ejecuciones anteriores (umbral: {regression_report['criteria']['threshold']} MAD).</p>
+        <table class="modules-table">
+            <tr><th>Nivel</th><th>Módulo</th><th>Elemento</th><th>Duración</th><th>Mediana base</th><th>Ratio</th><th>Z robusto</th></tr>
+            {rows}
+        </table>
+    </div>"""
+
+    def _generate_com_profile_html(self, com_profile):
+        """Desglose de tiempo en llamadas COM a SAP GUI (tipos de llamada y elementos más costosos)"""
+        if not com_profile or not com_profile.get('total_calls'):
+            return ""
+
+        call_rows = "".join(f"""
+            <tr><td>{html.escape(item['call'])}</td><td>{item['count']}</td><td>{item['total']}s</td><td>{item['max']}s</td></tr>"""
+                            for item in com_profile['by_call'])
+        element_rows = "".join(f"""
+            <tr><td><code>{html.escape(item['element'])}</code></td><td>{html.escape(item['call'])}</td><td>{item['count']}</td><td>{item['total']}s</td><td>{item['mean']}s</td><td>{item['max']}s</td></tr>"""
+                               for item in com_profile['hot_elements'])
+
+        return f"""
+    <div class="summary">
+        <h2>🧩 Llamadas COM a SAP GUI</h2>
+        <p>{com_profile['total_calls']} llamadas, {com_profile['total_time']}s en total.</p>
+        <table class="modules-table" style="width: 100%; border-collapse: collapse;">
+            <tr><th>Llamada</th><th>Conteo</th><th>Total</th><th>Máx.</th></tr>
+            {call_rows}
+        </table>
+        <h3>🔥 Elementos más costosos</h3>
+        <table class="modules-table" style="width: 100%; border-collapse: collapse;">
+            <tr><th>Elemento</th><th>Llamada</th><th>Conteo</th><th>Total</th><th>Media</th><th>Máx.</th></tr>
+            {element_rows}
+        </table>
+    </div>"""
+
+    def _generate_session_health_html(self, health):
+        """Reconexiones de la sesión SAP y escenarios reintentados (tiempo perdido por cada uno)"""
+        if not health or not (health.get('reconnects') or health.get('events') or health.get('reconnect_failures')):
+            return ""
+
+        totals = ""
+        if 'reconnects' in health:
+            totals = (f"<p>{health['reconnects']} reconexiones ({health.get('reconnect_failures', 0)} fallidas), "
+                      f"{health.get('retried', 0)} escenarios reintentados ({health.get('recovered', 0)} recuperados), "
+                      f"<strong>{health.get('time_lost', 0)}s perdidos</strong>. "
+                      f"Sondeos: {health.get('probes', 0)} ({health.get('probe_failures', 0)} fallidos).</p>")
+        rows = "".join(f"""
+            <tr><td>{html.escape(event['name'])}</td><td>{'✅' if event['retry_status'] == 'passed' else '❌'}</td><td>{event['failed_attempt']}s</td><td>{event['reconnect']}s</td><td>{event['time_lost']}s</td><td>{html.escape(event.get('error') or '')}</td></tr>"""
+                       for event in health.get('events', []))
+        table = f"""
+        <table class="modules-table" style="width: 100%; border-collapse: collapse;">
+            <tr><th>Escenario</th><th>Reintento</th><th>Intento fallido</th><th>Reconexión</th><th>Tiempo perdido</th><th>Error</th></tr>
+            {rows}
+        </table>""" if rows else ""
+
+        return f"""
+    <div class="summary">
+        <h2>🔌 Salud de la Sesión SAP</h2>
+        {totals}
+        {table}
+    </div>"""
+
+    def _flaky_steps(self, test_cases):
+        """Pasos reintentados por errores transitorios en la ejecución, con su índice de inestabilidad histórico"""
+        flaky_steps = []
+        for case in test_cases:
+            for step in case['steps']:
+                retries = step.get('retries')
+                if not retries:
+                    continue
+                key = step_key(getattr(step, 'scenario_location', ''), getattr(step, 'location', ''))
+                flaky_steps.append({
+                    'key': key,
+                    'name': step['name'],
+                    'retries': retries['retries'],
+                    'recovered': bool(retries.get('recovered')) and not retries.get('failed'),
+                    'checkpoint_restarts': retries.get('checkpoint_restarts', 0),
+                    'kinds': sorted({error['kind'] for error in retries.get('errors', [])}),
+                    'history': self.load_flakiness().get(key)
+                })
+        return sorted(flaky_steps, key=lambda item: item['retries'], reverse=True)
+
+    def _generate_flaky_steps_html(self, flaky_steps):
+        """Tabla de pasos inestables: resultado del reintento, errores e índice de inestabilidad"""
+        if not flaky_steps:
+            return ""
+
+        rows = ""
+        for item in flaky_steps:
+            history = item.get('history')
+            score = f"{history['score']:.2f} ({history['flaky_runs']}/{history['runs']} ejecuciones)" if history else "—"
+            outcome = '✅ Recuperado' if item['recovered'] else '❌ Agotado'
+            rows += f"""
+            <tr><td>{html.escape(item['name'])}</td><td>{outcome}</td><td>{item['retries']}</td><td>{item['checkpoint_restarts']}</td><td>{html.escape(", ".join(item['kinds']))}</td><td>{score}</td></tr>"""
+
+        return f"""
+    <div class="summary">
+        <h2>🔁 Pasos Inestables</h2>
+        <p>{len(flaky_steps)} pasos necesitaron reintentos por errores transitorios de SAP GUI.</p>
+        <table class="modules-table" style="width: 100%; border-collapse: collapse;">
+            <tr><th>Paso</th><th>Resultado</th><th>Reintentos</th><th>Desde checkpoint</th><th>Errores</th><th>Índice de inestabilidad</th></tr>
+            {rows}
+        </table>
+    </div>"""
+
+    def _generate_credentials_html(self, usage):
+        """Usuario SAP arrendado por cada módulo y la espera por contención en el pool"""
+        if not usage:
+            return ""
+
+        rows = ""
+        for module, stats in usage.items():
+            for lease in stats.get('leases', []):
+                rows += f"""
+            <tr><td>{html.escape(module)}</td><td>{html.escape(lease['worker'])}</td><td>{html.escape(lease['username'])}</td><td>{lease['waited']}s</td></tr>"""
+        contended = sum(stats.get('contended', 0) for stats in usage.values())
+        waited = round(sum(stats.get('wait_seconds', 0) for stats in usage.values()), 3)
+        timeouts = sum(stats.get('timeouts', 0) for stats in usage.values())
+
+        return f"""
+    <div class="summary">
+        <h2>🔑 Pool de Usuarios SAP</h2>
+        <p>{contended} arriendos esperaron un usuario libre ({waited}s en total), {timeouts} esperas agotadas.</p>
+        <table class="modules-table" style="width: 100%; border-collapse: collapse;">
+            <tr><th>Módulo</th><th>Worker</th><th>Usuario</th><th>Espera</th></tr>
+            {rows}
+        </table>
+    </div>"""
+
+    def _generate_session_budget_html(self, budget):
+        """Esperas por un turno del presupuesto de sesiones SAP, por tipo y por ámbito saturado"""
+        if not budget:
+            return ""
+
+        rows = ""
+        for label, groups in (("Tipo", budget.get('by_kind', {})), ("Cuello de botella", budget.get('by_bottleneck', {}))):
+            for name, stats in groups.items():
+                rows += f"""
+            <tr><td>{label}: {html.escape(name)}</td><td>{stats['count']}</td><td>{stats['wait_seconds']}s</td><td>{stats['p50_wait_seconds']}s</td><td>{stats['p95_wait_seconds']}s</td><td>{stats['max_wait_seconds']}s</td></tr>"""
+        limits = ", ".join(f"{html.escape(scope)} {limit}" for scope, limit in (budget.get('limits') or {}).items())
+
+        return f"""
+    <div class="summary">
+        <h2>🎟️ Presupuesto de Sesiones SAP</h2>
+        <p>Límites: {limits or 'sin límites'}. {budget.get('contended', 0)} turnos esperaron en la cola, {budget.get('timeouts', 0)} esperas agotadas, {budget.get('overdrafts', 0)} sesiones sobre el presupuesto.</p>
+        <table class="modules-table" style="width: 100%; border-collapse: collapse;">
+            <tr><th>Grupo</th><th>Solicitudes</th><th>Espera total</th><th>p50</th><th>p95</th><th>Máx</th></tr>
+            {rows}
+        </table>
+    </div>"""
+
+    def _retry_badge_html(self, case):
+        """Marca de los escenarios que pasaron (o no) tras reintentarse por sesión perdida"""
+        location = case.location if isinstance(case, ScenarioRecord) else case.get('location')
+        event = next((event for event in self.session_health.get('events', [])
+                      if event['scenario'] == location), None)
+        if not event:
+            return ""
+        return (f'<span class="tag">🔌 Reintentado tras reconexión '
+                f'({event["time_lost"]}s perdidos)</span>')
+
+    def _generate_modules_table_html(self, modules):
+        """Tabla resumen de módulos con enlace a cada shard"""
+        if not modules:
+            return "<p>No hay módulos para mostrar</p>"
+
+        rows = ""
+        for module in modules:
+            status = "PASSED" if module['success'] else "FAILED"
+            rows += f"""
+            <tr>
+                <td><a href="{html.escape(module['html'])}">{html.escape(module['module'])}</a></td>
+                <td><span class="status status-{status}" style="float: none;">{status}</span></td>
+                <td>{module['total']}</td>
+                <td>{module['passed']}</td>
+                <td>{module['failed']}</td>
+                <td>{module['skipped']}</td>
+                <td>{module['total_duration']}s</td>
+                <td><a href="{html.escape(module['detail'])}">JSON</a></td>
+            </tr>"""
+
+        return f"""
+        <table class="modules-table">
+            <tr><th>Módulo</th><th>Estado</th><th>Total</th><th>✅</th><th>❌</th><th>⏸️</th><th>Duración</th><th>Detalle</th></tr>
+            {rows}
+        </table>"""
+
     def _generate_detailed_test_cases_html(self, test_cases):
         """Genera HTML con detalles completos de cada caso de prueba"""
         if not test_cases:
@@ -374,6 +676,7 @@ class HTMLReporter:
                 </div>
 
                 {''.join(f'<span class="tag">#{tag}</span>' for tag in case['tags'])}
+                {self._retry_badge_html(case)}
 
                 <button class="collapsible" onclick="toggleSteps(this)">📂 Mostrar Detalles de Ejecución</button>
                 <div class="content">
@@ -412,11 +715,22 @@ class HTMLReporter:
                     {f" | <strong>Inicio:</strong> {step['start_time']}" if step['start_time'] else ""}
                 </div>
 
+                {self._step_retries_html(step.get('retries'))}
+
                 {f'<div class="error"><strong>Error:</strong><br><code>{html.escape(step["error"])}</code></div>' if step['error'] else ''}
             </div>
             """
         return steps_html
 
+    def _step_retries_html(self, retries):
+        """Intentos del paso por errores transitorios (ocupado, control aún no disponible)"""
+        if not retries:
+            return ""
+        errors = "; ".join(f"intento {error['attempt']}: {error['kind']}" for error in retries.get('errors', []))
+        checkpoint = f", {retries['checkpoint_restarts']} desde checkpoint" if retries.get('checkpoint_restarts') else ""
+        return (f'<div class="step-details">🔁 <strong>Reintentos:</strong> {retries["retries"]}{checkpoint} '
+                f'({retries.get("recovered", 0)} recuperados) — {html.escape(errors)}</div>')
+
     def _generate_evidence_html(self, case):
         """Genera HTML para las evidencias del caso"""
         evidence_html = ""
@@ -434,11 +748,27 @@ class HTMLReporter:
 
                     if step['evidence'].get('screenshot'):
                         screenshot_info = step['evidence']['screenshot']
-                        if screenshot_info.get('status') == 'not_implemented':
+                        if screenshot_info.get('status') == 'captured':
+                            src = html.escape(self._relative_to_report(screenshot_info['path']))
+                            evidence_html += f'📷 <a href="{src}" target="_blank"><img src="{src}" alt="screenshot" style="max-width: 320px; display: block;"></a>'
+                        elif screenshot_info.get('message'):
                             evidence_html += f'📷 <em>{screenshot_info["message"]}</em><br>'
 
                     if step['evidence'].get('logs'):
-                        evidence_html += f'📝 Logs: {len(step["evidence"]["logs"]["log_entries"])} entradas<br>'
+                        log_entries = step['evidence']['logs']['log_entries']
+                        evidence_html += f'📝 Logs: {len(log_entries)} entradas<br>'
+                        if log_entries:
+                            evidence_html += f'<pre>{html.escape(chr(10).join(log_entries))}</pre>'
+
+                    if step['evidence'].get('com_calls'):
+                        com_calls = step['evidence']['com_calls']
+                        hottest = ", ".join(f"{item['call']} {item['element']} ({item['total']}s)"
+                                            for item in com_calls['hot_elements'][:3])
+                        evidence_html += f'🧩 COM: {com_calls["total_calls"]} llamadas, {com_calls["total_time"]}s'
+                        evidence_html += f' — {html.escape(hottest)}<br>' if hottest else '<br>'
+
+                    if step['evidence'].get('rows'):
+                        evidence_html += self._generate_rows_html(step['evidence']['rows'])
 
                     evidence_html += '</div>'
 
@@ -446,6 +776,34 @@ class HTMLReporter:
 
         return evidence_html
 
+    def _generate_rows_html(self, rows):
+        """Tabla de sub-resultados por fila (estado, duración, datos y error)"""
+        rows_html = (f'📊 Filas ({html.escape(str(rows.get("source") or ""))}): {rows["passed"]}/{rows["total"]} '
+                     f'correctas, {rows["failed"]} fallidas, {rows["duration"]}s '
+                     f'(p50 {rows["p50"]}s, p95 {rows["p95"]}s, lotes de {rows["batch_size"]})<br>')
+        if rows.get('stopped'):
+            rows_html += '<em>⛔ Procesamiento detenido por exceso de filas fallidas</em><br>'
+        rows_html += '<details><summary>Ver filas</summary><table class="modules-table"><tr>' \
+                     '<th>#</th><th>Lote</th><th>Estado</th><th>Duración</th><th>Inicio</th><th>Datos</th><th>Error</th></tr>'
+        for row in rows['rows']:
+            icon = "✅" if row['status'] == 'passed' else "❌"
+            data = ", ".join(f"{name}={value}" for name, value in row['data'].items())
+            rows_html += (f'<tr><td>{row["index"]}</td><td>{row["batch"]}</td><td>{icon}</td>'
+                          f'<td>{row["duration"]}s</td><td>{row["start_time"]}</td><td>{html.escape(data)}</td>'
+                          f'<td>{html.escape(row.get("error_message") or "")}</td></tr>')
+        rows_html += '</table>'
+        if rows.get('truncated'):
+            rows_html += f'<em>… {rows["truncated"]} filas más en el JSON de resultados</em>'
+        return rows_html + '</details>'
+
+    def _relative_to_report(self, path):
+        """Ruta relativa desde el directorio del reporte (para enlaces en el HTML)"""
+        try:
+            return Path(os.path.relpath(path, self.report_dir)).as_posix()
+        except ValueError:
+            # Distinta unidad en Windows: usar ruta absoluta
+            return Path(path).resolve().as_uri()
+
     def _generate_error_html(self, case):
         """Genera HTML para errores"""
         if case['status'] != 'failed' or not case['error']:
@@ -466,7 +824,7 @@ class HTMLReporter:
         """Genera archivo JSON adicional para análisis"""
         try:
             with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+                json.dump(results, f, indent=2, ensure_ascii=False, default=to_serializable)
             logger.info(f"📈 Archivo de análisis generado: {json_path}")
         except Exception as e:
             logger.error(f"Error generando archivo de análisis: {e}")
@@ -496,7 +854,12 @@ class HTMLReporter:
 
     # NEW METHOD ADDED HERE
     def generate_consolidated_report(self, consolidated_data):
-        """Genera reporte HTML consolidado para múltiples módulos"""
+        """Genera reporte consolidado fragmentado: índice ligero + un shard HTML/JSON por módulo.
+
+        Los shards se renderizan en paralelo (un proceso por módulo, ``SAP_REPORT_WORKERS``).
+        El ``_analysis.json`` del índice solo contiene agregados; el detalle de cada
+        módulo queda en su propio JSON.
+        """
         try:
             # Calcular métricas consolidadas basadas en los test_cases
             test_cases = consolidated_data.get('test_cases', [])
@@ -507,6 +870,18 @@ class HTMLReporter:
             total_duration = sum(case['duration'] for case in test_cases)
             average_duration = round(total_duration / total, 2) if total > 0 else 0
 
+            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+            report_path = os.path.join(self.report_dir, f"sap_consolidated_report_{timestamp}.html")
+            shard_dir = Path(self.report_dir) / f"sap_consolidated_report_{timestamp}"
+            shard_dir.mkdir(parents=True, exist_ok=True)
+
+            generation_time = consolidated_data.get('generation_time',
+                                                    datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            with tracing.span("render_module_shards", "report"):
+                modules = self._render_module_shards(test_cases, shard_dir, generation_time,
+                                                     consolidated_data.get('execution_summary', {}),
+                                                     os.path.basename(report_path))
+
             results = {
                 'total': total,
                 'passed': passed,
@@ -514,26 +889,32 @@ class HTMLReporter:
                 'skipped': skipped,
                 'total_duration': round(total_duration, 2),
                 'average_duration': average_duration,
-                'generation_time': consolidated_data.get('generation_time', datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+                'generation_time': generation_time,
                 'execution_environment': self._get_environment_info(),
-                'test_cases': test_cases,  # Usar los test_cases consolidados
                 'total_modules': consolidated_data.get('total_modules', 0),
                 'successful_modules': consolidated_data.get('successful_modules', 0),
                 'failed_modules': consolidated_data.get('failed_modules', 0),
-                'success_rate': consolidated_data.get('success_rate', 0)
+                'success_rate': consolidated_data.get('success_rate', 0),
+                'modules': modules,
+                'regressions': consolidated_data.get('regressions'),
+                'com_profile': summarize_profile(self.com_profile) if self.com_profile['steps'] else None,
+                'session_health': self.session_health or None,
+                'flaky_steps': self._flaky_steps(test_cases),
+                'credentials': consolidated_data.get('credentials'),
+                # Solo agregados: el detalle de cada espera queda en los sidecars de cada módulo
+                'session_budget': {name: value for name, value in (consolidated_data.get('session_budget') or {}).items()
+                                   if name != 'waits'} or None
             }
 
-            # Generar HTML usando la misma lógica, pero con datos consolidados
-            report_path = os.path.join(self.report_dir,
-                                       f"sap_consolidated_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
-            html_content = self._generate_consolidated_html_content(results)
+            with tracing.span("render_index", "report"):
+                html_content = self._generate_consolidated_html_content(results)
 
-            with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+                with open(report_path, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
 
-            logger.info(f"📊 Reporte HTML CONSOLIDADO generado: {report_path}")
+            logger.info(f"📊 Reporte HTML CONSOLIDADO generado: {report_path} ({len(modules)} shards)")
 
-            # Generar JSON de análisis opcional
+            # JSON de análisis solo con agregados (el detalle vive en cada shard)
             self._generate_analysis_json(results, report_path.replace('.html', '_analysis.json'))
 
             return report_path
@@ -541,6 +922,98 @@ class HTMLReporter:
             logger.error(f"Error generando reporte consolidado: {e}")
             return None
 
+    def _render_module_shards(self, test_cases, shard_dir, generation_time, execution_summary, index_name):
+        """Agrupa los escenarios por módulo y renderiza cada shard en paralelo"""
+        cases_by_module = {}
+        for case in test_cases:
+            cases_by_module.setdefault(case.get('module') or 'sin_modulo', []).append(case)
+
+        jobs = []
+        for module_name, module_cases in cases_by_module.items():
+            locations = {case.location for case in module_cases if isinstance(case, ScenarioRecord)}
+            step_logs = {key: records for key, records in self.step_logs.items()
+                         if key.split('::', 1)[0] in locations}
+            com_profile = {'steps': {key: elements for key, elements in self.com_profile['steps'].items()
+                                     if key.split('::', 1)[0] in locations}}
+            row_results = {key: summary for key, summary in self.row_results.items()
+                           if key.split('::', 1)[0] in locations}
+            # Los totales de reconexión son de la ejecución; el shard solo lleva sus escenarios reintentados
+            session_health = {'events': [event for event in self.session_health.get('events', [])
+                                         if event['scenario'] in locations]}
+            jobs.append((str(shard_dir), str(self.evidence_root), self.run_id, step_logs, com_profile, row_results,
+                         session_health, module_name, module_cases, generation_time, f"../{index_name}"))
+
+        # Cada proceso vuelve a importar el reporter (spawn en Windows): nunca más procesos que shards,
+        # y con pocos escenarios el arranque cuesta más de lo que ahorra
+        from src.config.config import ReportConfig
+        workers = min(ReportConfig.WORKERS or os.cpu_count() or 1, len(jobs))
+        if len(test_cases) < ReportConfig.PARALLEL_MIN_SCENARIOS:
+            workers = 1
+        if workers > 1:
+            try:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    shard_summaries = list(executor.map(_render_module_shard, jobs))
+            except Exception as e:
+                logger.warning(f"Render paralelo no disponible ({e}), renderizando en serie")
+                shard_summaries = [_render_module_shard(job) for job in jobs]
+        else:
+            # En este proceso: el índice de evidencias ya cargado se reutiliza en cada shard
+            shard_summaries = [_render_module_shard(job, self.evidence_index) for job in jobs]
+
+        for summary in shard_summaries:
+            if summary['module'] in execution_summary:
+                summary['success'] = bool(execution_summary[summary['module']])
+            summary['html'] = f"{shard_dir.name}/{summary['html']}"
+            summary['detail'] = f"{shard_dir.name}/{summary['detail']}"
+        return shard_summaries
+
+    def _write_module_shard(self, module_name, module_cases, generation_time, index_link):
+        """Escribe el HTML y el JSON de detalle de un módulo; retorna su resumen"""
+        if all(isinstance(case, ScenarioRecord) for case in module_cases):
+            for case in module_cases:
+                case.bind_evidence(self._collect_evidence_paths, self._generate_step_evidence)
+            results = SuiteRecord(module_cases, generation_time, self._get_environment_info())
+        else:
+            total_duration = sum(case['duration'] for case in module_cases)
+            results = {
+                'total': len(module_cases),
+                'passed': sum(1 for case in module_cases if case['status'] == 'passed'),
+                'failed': sum(1 for case in module_cases if case['status'] == 'failed'),
+                'skipped': sum(1 for case in module_cases if case['status'] == 'skipped'),
+                'test_cases': module_cases,
+                'total_duration': round(total_duration, 2),
+                'average_duration': round(total_duration / len(module_cases), 2) if module_cases else 0,
+                'generation_time': generation_time,
+                'execution_environment': self._get_environment_info()
+            }
+        if self.com_profile['steps']:
+            results['com_profile'] = summarize_profile(self.com_profile)
+        if self.session_health.get('events'):
+            results['session_health'] = self.session_health
+
+        safe_name = "".join(c if (c.isalnum() or c in ('_', '-')) else '_' for c in module_name)
+        html_path = os.path.join(self.report_dir, f"{safe_name}.html")
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(self._generate_enhanced_html_content(results, title=f"Módulo {module_name}",
+                                                         index_link=index_link))
+
+        detail_path = os.path.join(self.report_dir, f"{safe_name}.json")
+        with open(detail_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, default=to_serializable)
+
+        return {
+            'module': module_name,
+            'total': results['total'],
+            'passed': results['passed'],
+            'failed': results['failed'],
+            'skipped': results['skipped'],
+            'total_duration': results['total_duration'],
+            'success': results['failed'] == 0,
+            'html': f"{safe_name}.html",
+            'detail': f"{safe_name}.json"
+        }
+
     def _generate_consolidated_html_content(self, results):
         """Genera contenido HTML consolidado con resumen de módulos"""
         # Similar a _generate_enhanced_html_content, pero con adiciones para módulos
@@ -586,6 +1059,9 @@ class HTMLReporter:
         .tag {{ display: inline-block; background: #e9ecef; padding: 2px 8px; border-radius: 12px; font-size: 0.8em; margin-right: 5px; }}
         .environment {{ background: #e7f1ff; padding: 15px; border-radius: 5px; margin: 10px 0; }}
         .module-summary {{ background: #f0f4f8; padding: 15px; border-radius: 5px; margin-bottom: 20px; }}
+        .modules-table {{ width: 100%; border-collapse: collapse; }}
+        .modules-table th, .modules-table td {{ padding: 8px 12px; border-bottom: 1px solid #e9ecef; text-align: left; }}
+        .modules-table th {{ background: #f0f4f8; }}
     </style>
 </head>
 <body>
@@ -635,9 +1111,20 @@ class HTMLReporter:
         <p><strong>Directorio:</strong> {results['execution_environment']['working_directory']}</p>
     </div>
 
-    <div class="test-cases">
-        <h2>📋 Detalle de Ejecución - Paso a Paso (Todos los Módulos)</h2>
-        {self._generate_detailed_test_cases_html(results['test_cases'])}
+    {self._generate_regressions_html(results.get('regressions'))}
+
+    {self._generate_com_profile_html(results.get('com_profile'))}
+
+    {self._generate_session_health_html(results.get('session_health'))}
+
+    {self._generate_flaky_steps_html(results.get('flaky_steps'))}
+
+    {self._generate_credentials_html(results.get('credentials'))}
+    {self._generate_session_budget_html(results.get('session_budget'))}
+
+    <div class="summary">
+        <h2>📋 Detalle por Módulo</h2>
+        {self._generate_modules_table_html(results['modules'])}
     </div>
 
     <script>
@@ -666,3 +1153,14 @@ class HTMLReporter:
 </body>
 </html>"""
 
+
+def _render_module_shard(job, evidence_index=None):
+    """Renderiza el shard de un módulo (ejecutable en un proceso worker)"""
+    (shard_dir, evidence_root, run_id, step_logs, com_profile, row_results, session_health, module_name,
+     module_cases, generation_time, index_link) = job
+    reporter = HTMLReporter(shard_dir, evidence_root=evidence_root, run_id=run_id, evidence_index=evidence_index)
+    reporter.step_logs = step_logs
+    reporter.com_profile = com_profile
+    reporter.row_results = row_results
+    reporter.session_health = session_health
+    return reporter._write_module_shard(module_name, module_cases, generation_time, index_link)
@@ -0,0 +1,170 @@
+class _Record:
+    """Base de registros compactos con acceso tipo dict (compatibilidad con el reporter).
+
+    Las subclases declaran ``__slots__`` y ``FIELDS`` (campos expuestos como claves).
+    """
+    __slots__ = ()
+    FIELDS = ()
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def get(self, key, default=None):
+        if key not in self.FIELDS:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return iter(self.FIELDS)
+
+    def to_dict(self):
+        """Representación serializable (fuerza la evaluación de campos perezosos)"""
+        return {field: _to_plain(getattr(self, field)) for field in self.FIELDS}
+
+    def __getstate__(self):
+        # Las factories perezosas (métodos del reporter) no viajan entre procesos
+        return {slot: getattr(self, slot) for slot in type(self).__slots__ if not slot.endswith('_factory')}
+
+    def __setstate__(self, state):
+        for slot in type(self).__slots__:
+            setattr(self, slot, state.get(slot))
+
+
+def _to_plain(value):
+    if isinstance(value, _Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+def to_serializable(obj):
+    """Hook ``default`` para ``json.dump`` con registros del modelo"""
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StepRecord(_Record):
+    """Paso ejecutado; la evidencia se genera en el primer acceso"""
+    __slots__ = ('name', 'keyword', 'status', 'duration', 'error', 'traceback', 'start_time', 'end_time',
+                 'location', 'scenario_location', 'retries', '_evidence', '_evidence_factory')
+    FIELDS = ('name', 'keyword', 'status', 'duration', 'error', 'traceback', 'start_time', 'end_time', 'retries',
+              'evidence')
+
+    def __init__(self, name, keyword, status, duration, error='', traceback='', start_time='', end_time='',
+                 location='', scenario_location='', retries=None, evidence_factory=None):
+        self.name = name
+        self.keyword = keyword
+        self.status = status
+        self.duration = duration
+        self.error = error
+        self.traceback = traceback
+        self.start_time = start_time
+        self.end_time = end_time
+        self.location = location
+        self.scenario_location = scenario_location
+        # Intentos por errores transitorios de SAP GUI (``result.retries`` del JSON de behave)
+        self.retries = retries
+        self._evidence = None
+        self._evidence_factory = evidence_factory
+
+    @property
+    def evidence(self):
+        if self._evidence is None:
+            self._evidence = self._evidence_factory(self) if self._evidence_factory else {}
+            self._evidence_factory = None
+        return self._evidence
+
+    @evidence.setter
+    def evidence(self, value):
+        self._evidence = value
+        self._evidence_factory = None
+
+    def bind_evidence(self, evidence_factory):
+        """Asocia la factory de evidencia si aún no se calculó (p. ej. tras deserializar)"""
+        if self._evidence is None:
+            self._evidence_factory = evidence_factory
+
+
+class ScenarioRecord(_Record):
+    """Escenario analizado; las rutas de evidencia se resuelven bajo demanda"""
+    __slots__ = ('name', 'description', 'tags', 'status', 'duration', 'steps', 'start_time', 'end_time',
+                 'error', 'module', 'location', '_evidence_paths', '_evidence_paths_factory')
+    FIELDS = ('name', 'description', 'tags', 'status', 'duration', 'steps', 'start_time', 'end_time',
+              'error', 'module', 'evidence_paths')
+
+    def __init__(self, name, description, tags, status, duration, steps, start_time, end_time, error,
+                 module='', location='', evidence_paths_factory=None):
+        self.name = name
+        self.description = description
+        self.tags = tags
+        self.status = status
+        self.duration = duration
+        self.steps = steps
+        self.start_time = start_time
+        self.end_time = end_time
+        self.error = error
+        self.module = module
+        self.location = location
+        self._evidence_paths = None
+        self._evidence_paths_factory = evidence_paths_factory
+
+    @property
+    def evidence_paths(self):
+        if self._evidence_paths is None:
+            factory = self._evidence_paths_factory
+            self._evidence_paths = factory(self.steps) if factory else []
+            self._evidence_paths_factory = None
+        return self._evidence_paths
+
+    @evidence_paths.setter
+    def evidence_paths(self, value):
+        self._evidence_paths = value
+        self._evidence_paths_factory = None
+
+    def bind_evidence(self, evidence_paths_factory, step_evidence_factory):
+        """Re-asocia las factories perezosas del escenario y de sus pasos"""
+        if self._evidence_paths is None:
+            self._evidence_paths_factory = evidence_paths_factory
+        for step in self.steps:
+            step.bind_evidence(step_evidence_factory)
+
+
+class SuiteRecord(_Record):
+    """Resultado agregado de un JSON de behave"""
+    __slots__ = ('total', 'passed', 'failed', 'skipped', 'test_cases', 'total_duration', 'average_duration',
+                 'generation_time', 'execution_environment', 'com_profile', 'session_health')
+    FIELDS = __slots__
+
+    def __init__(self, test_cases, generation_time, execution_environment, com_profile=None):
+        self.test_cases = test_cases
+        self.com_profile = com_profile
+        self.session_health = None
+        self.total = len(test_cases)
+        self.passed = 0
+        self.failed = 0
+        self.skipped = 0
+        total_duration = 0
+        for case in test_cases:
+            if case.status == 'passed':
+                self.passed += 1
+            elif case.status == 'failed':
+                self.failed += 1
+            elif case.status == 'skipped':
+                self.skipped += 1
+            total_duration += case.duration
+        self.total_duration = round(total_duration, 2)
+        self.average_duration = round(total_duration / self.total, 2) if self.total > 0 else 0
+        self.generation_time = generation_time
+        self.execution_environment = execution_environment
@@ -0,0 +1,167 @@
+import json
+import logging
+
+import numpy as np
+
+from src.reporting.timing_store import STATUS_CODES, StepTimingStore, grouped_quantiles, step_label
+
+logger = logging.getLogger(__name__)
+
+# Factor para que la MAD sea comparable a la desviación estándar en datos normales
+MAD_SCALE = 1.4826
+
+
+class RegressionDetector:
+    """Detecta regresiones de duración comparando una ejecución contra una ventana de ejecuciones previas.
+
+    La línea base sale del ``StepTimingStore``: pasos ``passed`` y escenarios de
+    ejecuciones en las que todos sus pasos pasaron. Un paso o
+    escenario se marca como regresión cuando su duración supera la mediana de la
+    ventana en más de ``threshold`` desviaciones robustas (MAD escalada) y,
+    además, en al menos ``min_ratio`` veces y ``min_delta`` segundos, para no
+    marcar ruido en pasos de milisegundos.
+    """
+
+    def __init__(self, store=None, window=20, min_samples=5, threshold=3.0, min_ratio=1.2, min_delta=0.5):
+        self.store = store or StepTimingStore()
+        self.window = window
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.min_ratio = min_ratio
+        self.min_delta = min_delta
+
+    def compare(self, results, run_id=None):
+        """Compara resultados parseados (``parse_behave_json`` o lista de test cases) contra la línea base"""
+        test_cases = results.get('test_cases', []) if hasattr(results, 'get') else results
+        baseline_runs = [run for run in self.store.values('run') if run != run_id][-self.window:]
+
+        step_baseline, scenario_baseline = self._baselines(baseline_runs)
+
+        regressions = []
+        checked_steps = 0
+        checked_scenarios = 0
+        for case in test_cases:
+            module = case.get('module') or ''
+            scenario = case.get('name', '')
+            steps = case.get('steps', [])
+
+            for step in steps:
+                if step.get('status') != 'passed':
+                    continue
+                key = (module, scenario, step_label(step))
+                if key in step_baseline:
+                    checked_steps += 1
+                    flag = self._evaluate(step.get('duration', 0), step_baseline[key])
+                    if flag:
+                        flag.update({'level': 'step', 'module': module, 'scenario': scenario, 'step': key[2]})
+                        regressions.append(flag)
+
+            if case.get('status') == 'passed' and (module, scenario) in scenario_baseline:
+                checked_scenarios += 1
+                flag = self._evaluate(case.get('duration', 0), scenario_baseline[(module, scenario)])
+                if flag:
+                    flag.update({'level': 'scenario', 'module': module, 'scenario': scenario, 'step': ''})
+                    regressions.append(flag)
+
+        regressions.sort(key=lambda flag: flag['z_score'] if flag['z_score'] is not None else float('inf'),
+                         reverse=True)
+        report = {
+            'run_id': run_id,
+            'baseline_runs': baseline_runs,
+            'criteria': {
+                'window': self.window,
+                'min_samples': self.min_samples,
+                'threshold': self.threshold,
+                'min_ratio': self.min_ratio,
+                'min_delta': self.min_delta
+            },
+            'checked': {'steps': checked_steps, 'scenarios': checked_scenarios},
+            'regressions': regressions
+        }
+        if regressions:
+            logger.warning(f"🐢 {len(regressions)} regresiones de rendimiento detectadas")
+        return report
+
+    def write_json(self, report, json_path):
+        """Escribe el resultado de la comparación para consumo del pipeline"""
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"📈 Reporte de regresiones generado: {json_path}")
+        return json_path
+
+    def _evaluate(self, duration, baseline):
+        median, mad, samples = baseline
+        spread = MAD_SCALE * mad
+        delta = duration - median
+        # Con MAD 0 (duraciones idénticas) basta con superar ratio y delta mínimos
+        z_score = delta / spread if spread > 0 else (float('inf') if delta > 0 else 0.0)
+        ratio = duration / median if median > 0 else float('inf')
+
+        if z_score > self.threshold and ratio >= self.min_ratio and delta >= self.min_delta:
+            return {
+                'duration': round(duration, 3),
+                'baseline_median': round(median, 3),
+                'baseline_mad': round(mad, 3),
+                'baseline_samples': samples,
+                'z_score': round(z_score, 2) if z_score != float('inf') else None,
+                'ratio': round(ratio, 2) if ratio != float('inf') else None
+            }
+        return None
+
+    def _baselines(self, baseline_runs):
+        """Mediana/MAD por paso y por escenario sobre la ventana, de forma vectorizada"""
+        if not baseline_runs or len(self.store) == 0:
+            return {}, {}
+
+        columns = self.store.columns()
+        mask = self.store.mask(run=baseline_runs)
+        if not mask.any():
+            return {}, {}
+
+        modules = self.store.values('module')
+        scenarios = self.store.values('scenario')
+        steps = self.store.values('step')
+        scenario_radix = max(len(scenarios), 1)
+        step_radix = max(len(steps), 1)
+
+        run_codes = np.asarray(columns['run'][mask], dtype=np.int64)
+        module_codes = np.asarray(columns['module'][mask], dtype=np.int64)
+        scenario_codes = np.asarray(columns['scenario'][mask], dtype=np.int64)
+        step_codes = np.asarray(columns['step'][mask], dtype=np.int64)
+        passed = np.asarray(columns['status'][mask]) == STATUS_CODES['passed']
+        durations = np.asarray(columns['duration'][mask])
+        scenario_ids = module_codes * scenario_radix + scenario_codes
+
+        # Nivel paso: (módulo, escenario, paso), solo pasos que pasaron
+        step_baseline = {}
+        if passed.any():
+            step_ids = scenario_ids[passed] * step_radix + step_codes[passed]
+            for group, median, mad, count in zip(*self._median_mad(step_ids, durations[passed])):
+                scenario_id, step_code = divmod(int(group), step_radix)
+                module_code, scenario_code = divmod(scenario_id, scenario_radix)
+                key = (modules[module_code], scenarios[scenario_code], steps[step_code])
+                step_baseline[key] = (float(median), float(mad), int(count))
+
+        # Nivel escenario: sumar pasos por (ejecución, escenario) y luego agregar entre ejecuciones.
+        # Una ejecución con algún paso fallido u omitido daría una suma parcial: no entra en la línea base
+        run_scenario_ids = run_codes * (len(modules) * scenario_radix) + scenario_ids
+        unique_run_scenarios, inverse = np.unique(run_scenario_ids, return_inverse=True)
+        scenario_durations = np.bincount(inverse, weights=durations)
+        complete = np.bincount(inverse, weights=~passed, minlength=len(unique_run_scenarios)) == 0
+        per_run_scenario = unique_run_scenarios[complete] % (len(modules) * scenario_radix)
+        scenario_baseline = {}
+        if complete.any():
+            for group, median, mad, count in zip(*self._median_mad(per_run_scenario, scenario_durations[complete])):
+                module_code, scenario_code = divmod(int(group), scenario_radix)
+                scenario_baseline[(modules[module_code], scenarios[scenario_code])] = (float(median), float(mad),
+                                                                                        int(count))
+
+        return ({key: value for key, value in step_baseline.items() if value[2] >= self.min_samples},
+                {key: value for key, value in scenario_baseline.items() if value[2] >= self.min_samples})
+
+    def _median_mad(self, group_ids, values):
+        groups, counts, _, (medians,) = grouped_quantiles(group_ids, values, (50,))
+        group_index = np.searchsorted(groups, group_ids)
+        deviations = np.abs(values - medians[group_index])
+        _, _, _, (mads,) = grouped_quantiles(group_ids, deviations, (50,))
+        return groups, medians, mads, counts
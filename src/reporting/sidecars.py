@@ -0,0 +1,56 @@
+import os
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_PATH = Path("reports") / "behave_report.json"
+# Archivos complementarios que escriben los hooks de behave (un worker remoto los envía al coordinador)
+KINDS = ("logs", "com_profile", "rows", "session_health", "credentials", "session_budget")
+
+
+def sidecar_path(report_path, kind):
+    """Ruta del archivo complementario ``<reporte>_<kind>.json`` junto al JSON de behave"""
+    report_path = Path(report_path)
+    return report_path.with_name(f"{report_path.stem}_{kind}.json")
+
+
+def resolve_report_path(context):
+    """Ruta del JSON de behave de la ejecución en curso (``--outfile`` del formatter json)"""
+    try:
+        # behave.ini añade el formatter "pretty": emparejar formatter y salida
+        for formatter, output in zip(context.config.format or [], context.config.outputs):
+            if formatter.startswith("json") and output.name and output.name != "-":
+                return Path(output.name)
+    except AttributeError:
+        pass
+    return DEFAULT_REPORT_PATH
+
+
+def write_sidecar(report_path, kind, data):
+    """Escribe el archivo complementario de forma atómica; retorna su ruta"""
+    path = sidecar_path(report_path, kind)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+    except Exception as e:
+        logger.error(f"Error escribiendo {path}: {e}")
+        return None
+
+
+def load_sidecar(report_path, kind, default=None):
+    """Lee el archivo complementario si existe"""
+    path = sidecar_path(report_path, kind)
+    if not path.exists():
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"No se pudo leer {path}: {e}")
+        return default
@@ -0,0 +1,293 @@
+import os
+import json
+import threading
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columnas (nombre -> dtype) almacenadas como binario plano, una por archivo
+COLUMNS = {
+    'run': np.dtype('<i4'),
+    'module': np.dtype('<i4'),
+    'scenario': np.dtype('<i4'),
+    'step': np.dtype('<i4'),
+    'status': np.dtype('i1'),
+    'duration': np.dtype('<f8'),
+}
+DICTIONARY_COLUMNS = ('run', 'module', 'scenario', 'step')
+STATUS_CODES = {'passed': 0, 'failed': 1, 'skipped': 2}
+STATUS_OTHER = 3
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+STATUS_NAMES[STATUS_OTHER] = 'other'
+
+
+def default_timings_root():
+    from src.config.config import RegressionConfig
+    return Path(RegressionConfig.TIMINGS_DIR)
+
+
+def step_label(step):
+    """Identificador de un paso en el almacén: palabra clave + texto"""
+    return f"{step.get('keyword', '')} {step.get('name', '')}".strip()
+
+
+def grouped_quantiles(group_ids, values, q):
+    """Cuantiles por grupo (interpolación lineal, como ``np.percentile``) sin bucles Python.
+
+    Retorna ``(grupos, conteos, sumas, [array por cada percentil de q])``.
+    """
+    # Ordenar por (grupo, valor): cada grupo queda contiguo y ordenado
+    order = np.lexsort((values, group_ids))
+    sorted_groups = group_ids[order]
+    sorted_values = values[order]
+
+    unique_groups, starts, counts = np.unique(sorted_groups, return_index=True, return_counts=True)
+    sums = np.add.reduceat(sorted_values, starts)
+
+    quantiles = []
+    for percentile in q:
+        position = starts + (percentile / 100.0) * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        weight = position - lower
+        quantiles.append(sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight)
+    return unique_groups, counts, sums, quantiles
+
+
+class StepTimingStore:
+    """Almacén columnar append-only de ejecuciones de pasos.
+
+    Cada fila es (run, module, scenario, step, status, duration). Las columnas
+    de texto se codifican como enteros contra un diccionario y cada columna se
+    guarda en su propio archivo binario, que se lee con ``np.memmap``. El número
+    de filas confirmadas se escribe en ``meta.json`` al final de cada append, de
+    modo que un append interrumpido no deja filas a medias visibles.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or default_timings_root())
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._meta_path = self.root / "meta.json"
+        self._dictionary_path = self.root / "dictionary.json"
+        self._rows, self._dictionary = self._load_meta()
+        self._codes = {column: {value: code for code, value in enumerate(values)}
+                       for column, values in self._dictionary.items()}
+        self._cache = None
+
+    def __len__(self):
+        return self._rows
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def append_test_cases(self, run_id, test_cases, module=None):
+        """Agrega los pasos de escenarios ya parseados por ``HTMLReporter``; retorna filas añadidas"""
+        rows = {column: [] for column in COLUMNS}
+        for case in test_cases:
+            case_module = module or case.get('module') or ''
+            for step in case.get('steps', []):
+                rows['run'].append(run_id)
+                rows['module'].append(case_module)
+                rows['scenario'].append(case.get('name', ''))
+                rows['step'].append(step_label(step))
+                rows['status'].append(STATUS_CODES.get(step.get('status'), STATUS_OTHER))
+                rows['duration'].append(step.get('duration', 0) or 0)
+        return self.append_rows(**rows)
+
+    def append_rows(self, run, module, scenario, step, status, duration):
+        """Agrega filas en bloque (listas de igual longitud)"""
+        count = len(duration)
+        if count == 0:
+            return 0
+
+        with self._lock:
+            # Soltar los memmap antes de escribir (Windows no permite truncar archivos mapeados)
+            self._cache = None
+            columns = {
+                'run': self._encode('run', run),
+                'module': self._encode('module', module),
+                'scenario': self._encode('scenario', scenario),
+                'step': self._encode('step', step),
+                'status': np.asarray(status, dtype=COLUMNS['status']),
+                'duration': np.asarray(duration, dtype=COLUMNS['duration']),
+            }
+            self._write_dictionary()
+
+            for column, dtype in COLUMNS.items():
+                path = self._column_path(column)
+                committed_size = self._rows * dtype.itemsize
+                with open(path, 'ab') as f:
+                    # Descartar restos de un append interrumpido
+                    if f.tell() != committed_size:
+                        f.truncate(committed_size)
+                        f.seek(committed_size)
+                    f.write(columns[column].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self._rows += count
+            self._write_meta()
+        return count
+
+    # ------------------------------------------------------------------
+    # Lectura / agregación
+    # ------------------------------------------------------------------
+    def columns(self):
+        """Columnas confirmadas como arrays (memory-mapped)"""
+        with self._lock:
+            if self._cache is None:
+                self._cache = {}
+                for column, dtype in COLUMNS.items():
+                    path = self._column_path(column)
+                    if self._rows == 0 or not path.exists():
+                        self._cache[column] = np.empty(0, dtype=dtype)
+                    else:
+                        self._cache[column] = np.memmap(path, dtype=dtype, mode='r', shape=(self._rows,))
+            return self._cache
+
+    def values(self, column):
+        """Valores distintos registrados para una columna de texto"""
+        return list(self._dictionary[column])
+
+    def mask(self, run=None, module=None, scenario=None, step=None, status=None, min_duration=None):
+        """Máscara booleana para los filtros dados (valor único o lista de valores)"""
+        columns = self.columns()
+        mask = np.ones(self._rows, dtype=bool)
+        for column, value in (('run', run), ('module', module), ('scenario', scenario), ('step', step)):
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            codes = [self._codes[column][v] for v in values if v in self._codes[column]]
+            mask &= np.isin(columns[column], np.asarray(codes, dtype=COLUMNS[column]))
+        if status is not None:
+            statuses = status if isinstance(status, (list, tuple, set)) else [status]
+            mask &= np.isin(columns['status'], [STATUS_CODES.get(s, STATUS_OTHER) for s in statuses])
+        if min_duration is not None:
+            mask &= columns['duration'] >= min_duration
+        return mask
+
+    def percentiles(self, by='step', q=(50, 95, 99), **filters):
+        """Percentiles de duración por grupo, calculados de forma vectorizada.
+
+        ``by`` es una columna o tupla de columnas (``'step'``, ``('module', 'step')``).
+        Retorna una lista de dicts con la clave del grupo, ``count``, ``mean`` y ``p<q>``.
+        """
+        group_columns = (by,) if isinstance(by, str) else tuple(by)
+        columns = self.columns()
+        mask = self.mask(**filters)
+        durations = np.asarray(columns['duration'][mask])
+        if durations.size == 0:
+            return []
+
+        group_ids, group_keys = self.group_ids(group_columns, mask)
+        unique_groups, counts, sums, quantiles = grouped_quantiles(group_ids, durations, q)
+        stats = {'count': counts, 'mean': sums / counts}
+        stats.update({f"p{percentile:g}": values for percentile, values in zip(q, quantiles)})
+
+        results = []
+        for index, group in enumerate(unique_groups):
+            row = dict(zip(group_columns, group_keys(group)))
+            row['count'] = int(stats['count'][index])
+            row['mean'] = round(float(stats['mean'][index]), 6)
+            for percentile in q:
+                row[f"p{percentile:g}"] = round(float(stats[f"p{percentile:g}"][index]), 6)
+            results.append(row)
+        return results
+
+    def summary(self, by='module', **filters):
+        """Conteos por estado y duración total por grupo"""
+        group_columns = (by,) if isinstance(by, str) else tuple(by)
+        columns = self.columns()
+        mask = self.mask(**filters)
+        if not mask.any():
+            return []
+
+        group_ids, group_keys = self.group_ids(group_columns, mask)
+        unique_groups, inverse = np.unique(group_ids, return_inverse=True)
+        statuses = np.asarray(columns['status'][mask])
+        durations = np.asarray(columns['duration'][mask])
+        totals = np.bincount(inverse, weights=durations, minlength=len(unique_groups))
+
+        results = []
+        status_counts = {name: np.bincount(inverse[statuses == code], minlength=len(unique_groups))
+                         for code, name in STATUS_NAMES.items()}
+        for index, group in enumerate(unique_groups):
+            row = dict(zip(group_columns, group_keys(group)))
+            row.update({name: int(counts[index]) for name, counts in status_counts.items()})
+            row['total_duration'] = round(float(totals[index]), 6)
+            results.append(row)
+        return results
+
+    def group_ids(self, group_columns, mask):
+        """Combina las columnas de agrupación en un único id entero por fila.
+
+        Retorna ``(ids, group_keys)``; ``group_keys(id)`` devuelve los valores de texto del grupo.
+        """
+        columns = self.columns()
+        group_ids = np.zeros(int(mask.sum()), dtype=np.int64)
+        radixes = []
+        for column in group_columns:
+            radix = max(len(self._dictionary[column]), 1)
+            group_ids = group_ids * radix + np.asarray(columns[column][mask], dtype=np.int64)
+            radixes.append(radix)
+
+        def group_keys(group_id):
+            keys = []
+            for column, radix in zip(reversed(group_columns), reversed(radixes)):
+                group_id, code = divmod(int(group_id), radix)
+                keys.append(self._dictionary[column][code])
+            return list(reversed(keys))
+
+        return group_ids, group_keys
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def _encode(self, column, values):
+        codes = self._codes[column]
+        dictionary = self._dictionary[column]
+        encoded = np.empty(len(values), dtype=COLUMNS[column])
+        for index, value in enumerate(values):
+            value = str(value)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            encoded[index] = code
+        return encoded
+
+    def _column_path(self, column):
+        return self.root / f"{column}.{COLUMNS[column].str.lstrip('<|')}"
+
+    def _load_meta(self):
+        rows = 0
+        dictionary = {column: [] for column in DICTIONARY_COLUMNS}
+        try:
+            if self._meta_path.exists():
+                with open(self._meta_path, 'r', encoding='utf-8') as f:
+                    rows = json.load(f).get('rows', 0)
+            if self._dictionary_path.exists():
+                with open(self._dictionary_path, 'r', encoding='utf-8') as f:
+                    dictionary.update(json.load(f))
+        except Exception as e:
+            logger.error(f"Error leyendo almacén de tiempos {self.root}: {e}")
+        return rows, dictionary
+
+    def _write_dictionary(self):
+        self._atomic_json(self._dictionary_path, self._dictionary)
+
+    def _write_meta(self):
+        self._atomic_json(self._meta_path, {
+            'rows': self._rows,
+            'columns': {column: dtype.str for column, dtype in COLUMNS.items()}
+        })
+
+    def _atomic_json(self, path, data):
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
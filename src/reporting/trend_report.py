@@ -0,0 +1,280 @@
+import os
+import html
+import json
+import datetime
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "trend_index.json"
+ANALYSIS_PATTERN = "*_analysis.json"
+SLOWEST_STEPS_PER_RUN = 10
+
+
+class TrendIndex:
+    """Índice incremental de los ``*_analysis.json`` consolidados.
+
+    Solo guarda agregados por ejecución (totales, duración, pasos más lentos y
+    escenarios fallidos). Un archivo ya indexado con el mismo tamaño y mtime no
+    se vuelve a leer, así que re-indexar cuesta en proporción a los archivos nuevos.
+    """
+
+    def __init__(self, consolidated_dir="reports/consolidated"):
+        self.consolidated_dir = Path(consolidated_dir)
+        self.index_path = self.consolidated_dir / INDEX_FILENAME
+        self.entries = self._load()
+
+    def update(self):
+        """Indexa los archivos nuevos o modificados; retorna cuántos se procesaron"""
+        processed = 0
+        seen = set()
+        for path in self.consolidated_dir.glob(ANALYSIS_PATTERN):
+            seen.add(path.name)
+            stat = path.stat()
+            known = self.entries.get(path.name)
+            if known and known['mtime'] == stat.st_mtime and known['size'] == stat.st_size:
+                continue
+
+            aggregates = self._aggregate(path)
+            if aggregates is None:
+                continue
+            self.entries[path.name] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'aggregates': aggregates}
+            processed += 1
+
+        # Archivos borrados del histórico
+        removed = [name for name in self.entries if name not in seen]
+        for name in removed:
+            del self.entries[name]
+
+        if processed or removed:
+            self._save()
+        logger.info(f"📈 Índice de tendencias: {processed} archivos nuevos, {len(self.entries)} ejecuciones")
+        return processed
+
+    def runs(self):
+        """Agregados por ejecución en orden cronológico"""
+        runs = [entry['aggregates'] for entry in self.entries.values()]
+        return sorted(runs, key=lambda run: run['generation_time'])
+
+    def _aggregate(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"No se pudo indexar {path}: {e}")
+            return None
+
+        total = data.get('total', 0)
+        aggregates = {
+            'file': path.name,
+            'generation_time': data.get('generation_time', ''),
+            'total': total,
+            'passed': data.get('passed', 0),
+            'failed': data.get('failed', 0),
+            'skipped': data.get('skipped', 0),
+            'pass_rate': round(data.get('passed', 0) / total * 100, 2) if total else 0,
+            'total_duration': data.get('total_duration', 0),
+            'slowest_steps': [],
+            'failed_scenarios': []
+        }
+
+        if 'test_cases' in data:
+            # Formato antiguo: el detalle está en el propio archivo
+            test_cases = data['test_cases']
+        else:
+            # Formato fragmentado: leer el detalle de cada módulo (una sola vez por archivo)
+            test_cases = []
+            for module in data.get('modules', []):
+                detail_path = path.parent / module.get('detail', '')
+                try:
+                    with open(detail_path, 'r', encoding='utf-8') as f:
+                        test_cases.extend(json.load(f).get('test_cases', []))
+                except Exception as e:
+                    logger.warning(f"Detalle de módulo no disponible ({detail_path}): {e}")
+
+        steps = []
+        for case in test_cases:
+            scenario = f"{case.get('module') or ''}::{case.get('name', '')}".lstrip(':')
+            if case.get('status') == 'failed':
+                aggregates['failed_scenarios'].append(scenario)
+            for step in case.get('steps', []):
+                steps.append((step.get('duration', 0), scenario, f"{step.get('keyword', '')} {step.get('name', '')}".strip()))
+
+        steps.sort(key=lambda item: item[0], reverse=True)
+        aggregates['slowest_steps'] = [
+            {'duration': duration, 'scenario': scenario, 'step': step}
+            for duration, scenario, step in steps[:SLOWEST_STEPS_PER_RUN]
+        ]
+        return aggregates
+
+    def _load(self):
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('files', {})
+        except Exception as e:
+            logger.warning(f"Índice de tendencias corrupto, se reconstruye: {e}")
+            return {}
+
+    def _save(self):
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+
+class TrendReporter:
+    """Genera la página HTML de tendencias a partir del ``TrendIndex``"""
+
+    def __init__(self, consolidated_dir="reports/consolidated", window=None):
+        self.index = TrendIndex(consolidated_dir)
+        self.window = window
+
+    def generate(self, output_path=None):
+        """Actualiza el índice y escribe ``sap_trend_report.html``; retorna su ruta"""
+        self.index.update()
+        runs = self.index.runs()
+        if self.window:
+            runs = runs[-self.window:]
+
+        output_path = Path(output_path or self.index.consolidated_dir / "sap_trend_report.html")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(self._generate_html(runs))
+        logger.info(f"📈 Reporte de tendencias generado: {output_path} ({len(runs)} ejecuciones)")
+        return str(output_path)
+
+    def flakiness(self, runs):
+        """Escenarios que alternan entre fallo y éxito dentro de la ventana.
+
+        Un escenario ausente de la lista de fallidos de una ejecución cuenta como
+        no fallido en ella; ``flips`` es el número de cambios de estado.
+        """
+        history = {}
+        for index, run in enumerate(runs):
+            for scenario in run['failed_scenarios']:
+                history.setdefault(scenario, set()).add(index)
+
+        flaky = []
+        for scenario, failed_runs in history.items():
+            if len(failed_runs) == len(runs):
+                continue  # Falla siempre: roto, no inestable
+            states = [index in failed_runs for index in range(len(runs))]
+            flips = sum(1 for before, after in zip(states, states[1:]) if before != after)
+            flaky.append({'scenario': scenario, 'failures': len(failed_runs), 'runs': len(runs), 'flips': flips})
+        return sorted(flaky, key=lambda item: (item['flips'], item['failures']), reverse=True)
+
+    def slowest_steps(self, runs, limit=15):
+        """Pasos más lentos del histórico (peor y media de sus apariciones en el top)"""
+        steps = {}
+        for run in runs:
+            for step in run['slowest_steps']:
+                key = (step['scenario'], step['step'])
+                steps.setdefault(key, []).append(step['duration'])
+
+        ranking = [{
+            'scenario': scenario,
+            'step': step,
+            'max': round(max(durations), 3),
+            'mean': round(sum(durations) / len(durations), 3),
+            'appearances': len(durations)
+        } for (scenario, step), durations in steps.items()]
+        return sorted(ranking, key=lambda item: item['max'], reverse=True)[:limit]
+
+    def _generate_html(self, runs):
+        flaky = self.flakiness(runs)
+        slowest = self.slowest_steps(runs)
+        labels = [run['generation_time'] for run in runs]
+
+        flaky_rows = "".join(f"""
+            <tr><td>{html.escape(item['scenario'])}</td><td>{item['failures']}/{item['runs']}</td><td>{item['flips']}</td></tr>"""
+                             for item in flaky) or '<tr><td colspan="3">Sin escenarios inestables</td></tr>'
+        slowest_rows = "".join(f"""
+            <tr><td>{html.escape(item['scenario'])}</td><td>{html.escape(item['step'])}</td><td>{item['max']}s</td><td>{item['mean']}s</td><td>{item['appearances']}</td></tr>"""
+                               for item in slowest) or '<tr><td colspan="5">Sin datos</td></tr>'
+        run_rows = "".join(f"""
+            <tr><td>{html.escape(run['generation_time'])}</td><td>{run['total']}</td><td>{run['passed']}</td><td>{run['failed']}</td><td>{run['pass_rate']}%</td><td>{run['total_duration']}s</td></tr>"""
+                           for run in reversed(runs))
+
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>Tendencias SAP Automation</title>
+    <meta charset="UTF-8">
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f8f9fa; }}
+        .header {{ background: linear-gradient(135deg, #0078D7, #005A9E); color: white; padding: 30px; border-radius: 10px; margin-bottom: 20px; }}
+        .summary {{ background: white; padding: 20px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin-bottom: 20px; }}
+        table {{ width: 100%; border-collapse: collapse; }}
+        th, td {{ padding: 8px 12px; border-bottom: 1px solid #e9ecef; text-align: left; }}
+        th {{ background: #f0f4f8; }}
+        svg {{ background: #fdfdfd; border: 1px solid #e9ecef; border-radius: 5px; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>📈 Tendencias SAP Automation</h1>
+        <p>📅 Generado: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p>🗂️ Ejecuciones analizadas: <strong>{len(runs)}</strong>{f" ({html.escape(labels[0])} → {html.escape(labels[-1])})" if labels else ""}</p>
+    </div>
+
+    <div class="summary">
+        <h2>✅ Tasa de Éxito (%)</h2>
+        {self._line_chart([run['pass_rate'] for run in runs], labels, '#28a745', max_value=100)}
+    </div>
+
+    <div class="summary">
+        <h2>⏱️ Duración Total (s)</h2>
+        {self._line_chart([run['total_duration'] for run in runs], labels, '#6f42c1')}
+    </div>
+
+    <div class="summary">
+        <h2>🐢 Pasos Más Lentos</h2>
+        <table>
+            <tr><th>Escenario</th><th>Paso</th><th>Peor</th><th>Media</th><th>Apariciones</th></tr>
+            {slowest_rows}
+        </table>
+    </div>
+
+    <div class="summary">
+        <h2>🎲 Escenarios Inestables</h2>
+        <table>
+            <tr><th>Escenario</th><th>Fallos</th><th>Cambios de estado</th></tr>
+            {flaky_rows}
+        </table>
+    </div>
+
+    <div class="summary">
+        <h2>🗂️ Ejecuciones</h2>
+        <table>
+            <tr><th>Fecha</th><th>Total</th><th>✅</th><th>❌</th><th>Tasa</th><th>Duración</th></tr>
+            {run_rows}
+        </table>
+    </div>
+</body>
+</html>"""
+
+    def _line_chart(self, values, labels, color, max_value=None, width=900, height=220):
+        """Gráfico de línea en SVG embebido (sin dependencias de JavaScript)"""
+        if not values:
+            return "<p>Sin datos</p>"
+
+        padding = 30
+        top = max_value if max_value is not None else (max(values) or 1)
+        step_x = (width - 2 * padding) / max(len(values) - 1, 1)
+        points = []
+        for index, value in enumerate(values):
+            x = padding + index * step_x
+            y = height - padding - (value / top) * (height - 2 * padding)
+            points.append((x, y, value, labels[index]))
+
+        polyline = " ".join(f"{x:.1f},{y:.1f}" for x, y, _, _ in points)
+        circles = "".join(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{color}"><title>{html.escape(label)}: {value}</title></circle>'
+                          for x, y, value, label in points)
+        return f"""<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+            <text x="4" y="{padding}" font-size="11" fill="#666">{top}</text>
+            <text x="4" y="{height - padding}" font-size="11" fill="#666">0</text>
+            <polyline fill="none" stroke="{color}" stroke-width="2" points="{polyline}"/>
+            {circles}
+        </svg>"""
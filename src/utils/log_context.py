@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from datetime import datetime, timezone
+
+# Campos de correlación que se agregan a cada registro
+CORRELATION_FIELDS = ('run_id', 'module', 'feature', 'scenario', 'step', 'row', 'session')
+
+_context = contextvars.ContextVar('sap_log_context', default={})
+
+
+def get_run_id():
+    """ID de la ejecución; se publica en ``SAP_RUN_ID`` para que los subprocesos lo hereden"""
+    run_id = os.getenv("SAP_RUN_ID")
+    if not run_id:
+        run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        os.environ["SAP_RUN_ID"] = run_id
+    return run_id
+
+
+def bind(**fields):
+    """Agrega campos de correlación al contexto actual (``None`` los elimina)"""
+    context = dict(_context.get())
+    for name, value in fields.items():
+        if value is None:
+            context.pop(name, None)
+        else:
+            context[name] = value
+    _context.set(context)
+
+
+def current():
+    """Copia del contexto de correlación vigente"""
+    return dict(_context.get())
+
+
+def value(name, default=None):
+    """Valor de un campo del contexto de correlación vigente"""
+    return _context.get().get(name, default)
+
+
+class CorrelationFilter(logging.Filter):
+    """Copia run/módulo/escenario/paso/sesión del contexto a ``record.correlation``.
+
+    Se instala en el ``QueueHandler`` para ejecutarse en el hilo que loguea,
+    antes de que el registro cruce al hilo de escritura.
+    """
+
+    def filter(self, record):
+        # Un solo atributo: ``record.module`` ya es el módulo Python de origen
+        context = _context.get()
+        correlation = {field: context.get(field) for field in CORRELATION_FIELDS}
+        correlation['run_id'] = correlation['run_id'] or get_run_id()
+        correlation['module'] = correlation['module'] or os.getenv("SAP_MODULE")
+        record.correlation = correlation
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Limita por ventana de tiempo los registros de categorías ruidosas.
+
+    Las reglas (``LOG_SAMPLING``) tienen la forma ``prefijo=max/segundos`` separadas
+    por comas y solo aplican por debajo de WARNING. El primer registro que pasa
+    tras una ventana saturada lleva ``suppressed`` con cuántos se descartaron.
+    """
+
+    def __init__(self, rules=None):
+        super().__init__()
+        self.rules = rules or {}
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        rules = {}
+        from src.config.config import LoggingConfig
+        for rule in LoggingConfig.SAMPLING.split(','):
+            if '=' not in rule:
+                continue
+            prefix, limit = rule.split('=', 1)
+            try:
+                count, seconds = limit.split('/', 1)
+                rules[prefix.strip()] = (int(count), float(seconds))
+            except ValueError:
+                continue
+        return cls(rules)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rules:
+            return True
+
+        prefix = self._match(record.name)
+        if prefix is None:
+            return True
+
+        limit, seconds = self.rules[prefix]
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(prefix)
+            if window is None or now - window[0] >= seconds:
+                suppressed = window[2] if window else 0
+                window = self._windows[prefix] = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if window[1] >= limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+        return True
+
+    def _match(self, name):
+        for prefix in self.rules:
+            if name == prefix or name.startswith(prefix + '.'):
+                return prefix
+        return None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objeto JSON por línea con los campos de correlación"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        entry.update(getattr(record, 'correlation', None) or dict.fromkeys(CORRELATION_FIELDS))
+        if getattr(record, 'suppressed', None):
+            entry['suppressed'] = record.suppressed
+        # Tras el QueueHandler el traceback llega ya formateado en exc_text (exc_info es None)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
@@ -1,27 +1,169 @@
+import copy
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from datetime import datetime
 
-def setup_logger(name=__name__, log_level=None):
-    log_level = log_level or os.getenv("LOG_LEVEL", "INFO")
-    log_dir = os.getenv("LOG_DIR", "logs")
+from src.utils.log_context import CorrelationFilter, JsonLinesFormatter, SamplingFilter
 
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Estado del pipeline: un único QueueHandler en el logger raíz y un QueueListener
+# que escribe en archivo/consola desde su propio hilo
+_lock = threading.Lock()
+_queue = None
+_queue_handler = None
+_listener = None
+_output_handlers = []
+_atexit_registered = False
+
+
+class CorrelatedQueueHandler(logging.handlers.QueueHandler):
+    """``QueueHandler`` que no mezcla el traceback con el mensaje.
+
+    ``QueueHandler.prepare`` formatea el registro (mensaje + traceback) y borra
+    ``exc_info``: el formatter JSON ya no podría separar el campo ``exception``. Aquí
+    el traceback se formatea en el hilo que loguea y viaja en ``exc_text``; los
+    formatters del listener lo agregan ellos mismos.
+    """
+
+    def prepare(self, record):
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
 
-    logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, log_level.upper()))
 
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+def _build_file_handler(log_dir):
+    """Handler de archivo con rotación por tamaño (por defecto) o por tiempo (``LOG_ROTATION=time``)"""
+    from src.config.config import LoggingConfig
+    rotation = LoggingConfig.ROTATION
+    backup_count = LoggingConfig.BACKUP_COUNT
+
+    if rotation == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            os.path.join(log_dir, "sap_automation.log"),
+            when=LoggingConfig.ROTATION_WHEN,
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
 
     log_file = os.path.join(log_dir, f"sap_automation_{datetime.now().strftime('%Y%m%d')}.log")
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setFormatter(formatter)
+    if rotation == "none":
+        return logging.FileHandler(log_file, encoding='utf-8')
+    return logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=LoggingConfig.MAX_BYTES,
+        backupCount=backup_count,
+        encoding='utf-8'
+    )
+
+
+def _start_listener():
+    global _queue, _listener
+    _queue = queue.Queue(-1)  # Sin límite: el hilo que loguea nunca se bloquea
+    _queue_handler.queue = _queue
+    _listener = logging.handlers.QueueListener(_queue, *_output_handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def configure_logging(log_level=None):
+    """Configura (una sola vez por proceso) el pipeline asíncrono de logging.
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+    Los registros se encolan en el hilo que loguea y el ``QueueListener`` los
+    escribe en archivo y consola en segundo plano. Llamadas posteriores solo
+    ajustan el nivel del logger raíz si se indica ``log_level``.
+    """
+    global _queue_handler, _atexit_registered
+    with _lock:
+        root = logging.getLogger()
+        if _listener is not None:
+            if log_level:
+                root.setLevel(getattr(logging, log_level.upper()))
+            return root
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+        from src.config.config import LoggingConfig
+        log_level = log_level or LoggingConfig.LEVEL
+        log_dir = LoggingConfig.DIR
+        os.makedirs(log_dir, exist_ok=True)
 
+        # LOG_FORMAT=json: una línea JSON por registro con run/módulo/escenario/paso/sesión
+        if LoggingConfig.FORMAT == "json":
+            formatter = JsonLinesFormatter()
+        else:
+            formatter = logging.Formatter(TEXT_FORMAT)
+        file_handler = _build_file_handler(log_dir)
+        file_handler.setFormatter(formatter)
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        _output_handlers[:] = [file_handler, console_handler]
+
+        _queue_handler = CorrelatedQueueHandler(None)
+        # Filtros en el hilo que loguea: primero el muestreo, luego la correlación
+        _queue_handler.addFilter(SamplingFilter.from_env())
+        _queue_handler.addFilter(CorrelationFilter())
+        _start_listener()
+        root.addHandler(_queue_handler)
+        root.setLevel(getattr(logging, log_level.upper()))
+
+        if not _atexit_registered:
+            atexit.register(shutdown_logging)
+            _atexit_registered = True
+        return root
+
+
+def shutdown_logging():
+    """Vacía la cola, detiene el hilo de escritura y retira el ``QueueHandler`` del logger raíz.
+
+    Un ``configure_logging`` posterior arma el pipeline desde cero: sin el handler
+    retirado habría dos ``QueueHandler`` y cada línea se escribiría dos veces.
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        # Primero retirar el handler: nada más se encola en una cola que ya nadie vacía
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+        _listener.stop()
+        _listener = None
+        for handler in _output_handlers:
+            handler.flush()
+            handler.close()
+        _output_handlers.clear()
+
+
+def _reinit_after_fork():
+    # El hilo del listener no sobrevive a un fork: el hijo arranca cola y listener propios
+    global _lock
+    _lock = threading.Lock()
+    if _listener is not None:
+        _start_listener()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+def setup_logger(name=__name__, log_level=None):
+    """Retorna el logger ``name``; es idempotente y no agrega handlers propios"""
+    configure_logging()
+
+    logger = logging.getLogger(name)
+    if log_level is None:
+        from src.config.config import LoggingConfig
+        log_level = LoggingConfig.LEVEL
+    logger.setLevel(getattr(logging, log_level.upper()))
     return logger
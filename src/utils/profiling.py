@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import pstats
+import cProfile
+import logging
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 64
+# Subárboles con menos de esta fracción del tiempo total no se expanden (evita explosión de rutas)
+MIN_FRACTION = 0.0005
+
+# Perfilador cProfile en curso (se pausa mientras se analiza el snapshot de tracemalloc)
+_active_profiler = None
+
+
+def profile_dir(base_dir):
+    """Directorio ``profile`` junto a los reportes (se crea si no existe)"""
+    path = Path(base_dir) / "profile"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def profile_name(prefix):
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+def cprofile_command(cmd, prof_path):
+    """Antepone ``-m cProfile -o`` a un comando ``[python, -m, modulo, ...]`` o ``[python, script, ...]``"""
+    return [cmd[0], "-m", "cProfile", "-o", str(prof_path)] + list(cmd[1:])
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name  # Funciones built-in: '<built-in method ...>'
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def write_collapsed(prof_path, collapsed_path=None):
+    """Convierte estadísticas de cProfile a pilas colapsadas (``a;b;c microsegundos``).
+
+    cProfile solo guarda aristas llamador→llamado, así que las pilas se
+    reconstruyen desde las raíces repartiendo el tiempo de cada función entre
+    sus llamadores en proporción al tiempo acumulado de cada arista.
+    """
+    collapsed_path = Path(collapsed_path or Path(prof_path).with_suffix('.collapsed'))
+    stats = pstats.Stats(str(prof_path)).stats
+
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge))
+
+    # Raíces: funciones sin llamadores más la de mayor tiempo acumulado (con ``-m`` el
+    # punto de entrada cuelga de un ciclo exec → runpy → exec y no queda sin llamadores)
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    outermost = max(stats, key=lambda func: stats[func][3], default=None)
+    if outermost is not None and outermost not in roots:
+        roots.append(outermost)
+    min_time = sum(stats[root][3] for root in roots) * MIN_FRACTION
+    lines = {}
+
+    def walk(func, path, scale):
+        _, _, total_time, cumulative_time, _ = stats[func]
+        path = path + (_label(func),)
+        if cumulative_time * scale < min_time or len(path) >= MAX_STACK_DEPTH:
+            # Se acumula todo el subárbol en este marco
+            self_us = int(cumulative_time * scale * 1e6)
+        else:
+            self_us = int(total_time * scale * 1e6)
+            for callee, (_, _, _, edge_cumulative) in callees.get(func, []):
+                if _label(callee) in path:
+                    continue  # Recursión: se corta para no duplicar tiempo
+                callee_cumulative = stats[callee][3]
+                if callee_cumulative:
+                    walk(callee, path, scale * edge_cumulative / callee_cumulative)
+        if self_us > 0:
+            key = ";".join(path)
+            lines[key] = lines.get(key, 0) + self_us
+
+    for root in roots:
+        walk(root, (), 1.0)
+
+    with open(collapsed_path, 'w', encoding='utf-8') as f:
+        for stack, value in sorted(lines.items()):
+            f.write(f"{stack} {value}\n")
+    return collapsed_path
+
+
+def profile_call(func, output_dir, name, *args, **kwargs):
+    """Ejecuta ``func`` bajo cProfile; escribe ``<name>.prof`` y ``<name>.collapsed``"""
+    global _active_profiler
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    _active_profiler = profiler
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        _active_profiler = None
+        prof_path = output_dir / f"{name}.prof"
+        profiler.dump_stats(str(prof_path))
+        collapsed_path = write_collapsed(prof_path)
+        print(f"🔬 Perfil CPU: {collapsed_path}")
+
+
+def trace_allocations(func, output_dir, name, *args, top=25, frames=10, **kwargs):
+    """Ejecuta ``func`` con tracemalloc; escribe pico/top de asignaciones y pilas colapsadas en bytes"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(frames)
+    tracemalloc.reset_peak()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler = _active_profiler
+        if profiler:
+            profiler.disable()  # El análisis del snapshot no es parte de lo medido
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if not already_tracing:
+            tracemalloc.stop()
+
+        top_allocations = [{
+            'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count
+        } for stat in snapshot.statistics('lineno')[:top]]
+        summary = {
+            'name': name,
+            'peak_mb': round(peak / 1024 / 1024, 2),
+            'current_mb': round(current / 1024 / 1024, 2),
+            'top_allocations': top_allocations
+        }
+        with open(output_dir / f"{name}_memory.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        # Pilas de asignación (raíz → hoja) con bytes vivos, para flame graphs de memoria
+        labels = {}
+        with open(output_dir / f"{name}_memory.collapsed", 'w', encoding='utf-8') as f:
+            for stat in snapshot.statistics('traceback'):
+                stack = []
+                for frame in reversed(stat.traceback):
+                    label = labels.get(frame)
+                    if label is None:
+                        label = labels[frame] = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                    stack.append(label)
+                f.write(f"{';'.join(stack)} {stat.size}\n")
+        print(f"🧠 Memoria ({name}): pico {summary['peak_mb']} MB → {output_dir / f'{name}_memory.json'}")
+        if profiler:
+            profiler.enable()
+
+
+def convert_worker_profile(prof_path):
+    """Convierte el ``.prof`` de un worker behave (si existe) a pilas colapsadas"""
+    if not os.path.exists(prof_path):
+        logger.warning(f"Perfil de worker no encontrado: {prof_path}")
+        return None
+    try:
+        collapsed_path = write_collapsed(prof_path)
+        print(f"🔬 Perfil worker: {collapsed_path}")
+        return collapsed_path
+    except Exception as e:
+        print(f"⚠️  No se pudo convertir el perfil {prof_path}: {e}", file=sys.stderr)
+        return None
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import random
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Un mutex (directorio) más viejo que esto quedó de un proceso que murió mientras lo tenía
+MUTEX_STALE_SECONDS = 30
+
+
+class SharedTable:
+    """Tabla JSON compartida entre procesos (y hosts, en una unidad de red).
+
+    Cada lectura-escritura se hace bajo un mutex: ``os.mkdir`` es atómico también en
+    Windows y en unidades de red. La escritura reemplaza el archivo de forma atómica.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.mutex_path = self.path.with_suffix('.lock')
+
+    @contextmanager
+    def locked(self):
+        """Diccionario de la tabla; lo que quede en él al salir se persiste"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._acquire_mutex()
+        try:
+            table = self._read()
+            yield table
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(table, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        finally:
+            try:
+                os.rmdir(self.mutex_path)
+            except OSError:
+                pass
+
+    def _acquire_mutex(self):
+        while True:
+            try:
+                os.mkdir(self.mutex_path)
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - self.mutex_path.stat().st_mtime > MUTEX_STALE_SECONDS:
+                        logger.warning(f"⚠️ Mutex abandonado, se elimina: {self.mutex_path}")
+                        os.rmdir(self.mutex_path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(random.uniform(0.005, 0.05))
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Tabla compartida ilegible {self.path}: {e}")
+            return {}
+
+
+def pid_alive(pid):
+    """True si el proceso ``pid`` de este host sigue vivo"""
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # os.kill en Windows termina el proceso: se consulta el código de salida
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,85 @@
+import logging
+import threading
+from collections import deque
+
+from src.utils import log_context
+
+
+class StepLogHandler(logging.Handler):
+    """Handler que etiqueta cada registro con feature/escenario/paso en curso.
+
+    Mantiene un buffer circular acotado por paso (``capacity`` registros); los
+    registros emitidos fuera de un paso quedan bajo la clave del escenario.
+    Los IDs viven en el contexto de correlación (``log_context``) del hilo de los
+    hooks: los registros de hilos de fondo (capturas, aprovisionamiento, sondeos)
+    no se atribuyen al paso que esté corriendo.
+    """
+
+    def __init__(self, capacity=None, level=logging.NOTSET):
+        super().__init__(level)
+        if capacity is None:
+            from src.config.config import LoggingConfig
+            capacity = LoggingConfig.STEP_LOG_CAPACITY
+        self.capacity = capacity
+        self._buffers = {}
+        self._buffers_lock = threading.Lock()
+
+    @classmethod
+    def install(cls, capacity=None):
+        """Instala el handler en el logger raíz, antes del resto de handlers"""
+        handler = cls(capacity)
+        root = logging.getLogger()
+        # Primero en la lista para que los demás handlers ya vean las etiquetas
+        root.handlers.insert(0, handler)
+        return handler
+
+    def uninstall(self):
+        logging.getLogger().removeHandler(self)
+
+    def set_context(self, feature=None, scenario=None, step=None):
+        """Actualiza los IDs de correlación del hilo actual (``None`` limpia el nivel)"""
+        log_context.bind(feature_id=feature, scenario_id=scenario, step_id=step)
+
+    @property
+    def feature_id(self):
+        return log_context.value('feature_id')
+
+    @property
+    def scenario_id(self):
+        return log_context.value('scenario_id')
+
+    @property
+    def step_id(self):
+        return log_context.value('step_id')
+
+    def emit(self, record):
+        context = log_context.current()
+        record.feature_id = context.get('feature_id')
+        record.scenario_id = context.get('scenario_id')
+        record.step_id = context.get('step_id')
+
+        key = record.step_id or record.scenario_id
+        if key is None:
+            return
+
+        try:
+            entry = {
+                'time': record.created,
+                'level': record.levelname,
+                'logger': record.name,
+                'message': record.getMessage()
+            }
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._buffers_lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = deque(maxlen=self.capacity)
+            buffer.append(entry)
+
+    def records(self):
+        """Copia de los buffers: ``{step_id: [registros]}``"""
+        with self._buffers_lock:
+            return {key: list(buffer) for key, buffer in self._buffers.items()}
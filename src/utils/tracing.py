@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def tracing_enabled():
+    from src.config.config import TracingConfig
+    return TracingConfig.ENABLED
+
+
+def default_trace_dir():
+    from src.config.config import TracingConfig
+    return Path(TracingConfig.DIR)
+
+
+def get_tracer(process_name=None):
+    """Tracer del proceso (se crea en el primer uso); ``None`` si ``SAP_TRACE`` no está activo"""
+    global _tracer
+    if _tracer is None and tracing_enabled():
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(process_name or Path(sys.argv[0]).stem or "python")
+                atexit.register(_tracer.write)
+    return _tracer
+
+
+def span(name, category="framework", **args):
+    """Span del tracer del proceso; sin tracing es un contexto vacío"""
+    tracer = get_tracer()
+    return tracer.span(name, category, **args) if tracer else nullcontext()
+
+
+class Tracer:
+    """Registra spans con ``perf_counter_ns`` y los exporta como Chrome trace-event JSON.
+
+    Los timestamps se anclan al reloj de pared al crear el tracer, de modo que
+    las trazas de distintos procesos (runner, behave por módulo) se pueden
+    fusionar en una sola línea de tiempo (Perfetto / chrome://tracing).
+    """
+
+    def __init__(self, process_name, trace_dir=None, run_id=None):
+        from src.utils.log_context import get_run_id
+
+        self.process_name = process_name
+        self.run_id = run_id or get_run_id()
+        self.trace_dir = Path(trace_dir or default_trace_dir()) / self.run_id
+        self.pid = os.getpid()
+        self._anchor_wall_ns = time.time_ns()
+        self._anchor_perf_ns = time.perf_counter_ns()
+        self._events = []
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def _timestamp_us(self, perf_ns):
+        return (self._anchor_wall_ns + (perf_ns - self._anchor_perf_ns)) / 1000.0
+
+    def complete(self, name, category, start_ns, duration_ns, args=None):
+        """Agrega un span ya medido (``start_ns`` en ``perf_counter_ns``)"""
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': self._timestamp_us(start_ns),
+            'dur': duration_ns / 1000.0,
+            'pid': self.pid,
+            'tid': threading.get_ident()
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name, category="framework", **args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, time.perf_counter_ns() - start, args)
+
+    def begin(self, key, name, category="framework", **args):
+        """Abre un span que se cierra en otro punto (p. ej. ``before_step``/``after_step``)"""
+        self._open[key] = (name, category, args, time.perf_counter_ns())
+
+    def end(self, key, **args):
+        opened = self._open.pop(key, None)
+        if opened is None:
+            return
+        name, category, begin_args, start = opened
+        begin_args.update(args)
+        self.complete(name, category, start, time.perf_counter_ns() - start, begin_args)
+
+    def instant(self, name, category="framework", **args):
+        with self._lock:
+            self._events.append({'name': name, 'cat': category, 'ph': 'i', 's': 't',
+                                 'ts': self._timestamp_us(time.perf_counter_ns()),
+                                 'pid': self.pid, 'tid': threading.get_ident(), 'args': args})
+
+    def write(self, path=None):
+        """Escribe la traza de este proceso; retorna su ruta"""
+        # Spans que quedaron abiertos (p. ej. por una excepción) se cierran aquí
+        for key in list(self._open):
+            self.end(key, unfinished=True)
+
+        path = Path(path or self.trace_dir / f"{self.process_name}_{self.pid}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = list(self._events)
+        events.extend(self._metadata_events())
+
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        os.replace(tmp_path, path)
+        logger.info(f"🧭 Traza escrita: {path} ({len(events)} eventos)")
+        return path
+
+    def _metadata_events(self):
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0,
+                   'args': {'name': f"{self.process_name} ({self.pid})"}}]
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for tid in {event['tid'] for event in self._events}:
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                           'args': {'name': names.get(tid, str(tid))}})
+        return events
+
+
+def merge_traces(trace_dir, output_path=None):
+    """Fusiona las trazas por proceso de una ejecución en un único archivo"""
+    trace_dir = Path(trace_dir)
+    output_path = Path(output_path or trace_dir.with_suffix('.trace.json'))
+    events = []
+    for path in sorted(trace_dir.glob("*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                events.extend(json.load(f).get('traceEvents', []))
+        except Exception as e:
+            logger.warning(f"Traza ilegible {path}: {e}")
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    logger.info(f"🧭 Traza consolidada: {output_path} ({len(events)} eventos)")
+    return output_path
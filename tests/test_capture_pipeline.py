@@ -0,0 +1,129 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.reporting.capture_pipeline import CapturePipeline
+
+
+class _Window:
+    def HardCopyToMemory(self, image_type):
+        return b"BM-captura"
+
+
+class _OldWindow:
+    """SAP GUI sin HardCopyToMemory: la captura se vuelca a un archivo"""
+
+    def hardCopy(self, path, image_type):
+        Path(path).write_bytes(b"BM-captura")
+
+
+class _Session:
+    def __init__(self, window=None):
+        self.window = window or _Window()
+
+    def findById(self, element_id):
+        return self.window
+
+
+class _BlockingStore:
+    """Almacén falso: la primera captura queda retenida hasta ``release``"""
+
+    def __init__(self, tmp_path):
+        self.root = Path(tmp_path)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.stored = []
+        self.incoming = self.root / ".incoming"
+        self.incoming.mkdir(exist_ok=True)
+
+    def incoming_path(self, name):
+        return self.incoming / f"{name}_{len(list(self.incoming.iterdir()))}.bmp"
+
+    def store_bytes(self, raw_bytes, key, name, extension="bmp"):
+        self.started.set()
+        self.release.wait(5)
+        self.stored.append(name)
+        return self.root / f"{name}.png"
+
+
+def _saturated_pipeline(tmp_path, drop_policy, **kwargs):
+    """Pipeline con el hilo ocupado en 'uno' y la cola (de 1) llena con 'dos'"""
+    store = _BlockingStore(tmp_path)
+    pipeline = CapturePipeline(store, max_queue=1, drop_policy=drop_policy, attach_to_allure=False, **kwargs)
+    assert pipeline.capture(_Session(), 'k', 'uno')
+    assert store.started.wait(5)
+    assert pipeline.capture(_Session(), 'k', 'dos')
+    return pipeline, store
+
+
+def test_drop_newest_descarta_la_captura_nueva(tmp_path):
+    pipeline, store = _saturated_pipeline(tmp_path, "drop_newest")
+
+    assert pipeline.capture(_Session(), 'k', 'tres') is False
+
+    store.release.set()
+    stats = pipeline.close()
+    assert store.stored == ['uno', 'dos']
+    assert stats['dropped'] == 1 and stats['processed'] == 2
+
+
+def test_drop_oldest_descarta_la_pendiente_mas_antigua(tmp_path):
+    pipeline, store = _saturated_pipeline(tmp_path, "drop_oldest")
+
+    assert pipeline.capture(_Session(), 'k', 'tres') is True
+
+    store.release.set()
+    stats = pipeline.close()
+    assert store.stored == ['uno', 'tres']
+    assert stats['dropped'] == 1
+
+
+def test_block_espera_el_timeout_y_descarta(tmp_path):
+    pipeline, store = _saturated_pipeline(tmp_path, "block", block_timeout=0.05)
+
+    assert pipeline.capture(_Session(), 'k', 'tres') is False
+
+    store.release.set()
+    stats = pipeline.close()
+    assert store.stored == ['uno', 'dos']
+    assert stats['dropped'] == 1 and stats['captured'] == 3
+
+
+def test_politica_invalida(tmp_path):
+    with pytest.raises(ValueError):
+        CapturePipeline(_BlockingStore(tmp_path), drop_policy="ignorar")
+
+
+def test_descartar_borra_el_volcado_de_hardcopy(tmp_path):
+    store = _BlockingStore(tmp_path)
+    pipeline = CapturePipeline(store, max_queue=1, drop_policy="drop_oldest", attach_to_allure=False)
+    old_session = _Session(_OldWindow())
+    pipeline.capture(old_session, 'k', 'uno')
+    assert store.started.wait(5)
+    pipeline.capture(old_session, 'k', 'dos')
+    pipeline.capture(old_session, 'k', 'tres')
+
+    # 'uno' está en proceso, 'dos' se descartó: solo queda el volcado de 'tres'
+    assert len(list(store.incoming.iterdir())) == 2
+    store.release.set()
+    pipeline.close()
+    assert store.stored == ['uno', 'tres']
+    assert list(store.incoming.iterdir()) == []
+
+
+def test_las_capturas_se_entregan_al_hilo_del_hook_sin_esperar(tmp_path):
+    store = _BlockingStore(tmp_path)
+    pipeline = CapturePipeline(store, max_queue=4, attach_to_allure=True)
+    pipeline.capture(_Session(), 'f.feature:3::f.feature:4', 'uno')
+    pipeline.capture(_Session(), 'f.feature:3::f.feature:5', 'dos')
+    pipeline.capture(_Session(), 'f.feature:9::f.feature:10', 'otro')
+    assert store.started.wait(5)
+
+    # El hook no espera a las capturas que el hilo de fondo aún codifica
+    assert pipeline.completed_attachments('f.feature:3') == []
+
+    store.release.set()
+    pipeline.close()
+    assert pipeline.completed_attachments('f.feature:9') == [('otro', store.root / 'otro.png')]
+    assert pipeline.completed_attachments() == []
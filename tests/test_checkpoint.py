@@ -0,0 +1,83 @@
+import json
+import os
+
+from src.reporting.checkpoint import CheckpointJournal, find_resumable, merge_scenarios, scenario_extras
+from src.reporting.sidecars import load_sidecar, write_sidecar
+
+
+def _element(location, status='passed'):
+    return {'type': 'scenario', 'keyword': 'Scenario', 'name': location, 'location': location,
+            'status': status, 'steps': []}
+
+
+def _scenario(location, status='passed', logs=None):
+    return {'event': 'scenario', 'module': 'module_login', 'feature': 'Login',
+            'feature_location': 'login.feature:1', 'location': location, 'status': status,
+            'element': _element(location, status), 'logs': logs or {}}
+
+
+def test_estado_reconstruido_desde_el_diario(tmp_path):
+    journal = CheckpointJournal.for_run("run-1", tmp_path)
+    journal.append('run_start', run_id='run-1', modules=['module_login'])
+    journal.append('module_start', module='module_login')
+    journal.append('scenario', module='module_login', location='login.feature:3', status='passed')
+    journal.append('module_end', module='module_login', success=True)
+    journal.append('run_resume', run_id='run-2', modules=['module_login'])
+
+    state = journal.state()
+
+    assert state['run_id'] == 'run-1'
+    assert state['modules'] == {'module_login': True}
+    assert list(state['scenarios']['module_login']) == ['login.feature:3']
+    assert state['finished'] is False
+    assert journal.completed_scenarios('module_materials') == {}
+
+
+def test_linea_truncada_se_ignora(tmp_path):
+    journal = CheckpointJournal(tmp_path / "run.jsonl")
+    journal.append('run_start', run_id='run-1')
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "scenario", "modu')
+
+    assert [record['event'] for record in journal.records()] == ['run_start']
+
+
+def test_find_resumable_omite_ejecuciones_terminadas(tmp_path):
+    unfinished = CheckpointJournal.for_run("viejo", tmp_path)
+    unfinished.append('run_start', run_id='viejo')
+    finished = CheckpointJournal.for_run("nuevo", tmp_path)
+    finished.append('run_start', run_id='nuevo')
+    finished.append('run_end', success=True)
+    os.utime(unfinished.path, (1, 1))
+
+    assert find_resumable(tmp_path).path == unfinished.path
+    assert find_resumable(tmp_path / "no_existe") is None
+
+
+def test_merge_scenarios_sustituye_omitidos_y_agrega_faltantes(tmp_path):
+    features = [{'keyword': 'Feature', 'name': 'Login', 'location': 'login.feature:1', 'status': 'passed',
+                 'elements': [dict(_element('login.feature:3', 'skipped'), module='module_login'),
+                              dict(_element('login.feature:9'), module='module_login')]}]
+    journaled = {'login.feature:3': _scenario('login.feature:3', logs={'login.feature:3::login.feature:4': ['a']}),
+                 'login.feature:20': _scenario('login.feature:20', 'failed')}
+    report_path = tmp_path / "module_login_report.json"
+    write_sidecar(report_path, "logs", {'login.feature:9::login.feature:10': ['b']})
+
+    restored = merge_scenarios(features, journaled, report_path)
+
+    elements = {element['location']: element for element in features[0]['elements']}
+    assert restored == 2
+    assert elements['login.feature:3']['status'] == 'passed'
+    assert elements['login.feature:20']['module'] == 'module_login'
+    assert features[0]['status'] == 'failed'
+    assert set(load_sidecar(report_path, "logs")) == {'login.feature:3::login.feature:4',
+                                                      'login.feature:9::login.feature:10'}
+    json.dumps(features)
+
+
+def test_scenario_extras_solo_del_escenario():
+    extras = scenario_extras('f.feature:3', {'logs': {'f.feature:3': 1, 'f.feature:3::f.feature:4': 2,
+                                                      'f.feature:30::f.feature:31': 3},
+                                             'rows': None})
+
+    assert extras == {'logs': {'f.feature:3': 1, 'f.feature:3::f.feature:4': 2}, 'rows': {}}
@@ -0,0 +1,59 @@
+import pytest
+
+from src.core import com_profiler
+from src.core.com_profiler import ComProfiler, ProfiledObject
+
+
+class FakeDispatch:
+    """Como win32com.client.CDispatch: interfaz en ``_oleobj_`` y ``__call__`` (propiedad por defecto)"""
+
+    def __init__(self, name, **properties):
+        self.__dict__['_oleobj_'] = object()
+        self.__dict__['_name'] = name
+        self.__dict__.update(properties)
+
+    def __call__(self, *args):
+        return self
+
+    def findById(self, element_id):
+        return FakeDispatch(element_id, Text="")
+
+
+def _session():
+    info = FakeDispatch("info", Transaction="MM01")
+    window = FakeDispatch("wnd[0]", Text="Crear material")
+    return FakeDispatch("session", Info=info, ActiveWindow=window, Busy=False)
+
+
+def test_propiedades_com_se_envuelven_y_no_se_tratan_como_metodos():
+    profiler = ComProfiler()
+    session = ProfiledObject(_session(), profiler, "session")
+
+    assert session.Info.Transaction == "MM01"
+    assert session.ActiveWindow.Text == "Crear material"
+    assert session.Busy is False
+
+    calls = profiler.snapshot()['steps'][com_profiler.OUTSIDE_STEP]
+    assert set(calls['session']) == {"get.Info", "get.ActiveWindow", "get.Busy"}
+    assert "get.Transaction" in calls['session.Info']
+    assert "get.Text" in calls['session.ActiveWindow']
+
+
+def test_metodos_se_miden_y_find_by_id_retorna_proxy():
+    profiler = ComProfiler()
+    session = ProfiledObject(_session(), profiler, "session")
+
+    field = session.findById("wnd[0]/usr/ctxtRMMG1-MATNR")
+    field.Text = "MAT-1"
+
+    assert isinstance(field, ProfiledObject)
+    calls = profiler.snapshot()['steps'][com_profiler.OUTSIDE_STEP]
+    assert calls["wnd[0]/usr/ctxtRMMG1-MATNR"]['findById'][0] == 1
+    assert calls["wnd[0]/usr/ctxtRMMG1-MATNR"]['set.Text'][0] == 1
+
+
+def test_atributo_inexistente_sigue_fallando():
+    session = ProfiledObject(_session(), ComProfiler(), "session")
+
+    with pytest.raises(AttributeError):
+        session.NoExiste
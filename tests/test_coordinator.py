@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from src.core.coordinator import Coordinator, CoordinatorClient, CoordinatorError, Worker
+
+
+class FakeClient:
+    """Coordinador en memoria: el primer ``lease`` falla, luego una asignación y fin"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.leases = [CoordinatorError("lease: HTTP 500"),
+                       {'assignment': {'id': "a1", 'module': "module_login", 'attempt': 1}}]
+        self.heartbeats = []
+        self.heartbeat_seen = threading.Event()
+
+    def call(self, action, **payload):
+        with self.lock:
+            if action == 'register':
+                return {'worker_id': "w1", 'heartbeat_interval': 0.01, 'run_id': "run-1"}
+            if action == 'heartbeat':
+                self.heartbeats.append(payload['running'])
+                if payload['running']:
+                    self.heartbeat_seen.set()
+                return {}
+            if action == 'result':
+                return {'accepted': True}
+            reply = self.leases.pop(0) if self.leases else {'done': True}
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def test_error_de_lease_solo_detiene_su_slot():
+    client = FakeClient()
+
+    def execute(module):
+        # La asignación dura hasta que el coordinador recibe un latido con ella en curso
+        return {'success': client.heartbeat_seen.wait(5), 'completed': True}
+
+    completed = Worker(client, execute, slots=2).run()
+
+    assert completed == [{'module': "module_login", 'attempt': 1, 'success': True, 'accepted': True}]
+    assert ["a1"] in client.heartbeats
+
+
+def test_sin_token_solo_escucha_en_loopback():
+    coordinator = Coordinator(["module_login"])
+
+    for address in ("0.0.0.0:0", ":0", "10.0.0.5:0"):
+        with pytest.raises(CoordinatorError, match="SAP_COORDINATOR_TOKEN"):
+            coordinator.serve(address)
+
+    url = coordinator.serve("127.0.0.1:0")
+    coordinator.shutdown()
+    assert url.startswith("http://127.0.0.1:")
+
+
+def test_token_requerido_en_cada_solicitud():
+    coordinator = Coordinator(["module_login"])
+    url = coordinator.serve("127.0.0.1:0", token="secreto")
+    try:
+        with pytest.raises(CoordinatorError, match="403"):
+            CoordinatorClient(url, token="otro", retry_seconds=1).call('register', name="w", host="h", slots=1)
+        with pytest.raises(CoordinatorError, match="403"):
+            CoordinatorClient(url, retry_seconds=1).call('register', name="w", host="h", slots=1)
+        reply = CoordinatorClient(url, token="secreto", retry_seconds=1).call('register', name="w", host="h", slots=1)
+        assert reply['worker_id']
+    finally:
+        coordinator.shutdown()
@@ -0,0 +1,89 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.credentials import Credential, CredentialPool, CredentialPoolError, load_credentials
+
+
+def _pool(tmp_path, *usernames):
+    return CredentialPool([Credential(name, "clave") for name in usernames], tmp_path, poll_seconds=0.01)
+
+
+def _write_leases(tmp_path, leases):
+    (tmp_path / "leases.json").write_text(json.dumps(leases), encoding='utf-8')
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_cada_arriendo_recibe_un_usuario_distinto(tmp_path):
+    pool, other = _pool(tmp_path, "U1", "U2"), _pool(tmp_path, "U1", "U2")
+
+    first, second = pool.lease("worker-1"), other.lease("worker-2")
+
+    assert {first.username, second.username} == {"U1", "U2"}
+    assert set(json.loads((tmp_path / "leases.json").read_text(encoding='utf-8'))) == {"U1", "U2"}
+
+
+def test_sin_usuario_libre_se_agota_la_espera(tmp_path):
+    pool = _pool(tmp_path, "U1")
+    pool.lease("worker-1")
+
+    with pytest.raises(CredentialPoolError):
+        _pool(tmp_path, "U1").lease("worker-2", timeout=0.05)
+
+
+def test_try_lease_no_cuenta_contencion(tmp_path):
+    pool = _pool(tmp_path, "U1")
+    pool.lease("worker-1")
+    other = _pool(tmp_path, "U1")
+
+    assert other.try_lease("aprovisionamiento") is None
+    assert other.stats['contended'] == 0 and other.stats['timeouts'] == 0
+
+    pool.release_all()
+    assert other.try_lease("aprovisionamiento").username == "U1"
+    assert other.stats['leases'] == 1
+
+
+def test_arriendo_de_proceso_muerto_o_vencido_se_recupera(tmp_path):
+    host = socket.gethostname()
+    _write_leases(tmp_path, {
+        "U1": {'worker': "muerto", 'pid': _dead_pid(), 'host': host, 'leased_at': datetime.now().isoformat()},
+        "U2": {'worker': "remoto", 'pid': 1, 'host': "otro-host",
+               'leased_at': (datetime.now() - timedelta(hours=13)).isoformat()}})
+    pool = _pool(tmp_path, "U1", "U2")
+
+    assert {pool.lease("w1").username, pool.lease("w2").username} == {"U1", "U2"}
+    assert pool.stats['reclaimed'] == 2
+
+
+def test_release_no_borra_el_arriendo_de_otro_proceso(tmp_path):
+    pool = _pool(tmp_path, "U1")
+    credential = pool.lease("worker-1")
+    # Mientras tanto el arriendo se recuperó y otro proceso (otro host) lo tomó
+    _write_leases(tmp_path, {"U1": {'worker': "worker-2", 'pid': os.getpid() + 1, 'host': "otro-host",
+                                    'leased_at': datetime.now().isoformat()}})
+
+    pool.release(credential)
+
+    assert json.loads((tmp_path / "leases.json").read_text(encoding='utf-8'))["U1"]['worker'] == "worker-2"
+
+
+def test_usuarios_desde_texto_y_json(tmp_path):
+    users_file = tmp_path / "usuarios.json"
+    users_file.write_text(json.dumps([{'username': "U3", 'password': "c"}, {'username': "U1", 'password': "x"}]),
+                          encoding='utf-8')
+
+    credentials = load_credentials("U1:secreto1, U2:b\n# U9:comentado", str(users_file))
+
+    assert [c.username for c in credentials] == ["U1", "U2", "U3"]
+    assert credentials[0].password == "secreto1" and "secreto1" not in repr(credentials[0])
@@ -0,0 +1,82 @@
+import openpyxl
+import pytest
+
+from src.core.data_driven import DataDrivenRunner, fill_template, iter_rows, resolve_data_path
+
+
+def test_csv_con_punto_y_coma_y_filas_vacias(tmp_path):
+    path = tmp_path / "materiales.csv"
+    path.write_text("﻿material; descripcion\nMAT-1; Tornillo\n;\nMAT-2;Tuerca\n", encoding='utf-8')
+
+    assert list(iter_rows(path)) == [{'material': 'MAT-1', 'descripcion': 'Tornillo'},
+                                     {'material': 'MAT-2', 'descripcion': 'Tuerca'}]
+
+
+def test_xlsx_con_encabezado_y_filas_vacias(tmp_path):
+    path = tmp_path / "materiales.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Datos"
+    sheet.append(["material", None, "cantidad"])
+    sheet.append(["MAT-1", "x", 5])
+    sheet.append([None, None, None])
+    sheet.append(["MAT-2", None, 7])
+    workbook.save(path)
+
+    assert list(iter_rows(path, "Datos")) == [{'material': 'MAT-1', 'col1': 'x', 'cantidad': '5'},
+                                              {'material': 'MAT-2', 'col1': '', 'cantidad': '7'}]
+
+
+def test_formato_no_soportado_y_ruta_relativa(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_rows(tmp_path / "datos.json"))
+    assert resolve_data_path(tmp_path / "f" / "a.feature", "datos.csv") == tmp_path / "f" / "datos.csv"
+
+
+def test_fill_template_conserva_marcadores_desconocidos():
+    row = {'material': 'MAT-1', 'cantidad': '5'}
+
+    assert fill_template("crear <material> con < cantidad > y <planta>", row) == "crear MAT-1 con 5 y <planta>"
+
+
+def test_lotes_reinician_la_sesion_y_piden_una_nueva():
+    sessions, resets, seen = [], [], []
+
+    def provider():
+        sessions.append(f"s{len(sessions) + 1}")
+        return sessions[-1]
+
+    runner = DataDrivenRunner(provider, batch_size=2, reset_session=resets.append)
+    summary = runner.run(({'n': str(n)} for n in range(5)), lambda session, row: seen.append((session, row['n'])))
+
+    assert summary['total'] == 5 and summary['failed'] == 0
+    assert seen == [('s1', '0'), ('s1', '1'), ('s2', '2'), ('s2', '3'), ('s3', '4')]
+    assert resets == ['s1', 's2']
+    assert [row['batch'] for row in summary['rows']] == [1, 1, 2, 2, 3]
+
+
+def test_max_failures_detiene_la_ejecucion():
+    def action(session, row):
+        if row['n'] != '1':
+            raise RuntimeError("Material bloqueado")
+
+    summary = DataDrivenRunner(lambda: None, batch_size=10, max_failures=2).run(
+        ({'n': str(n)} for n in range(10)), action)
+
+    assert summary['stopped'] is True
+    assert summary['total'] == 3 and summary['failed'] == 2
+    assert summary['rows'][0]['error_message'] == "Material bloqueado"
+
+
+def test_row_limit_deja_de_leer_el_origen():
+    consumed = []
+
+    def rows():
+        for n in range(100000):
+            consumed.append(n)
+            yield {'n': str(n)}
+
+    summary = DataDrivenRunner(lambda: None, batch_size=4, row_limit=10).run(rows(), lambda session, row: None)
+
+    assert summary['total'] == 10
+    assert len(consumed) == 10
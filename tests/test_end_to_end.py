@@ -0,0 +1,41 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ("module_login", "module_materials")
+
+
+def test_ejecucion_completa_con_backend_simulado(tmp_path):
+    """run_all_modules sobre una copia del árbol: los hooks de behave producen sidecars, diario y evidencias"""
+    for name in ("src", "scripts", "modules"):
+        shutil.copytree(ROOT / name, tmp_path / name, ignore=shutil.ignore_patterns("__pycache__", "reports"))
+    shutil.copy(ROOT / "behave.ini", tmp_path)
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("SAP_", "EVIDENCE_", "LOG_"))}
+    env.update(SAP_BACKEND="simulated", SAP_LOGIN_WAIT="0", SAP_CAPTURE_EVERY_STEP="true", SAP_PROVISIONING="true",
+               SAP_SESSION_HEALTH="true")
+
+    result = subprocess.run([sys.executable, "scripts/run_all_modules.py"], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+
+    for module in MODULES:
+        reports = tmp_path / "modules" / module / "reports"
+        for sidecar in ("logs", "com_profile", "session_health"):
+            assert (reports / f"{module}_report_{sidecar}.json").exists(), f"{module}: falta sidecar {sidecar}"
+
+    [journal] = (tmp_path / "reports" / "checkpoints").glob("*.jsonl")
+    records = [json.loads(line) for line in journal.read_text(encoding='utf-8').splitlines()]
+    run_id = records[0]['run_id']
+    assert {record['module'] for record in records if record['event'] == 'scenario'} == set(MODULES)
+    assert records[-1]['event'] == 'run_end'
+
+    index = json.loads((tmp_path / "reports" / "evidence" / "evidence_index.json").read_text(encoding='utf-8'))
+    entries = [entry for step in index['steps'].values() for entry in step]
+    assert entries and {entry['run_id'] for entry in entries} == {run_id}
+    assert all((tmp_path / "reports" / "evidence" / entry['path']).exists() for entry in entries)
+    # Pool de aprovisionamiento (SAP_PROVISIONING=true): los materiales sobrantes quedan guardados
+    assert (tmp_path / "reports" / "provisioning" / "materials.json").exists()
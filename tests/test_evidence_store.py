@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+from src.reporting.evidence_store import EvidenceStore, load_evidence_index, prune_index, run_entries
+from src.reporting.html_reporter import HTMLReporter
+
+
+def _bmp(color):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), (color, 0, 0)).save(buffer, 'BMP')
+    return buffer.getvalue()
+
+
+def _entry(run_id, sha, captured_at):
+    return {'sha256': sha, 'path': f"{sha}.png", 'name': 'paso', 'run_id': run_id, 'captured_at': captured_at}
+
+
+def test_prune_index_conserva_las_ultimas_ejecuciones_y_la_actual():
+    index = {'objects': {'a': {'path': 'a.png'}, 'b': {'path': 'b.png'}, 'c': {'path': 'c.png'}},
+             'steps': {'k1': [_entry('r1', 'a', '2026-01-01T00:00:00'), _entry('r2', 'b', '2026-01-02T00:00:00')],
+                       'k2': [_entry('r3', 'c', '2026-01-03T00:00:00')],
+                       'legado': [{'sha256': 'a', 'path': 'a.png'}]}}
+
+    prune_index(index, keep_runs=1, current_run='r1')
+
+    assert [entry['run_id'] for entry in index['steps']['k1']] == ['r1']
+    assert [entry['run_id'] for entry in index['steps']['k2']] == ['r3']
+    assert 'legado' not in index['steps']
+    assert set(index['objects']) == {'a', 'c'}
+
+
+def test_el_indice_no_crece_entre_ejecuciones(tmp_path):
+    for i in range(4):
+        store = EvidenceStore(tmp_path, run_id=f"r{i}", keep_runs=2)
+        store.store_bytes(_bmp(i), 'escenario::paso', 'paso')
+        store.close()
+
+    index = load_evidence_index(tmp_path)
+    assert [entry['run_id'] for entry in index['steps']['escenario::paso']] == ['r2', 'r3']
+    assert len(index['objects']) == 2
+
+
+def test_el_reporte_ignora_capturas_de_otras_ejecuciones(tmp_path):
+    store = EvidenceStore(tmp_path / "evidence", run_id="anterior", keep_runs=5)
+    store.store_bytes(_bmp(1), 'escenario::paso', 'paso')
+    store.close()
+
+    reporter = HTMLReporter(str(tmp_path / "html"), evidence_root=tmp_path / "evidence", run_id="actual")
+
+    assert reporter._find_screenshot('escenario::paso', 'passed') is None
+    assert reporter._find_screenshot('escenario::paso', 'failed')['status'] == 'not_captured'
+    assert run_entries(reporter.evidence_index, 'escenario::paso', 'anterior')
+    assert not (tmp_path / "html" / "evidence").exists()
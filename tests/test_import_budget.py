@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from benchmarks.import_budget import CASES, measure_imports
+
+# Módulos que el listado de módulos nunca debe cargar (COM de Windows, Allure, .env)
+BANNED_ON_LIST = ("win32com", "allure", "dotenv")
+# Máquinas de CI más lentas: IMPORT_BUDGET_SCALE=1.5
+SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "1.0"))
+REPEATS = 3
+
+
+def _measure(args):
+    """Mínimo de varias ejecuciones (la primera paga la caché de disco) y los módulos importados"""
+    samples = [measure_imports(args) for _ in range(REPEATS)]
+    return min(elapsed for elapsed, _ in samples), samples[-1][1]
+
+
+def _loaded(imported, forbidden):
+    return sorted(module for module in imported
+                  if any(module == name or module.startswith(f"{name}.") for name in forbidden))
+
+
+def test_run_tests_list_dentro_del_presupuesto():
+    elapsed_ms, imported = _measure(["scripts/run_tests.py", "--list"])
+    budget_ms = next(budget for name, _, budget, _ in CASES if name == "run_tests --list") * SCALE
+
+    assert imported, "python -X importtime no reportó imports"
+    assert _loaded(imported, BANNED_ON_LIST) == []
+    assert elapsed_ms <= budget_ms, f"run_tests --list importa en {elapsed_ms:.1f} ms (presupuesto {budget_ms:.0f} ms)"
+
+
+@pytest.mark.parametrize("name, args, budget_ms, forbidden", CASES, ids=[case[0] for case in CASES])
+def test_presupuesto_de_importacion(name, args, budget_ms, forbidden):
+    elapsed_ms, imported = _measure(args)
+
+    assert _loaded(imported, forbidden) == []
+    assert elapsed_ms <= budget_ms * SCALE, f"{name}: {elapsed_ms:.1f} ms (presupuesto {budget_ms * SCALE:.0f} ms)"
@@ -0,0 +1,73 @@
+import json
+import logging
+import threading
+
+from src.config.config import reload_settings
+from src.utils import log_context
+from src.utils.log_context import CorrelationFilter, JsonLinesFormatter, SamplingFilter
+
+
+def _record(name="src.core.sap_utils.popups", level=logging.DEBUG, message="sondeo"):
+    return logging.LogRecord(name, level, __file__, 1, message, None, None)
+
+
+def test_muestreo_limita_por_ventana_y_reporta_suprimidos(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(log_context.time, "monotonic", lambda: clock[0])
+    sampling = SamplingFilter({'src.core.sap_utils.popups': (2, 60)})
+
+    passed = [sampling.filter(_record()) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+
+    clock[0] += 61
+    record = _record()
+    assert sampling.filter(record)
+    assert record.suppressed == 3
+
+
+def test_muestreo_no_aplica_a_warnings_ni_a_otras_categorias():
+    sampling = SamplingFilter({'src.core.sap_utils.popups': (0, 60)})
+
+    assert sampling.filter(_record(level=logging.WARNING))
+    assert sampling.filter(_record(name="src.core.sap_utils"))
+    assert not sampling.filter(_record(name="src.core.sap_utils.popups.detalle"))
+
+
+def test_reglas_desde_el_entorno(monkeypatch):
+    monkeypatch.setenv("LOG_SAMPLING", "a.b=3/10, invalida, c=x/1")
+    reload_settings()
+    try:
+        assert SamplingFilter.from_env().rules == {'a.b': (3, 10.0)}
+    finally:
+        monkeypatch.undo()
+        reload_settings()
+
+
+def test_correlacion_por_hilo(monkeypatch):
+    monkeypatch.setenv("SAP_RUN_ID", "run-1")
+    log_context.bind(module="module_login", scenario="Login", step="Given abrir SAP")
+    try:
+        record = _record()
+        CorrelationFilter().filter(record)
+
+        background = {}
+        thread = threading.Thread(target=lambda: background.update(log_context.current()))
+        thread.start()
+        thread.join()
+    finally:
+        log_context.bind(module=None, scenario=None, step=None)
+
+    assert record.correlation['run_id'] == "run-1"
+    assert record.correlation['scenario'] == "Login"
+    assert record.correlation['step'] == "Given abrir SAP"
+    assert background == {}
+
+
+def test_formato_json_lines():
+    record = _record(message="hola")
+    record.correlation = {'run_id': 'run-1', 'module': 'module_login'}
+
+    entry = json.loads(JsonLinesFormatter().format(record))
+
+    assert entry['message'] == "hola"
+    assert entry['run_id'] == 'run-1' and entry['module'] == 'module_login'
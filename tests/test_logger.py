@@ -0,0 +1,74 @@
+import json
+import logging
+import logging.handlers
+
+import pytest
+
+from src.config.config import reload_settings
+from src.utils import logger as logger_module
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    logger_module.shutdown_logging()
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LOG_ROTATION", "none")
+    monkeypatch.setenv("LOG_FORMAT", "text")
+    reload_settings()
+    yield tmp_path
+    logger_module.shutdown_logging()
+    monkeypatch.undo()
+    reload_settings()
+
+
+def _queue_handlers():
+    return [handler for handler in logging.getLogger().handlers
+            if isinstance(handler, logging.handlers.QueueHandler)]
+
+
+def test_configurar_dos_veces_deja_un_solo_handler(log_dir):
+    logger_module.configure_logging()
+    logger_module.configure_logging()
+
+    assert len(_queue_handlers()) == 1
+
+
+def test_reconfigurar_tras_shutdown_no_duplica_lineas(log_dir):
+    logger_module.configure_logging()
+    logger_module.shutdown_logging()
+    assert _queue_handlers() == []
+
+    logger_module.configure_logging()
+    logging.getLogger("tests.logger").warning("una sola vez")
+    logger_module.shutdown_logging()
+
+    lines = [line for path in log_dir.glob("*.log") for line in path.read_text(encoding='utf-8').splitlines()]
+    assert sum("una sola vez" in line for line in lines) == 1
+
+
+def test_json_conserva_la_excepcion_tras_la_cola(log_dir, monkeypatch):
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    reload_settings()
+    logger_module.configure_logging()
+    try:
+        raise ValueError("dato inválido")
+    except ValueError:
+        logging.getLogger("tests.logger").exception("boom %s", 1)
+    logger_module.shutdown_logging()
+
+    [line] = [line for path in log_dir.glob("*.log") for line in path.read_text(encoding='utf-8').splitlines()]
+    entry = json.loads(line)
+    assert entry['message'] == "boom 1"
+    assert entry['exception'].startswith("Traceback") and "ValueError: dato inválido" in entry['exception']
+
+
+def test_texto_sigue_mostrando_el_traceback(log_dir):
+    logger_module.configure_logging()
+    try:
+        raise ValueError("dato inválido")
+    except ValueError:
+        logging.getLogger("tests.logger").exception("boom")
+    logger_module.shutdown_logging()
+
+    text = "".join(path.read_text(encoding='utf-8') for path in log_dir.glob("*.log"))
+    assert "ERROR - boom" in text and "ValueError: dato inválido" in text
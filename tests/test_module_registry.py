@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from src.config.module_registry import ModuleRegistry, ModuleRegistryError
+
+
+def _write_manifest(modules_dir, name, **fields):
+    (modules_dir / name).mkdir(parents=True)
+    (modules_dir / name / "module.json").write_text(json.dumps(fields), encoding='utf-8')
+
+
+def _registry(**modules):
+    return ModuleRegistry.compile("no_existe", {name: {"dependencies": deps} for name, deps in modules.items()})
+
+
+def test_orden_topologico_y_cierres():
+    registry = _registry(module_a=[], module_b=["module_a"], module_c=["module_b"], module_d=["module_a"])
+
+    assert registry.order.index("module_a") < registry.order.index("module_b") < registry.order.index("module_c")
+    assert registry.prerequisites("module_c") == {"module_a", "module_b"}
+    assert registry.affected("module_a") == {"module_b", "module_c", "module_d"}
+    assert registry.affected("module_c") == frozenset()
+    assert registry.sort(["module_c", "desconocido", "module_a"]) == ["module_a", "module_c", "desconocido"]
+
+
+def test_ciclo_se_reporta_con_su_camino():
+    with pytest.raises(ModuleRegistryError) as error:
+        _registry(module_a=["module_c"], module_b=["module_a"], module_c=["module_b"], module_d=[])
+
+    assert "module_a -> module_c -> module_b -> module_a" in str(error.value)
+
+
+def test_dependencias_invalidas():
+    with pytest.raises(ModuleRegistryError) as error:
+        _registry(module_a=["module_a"], module_b=["module_x"])
+
+    assert "depende de sí mismo" in str(error.value)
+    assert "dependencia desconocida 'module_x'" in str(error.value)
+
+
+def test_desempate_por_execution_order():
+    registry = ModuleRegistry.compile("no_existe", {
+        "module_a": {"execution_order": 2}, "module_b": {"execution_order": 1}})
+
+    assert registry.order == ("module_b", "module_a")
+
+
+def test_el_manifiesto_es_la_fuente_y_los_conflictos_fallan(tmp_path):
+    _write_manifest(tmp_path, "module_a", priority=5)
+    _write_manifest(tmp_path, "module_b", dependencies=["module_a"])
+
+    registry = ModuleRegistry.compile(tmp_path, {"module_a": {"priority": 5}, "module_extra": {}})
+    assert registry.get("module_a")["priority"] == 5
+    assert registry.dependencies("module_b") == ["module_a"]
+    assert "module_extra" in registry
+
+    with pytest.raises(ModuleRegistryError) as error:
+        ModuleRegistry.compile(tmp_path, {"module_b": {"dependencies": []}})
+    assert "'dependencies'" in str(error.value)
+
+
+def test_manifiesto_con_tipos_invalidos(tmp_path):
+    _write_manifest(tmp_path, "module_a", enabled="si", execution_order=True)
+
+    with pytest.raises(ModuleRegistryError) as error:
+        ModuleRegistry.compile(tmp_path)
+
+    assert "'enabled' debe ser bool" in str(error.value)
+    assert "'execution_order' debe ser int" in str(error.value)
@@ -0,0 +1,141 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core import provisioning
+from src.core.provisioning import ProvisioningError, ProvisioningPool, ProvisioningStore
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.session = object()
+        self.log = log
+        log.append("connect")
+
+    def close_connection(self):
+        self.log.append("close")
+
+
+class FakeGate:
+    def __init__(self):
+        self.held = False
+        self.acquired = 0
+
+    def acquire(self, timeout=None, cancel=None, force=False):
+        self.held = True
+        self.acquired += 1
+        return True
+
+    def release(self):
+        self.held = False
+
+
+def _factory(fail=False, block=None):
+    created = []
+
+    def create(session):
+        if block is not None:
+            block.wait(5)
+        if fail:
+            raise RuntimeError("MM01 sin autorización")
+        created.append(len(created) + 1)
+        return {'material': f"MAT-{created[-1]}", 'created_at': datetime.now().isoformat()}
+
+    return create, created
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condición no alcanzada"
+        time.sleep(0.005)
+
+
+def test_repone_hasta_la_marca_alta_al_bajar_de_la_baja():
+    log = []
+    factory, created = _factory()
+    pool = ProvisioningPool("materials", factory, lambda: FakeConnection(log),
+                            low_watermark=2, high_watermark=4).start()
+    try:
+        _wait_until(lambda: pool.available() == 4)
+        pool.lease()
+        pool.lease()
+        assert pool.available() == 2 and len(created) == 4
+
+        pool.lease()
+        _wait_until(lambda: pool.available() == 4)
+        assert len(created) == 7
+    finally:
+        pool.close()
+    assert log.count("connect") == 1 and log[-1] == "close"
+
+
+def test_lease_agota_la_espera():
+    block = threading.Event()
+    factory, _ = _factory(block=block)
+    pool = ProvisioningPool("materials", factory, lambda: FakeConnection([])).start()
+
+    with pytest.raises(ProvisioningError, match="sin objetos"):
+        pool.lease(timeout=0.05)
+    assert pool.stats()['empty_leases'] == 1
+
+    block.set()
+    pool.close()
+
+
+def test_errores_consecutivos_detienen_el_pool(monkeypatch):
+    monkeypatch.setattr(provisioning, "MAX_BACKOFF_SECONDS", 0)
+    log = []
+    factory, _ = _factory(fail=True)
+    pool = ProvisioningPool("materials", factory, lambda: FakeConnection(log), max_failures=3).start()
+
+    with pytest.raises(ProvisioningError, match="detenido tras 3 errores"):
+        pool.lease(timeout=5)
+    pool.close()
+    # Cada error descarta la sesión dedicada y la siguiente creación abre otra
+    assert log.count("connect") == 3 and log.count("close") == 3
+    assert pool.stats()['failures'] == 3
+
+
+def test_close_persiste_lo_no_consumido(tmp_path):
+    store = ProvisioningStore(tmp_path / "materials.json")
+    factory, _ = _factory()
+    pool = ProvisioningPool("materials", factory, lambda: FakeConnection([]),
+                            low_watermark=1, high_watermark=3, store=store).start()
+    _wait_until(lambda: pool.available() == 3)
+    leased = pool.lease()
+    pool.close()
+
+    reused = ProvisioningPool("materials", factory, lambda: FakeConnection([]), low_watermark=0,
+                              high_watermark=2, store=store).start()
+    try:
+        assert reused.stats()['reused'] == 2
+        assert leased not in [reused.lease(), reused.lease()]
+    finally:
+        reused.close()
+
+
+def test_gate_se_devuelve_al_llenar_el_pool():
+    log = []
+    gate = FakeGate()
+    factory, _ = _factory()
+    pool = ProvisioningPool("materials", factory, lambda: FakeConnection(log),
+                            low_watermark=1, high_watermark=2, gate=gate).start()
+    try:
+        _wait_until(lambda: pool.available() == 2 and not gate.held)
+        assert gate.acquired == 1 and log == ["connect", "close"]
+    finally:
+        pool.close()
+
+
+def test_claim_descarta_objetos_expirados(tmp_path):
+    store = ProvisioningStore(tmp_path / "materials.json", max_age_hours=1)
+    old = {'material': "MAT-1", 'created_at': (datetime.now() - timedelta(hours=2)).isoformat()}
+    fresh = {'material': "MAT-2", 'created_at': datetime.now().isoformat()}
+    store.save([old, fresh])
+
+    assert store.claim() == [fresh]
+    assert store.claim() == []
+    assert list(tmp_path.iterdir()) == []
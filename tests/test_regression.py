@@ -0,0 +1,65 @@
+from src.reporting.regression import RegressionDetector
+from src.reporting.timing_store import StepTimingStore
+
+
+def _append_run(store, run_id, durations, statuses=None):
+    """Un escenario 'Login' de dos pasos en el módulo 'm'"""
+    steps = ['Given abrir SAP', 'When ingresar usuario']
+    store.append_rows(run=[run_id] * 2, module=['m'] * 2, scenario=['Login'] * 2, step=steps,
+                      status=statuses or [0, 0], duration=durations)
+
+
+def _case(durations, status='passed'):
+    return {'module': 'm', 'name': 'Login', 'status': status, 'duration': sum(durations),
+            'steps': [{'keyword': 'Given', 'name': 'abrir SAP', 'status': 'passed', 'duration': durations[0]},
+                      {'keyword': 'When', 'name': 'ingresar usuario', 'status': 'passed', 'duration': durations[1]}]}
+
+
+def _detector(store):
+    return RegressionDetector(store, window=20, min_samples=3, threshold=3.0, min_ratio=1.2, min_delta=0.5)
+
+
+def test_paso_lento_se_marca_como_regresion(tmp_path):
+    store = StepTimingStore(tmp_path)
+    for i, duration in enumerate([1.0, 1.1, 0.9, 1.0, 1.05]):
+        _append_run(store, f"r{i}", [duration, 2.0])
+
+    report = _detector(store).compare([_case([4.0, 2.0])], run_id='actual')
+
+    levels = {(flag['level'], flag['step']) for flag in report['regressions']}
+    assert ('step', 'Given abrir SAP') in levels
+    assert ('scenario', '') in levels
+    assert report['checked'] == {'steps': 2, 'scenarios': 1}
+
+
+def test_duracion_normal_no_es_regresion(tmp_path):
+    store = StepTimingStore(tmp_path)
+    for i, duration in enumerate([1.0, 1.1, 0.9, 1.0, 1.05]):
+        _append_run(store, f"r{i}", [duration, 2.0])
+
+    assert _detector(store).compare([_case([1.02, 2.0])], run_id='actual')['regressions'] == []
+
+
+def test_ejecuciones_fallidas_no_bajan_la_linea_base_del_escenario(tmp_path):
+    store = StepTimingStore(tmp_path)
+    for i in range(3):
+        _append_run(store, f"ok{i}", [1.0, 2.0])
+    # El segundo paso falló: solo el primero habría sumado (1 s en vez de 3 s)
+    for i in range(4):
+        _append_run(store, f"fallo{i}", [1.0, 0.1], statuses=[0, 1])
+
+    detector = _detector(store)
+    _, scenario_baseline = detector._baselines(store.values('run'))
+
+    assert scenario_baseline[('m', 'Login')] == (3.0, 0.0, 3)
+    assert detector.compare([_case([1.0, 2.0])], run_id='actual')['regressions'] == []
+
+
+def test_sin_muestras_suficientes_no_se_compara(tmp_path):
+    store = StepTimingStore(tmp_path)
+    _append_run(store, "r0", [1.0, 2.0])
+
+    report = _detector(store).compare([_case([9.0, 9.0])], run_id='actual')
+
+    assert report['checked'] == {'steps': 0, 'scenarios': 0}
+    assert report['regressions'] == []
@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.core.session_budget import SessionBudget, SessionBudgetError
+from src.utils.shared_table import SharedTable, pid_alive
+
+
+def _budget(tmp_path, **limits):
+    return SessionBudget(limits, tmp_path, aging_seconds=60, poll_seconds=0.01, system="DEV")
+
+
+def _record(budget, username, priority=0, waited=0.0):
+    return {'holder': username, 'priority': priority, 'scopes': budget.scopes(username),
+            'pid': os.getpid(), 'host': budget.host, 'enqueued_at': time.time() - waited}
+
+
+def _admitted(budget, queue, grants=()):
+    table = {'queue': queue, 'grants': {f"g{i}": grant for i, grant in enumerate(grants)}}
+    return [ticket for ticket in queue if budget._admissible(ticket, table)[0]]
+
+
+def test_prioridad_y_orden_de_llegada(tmp_path):
+    budget = _budget(tmp_path, system=1)
+
+    assert _admitted(budget, {'bajo': _record(budget, "u1", 0, waited=10),
+                              'alto': _record(budget, "u2", 5)}) == ['alto']
+    assert _admitted(budget, {'segundo': _record(budget, "u1", waited=1),
+                              'primero': _record(budget, "u2", waited=5)}) == ['primero']
+
+
+def test_el_envejecimiento_evita_la_inanicion(tmp_path):
+    budget = _budget(tmp_path, system=1)
+
+    # 600 s en cola = 10 puntos de prioridad
+    assert _admitted(budget, {'viejo': _record(budget, "u1", 0, waited=600),
+                              'nuevo': _record(budget, "u2", 5)}) == ['viejo']
+
+
+def test_ambito_saturado_no_bloquea_a_otros_usuarios(tmp_path):
+    budget = _budget(tmp_path, system=3, user=1)
+    held = _record(budget, "u1")
+    queue = {'u1_alto': _record(budget, "u1", 5), 'u1_bajo': _record(budget, "u1", 0, waited=1),
+             'u2': _record(budget, "u2", 0), 'u3': _record(budget, "u3", 0)}
+
+    # u1 espera su propio usuario; u2 y u3 caben en el sistema (3 - 1 concedido)
+    assert _admitted(budget, queue, [held]) == ['u2', 'u3']
+    assert budget._admissible('u1_alto', {'queue': queue, 'grants': {'g': held}})[1] == ["user:u1"]
+
+
+def test_capacidad_reservada_para_el_primero_de_la_cola(tmp_path):
+    budget = _budget(tmp_path, system=1)
+
+    assert _admitted(budget, {'primero': _record(budget, "u1", waited=2),
+                              'segundo': _record(budget, "u2", waited=1)}) == ['primero']
+
+
+def test_turnos_compartidos_por_archivo(tmp_path):
+    budget = _budget(tmp_path, system=1)
+    other = _budget(tmp_path, system=1)
+
+    ticket = budget.acquire("escenario 1", "u1")
+    with pytest.raises(SessionBudgetError):
+        other.acquire("escenario 2", "u2", timeout=0.05)
+    assert other.acquire("escenario 3", "u2", timeout=0.05, cancel=lambda: True) is None
+    forced = other.acquire("escenario 4", "u2", force=True)
+
+    budget.release(ticket)
+    other.release(forced)
+    assert other.acquire("escenario 5", "u2", timeout=0.05)
+    assert other.snapshot()['timeouts'] == 1 and other.snapshot()['overdrafts'] == 1
+
+
+def test_tabla_compartida_persiste_y_tolera_archivos_ilegibles(tmp_path):
+    table = SharedTable(tmp_path / "tabla.json")
+    with table.locked() as data:
+        data['a'] = 1
+    with table.locked() as data:
+        assert data == {'a': 1}
+    assert not table.mutex_path.exists()
+
+    table.path.write_text("{roto", encoding='utf-8')
+    with table.locked() as data:
+        assert data == {}
+
+
+def test_mutex_abandonado_se_recupera(tmp_path):
+    table = SharedTable(tmp_path / "tabla.json")
+    table.mutex_path.mkdir(parents=True)
+    os.utime(table.mutex_path, (time.time() - 120, time.time() - 120))
+
+    with table.locked() as data:
+        data['ok'] = True
+    assert not table.mutex_path.exists()
+
+
+def test_pid_alive():
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+
+    assert pid_alive(os.getpid())
+    assert not pid_alive(None) and not pid_alive(0)
+    assert not pid_alive(finished.pid)
@@ -0,0 +1,98 @@
+from src.core import session_health
+from src.core.session_health import SessionHealthMonitor, classify_com_error, retry_on_session_loss
+
+
+class ComError(Exception):
+    """Equivalente a pywintypes.com_error: args = (hresult, strerror, excepinfo, argerror)"""
+
+
+class FakeScenario:
+    name = "Login"
+    location = "login.feature:3"
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.attempts = 0
+        self.session_lost = False
+        self.session_error = None
+
+    def run(self, runner):
+        self.attempts += 1
+        runner.formatters[0].current_feature_data['elements'].append({'location': self.location})
+        failed = self.outcomes.pop(0)
+        if failed:
+            self.session_lost = True
+            self.session_error = "RPC server is unavailable"
+        return failed
+
+
+class JsonFormatter:
+    name = 'json'
+
+    def __init__(self):
+        self.current_feature_data = {'elements': []}
+        self.current_scenario = object()
+
+
+class Runner:
+    def __init__(self, formatter):
+        self.formatters = [formatter]
+
+
+def _monitor(monkeypatch):
+    monkeypatch.setattr(session_health, '_standby', None)
+    return SessionHealthMonitor(reconnect_attempts=1, connect=object)
+
+
+def test_clasificacion_de_errores_com():
+    assert classify_com_error(ComError(-2147023174, "RPC", None, None)) == session_health.SESSION_LOST
+    assert classify_com_error(ComError(-2147418111, "Call rejected", None, None)) == session_health.BUSY
+    excepinfo = (0, "SAP Frontend Server", "The control could not be found by id.", None, 0, 0)
+    assert classify_com_error(ComError(-2147352567, "Exception occurred.", excepinfo, None)) == \
+        session_health.ELEMENT_NOT_FOUND
+    assert classify_com_error(ValueError("cantidad inválida")) == session_health.APPLICATION
+
+
+def test_clasificacion_sigue_la_causa_encadenada():
+    try:
+        try:
+            raise ComError(-2147417848, "disconnected", None, None)
+        except ComError as cause:
+            raise RuntimeError("paso fallido") from cause
+    except RuntimeError as error:
+        assert classify_com_error(error) == session_health.SESSION_LOST
+
+
+def test_reintento_descarta_el_intento_fallido_del_reporte(monkeypatch):
+    monitor = _monitor(monkeypatch)
+    scenario = FakeScenario([True, False])
+    runner = Runner(JsonFormatter())
+    retry_on_session_loss(scenario, monitor)
+
+    assert scenario.run(runner) is False
+    assert scenario.attempts == 2
+    assert runner.formatters[0].current_feature_data['elements'] == [{'location': "login.feature:3"}]
+    assert monitor.stats['retried'] == 1 and monitor.stats['recovered'] == 1
+
+
+def test_sin_estado_del_formatter_no_hay_reintento(monkeypatch):
+    monitor = _monitor(monkeypatch)
+    scenario = FakeScenario([True, False])
+    formatter = JsonFormatter()
+    runner = Runner(formatter)
+    retry_on_session_loss(scenario, monitor)
+    del formatter.current_scenario
+
+    assert scenario.run(runner) is True
+    assert scenario.attempts == 1
+    assert monitor.stats['reconnects'] == 0
+
+
+def test_sin_scenario_run_no_se_instala_el_reintento(monkeypatch):
+    class Opaque:
+        pass
+
+    scenario = Opaque()
+    retry_on_session_loss(scenario, _monitor(monkeypatch))
+
+    assert not hasattr(scenario, 'run')
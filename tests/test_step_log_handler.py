@@ -0,0 +1,42 @@
+import logging
+import threading
+
+import pytest
+
+from src.utils.step_log_handler import StepLogHandler
+
+
+@pytest.fixture
+def handler():
+    handler = StepLogHandler.install(capacity=3)
+    logger = logging.getLogger("tests.step_log_handler")
+    previous_level = logger.level
+    logger.setLevel(logging.INFO)
+    yield handler
+    handler.set_context()
+    handler.uninstall()
+    logger.setLevel(previous_level)
+
+
+def test_registros_del_paso_en_buffer_circular(handler):
+    logger = logging.getLogger("tests.step_log_handler")
+    handler.set_context(feature="f.feature:1", scenario="f.feature:3", step="f.feature:3::f.feature:4")
+    for i in range(5):
+        logger.info(f"mensaje {i}")
+    handler.set_context(feature=handler.feature_id, scenario=handler.scenario_id)
+    logger.info("después del paso")
+
+    records = handler.records()
+    assert [r['message'] for r in records["f.feature:3::f.feature:4"]] == ["mensaje 2", "mensaje 3", "mensaje 4"]
+    assert [r['message'] for r in records["f.feature:3"]] == ["después del paso"]
+
+
+def test_hilos_de_fondo_no_se_atribuyen_al_paso(handler):
+    logger = logging.getLogger("tests.step_log_handler")
+    handler.set_context(feature="f.feature:1", scenario="f.feature:3", step="f.feature:3::f.feature:4")
+    background = threading.Thread(target=logger.info, args=("desde el encoder",))
+    background.start()
+    background.join()
+    logger.info("desde el paso")
+
+    assert [r['message'] for r in handler.records()["f.feature:3::f.feature:4"]] == ["desde el paso"]
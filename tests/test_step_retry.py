@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import session_health
+from src.core.step_retry import FlakinessStore, RetryPolicy, StepRetrier, retry_kind
+
+
+class ComError(Exception):
+    pass
+
+
+BUSY_ERROR = ComError(-2147418111, "Call was rejected by callee.", None, None)
+
+
+def _context(tags=()):
+    scenario = SimpleNamespace(name="Pedido", effective_tags=list(tags))
+    return SimpleNamespace(current_scenario=scenario, current_step_key="f.feature:3::f.feature:4",
+                           sap_login=None)
+
+
+def _flaky(failures, error=BUSY_ERROR):
+    calls = []
+
+    def step(context):
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return "ok"
+
+    return step, calls
+
+
+def test_retry_kind_solo_errores_transitorios():
+    assert retry_kind(BUSY_ERROR) == session_health.BUSY
+    assert retry_kind(ComError(-2147352567, "The control could not be found by id.", None, None)) == \
+        session_health.ELEMENT_NOT_FOUND
+    assert retry_kind(ComError(-2147023174, "RPC server is unavailable", None, None)) is None
+    assert retry_kind(AssertionError("Could not be found by id")) is None
+    assert retry_kind(None) is None
+
+
+def test_politica_backoff_acotado_y_tags():
+    policy = RetryPolicy(attempts=3, backoff=1, max_backoff=3)
+    assert [policy.delay(n) for n in (1, 2, 3)] == [1, 2, 3]
+
+    retrier = StepRetrier(RetryPolicy(attempts=2))
+    step = lambda context: None
+    assert retrier.policy_for(step, _context(["retry(5)"])).attempts == 5
+    assert retrier.policy_for(step, _context(["retry", "no_retry"])).attempts == 1
+    assert retrier.policy_for(step, _context(["retry_from_checkpoint"])).mode == "checkpoint"
+
+
+def test_sin_reintento_global_solo_reintentan_los_escenarios_con_tag():
+    # Política base de before_all sin SAP_STEP_RETRY: un intento
+    retrier = StepRetrier(RetryPolicy(attempts=1, backoff=0), sleep=lambda delay: None)
+    step, calls = _flaky(1)
+    with pytest.raises(ComError):
+        retrier.run(step, _context(), (), {})
+    assert len(calls) == 1
+
+    step, calls = _flaky(2)
+    assert retrier.run(step, _context(["retry"]), (), {}) == "ok"
+    assert len(calls) == 3
+
+
+def test_paso_recuperado_tras_reintento():
+    delays = []
+    retrier = StepRetrier(RetryPolicy(attempts=3, backoff=0.5), sleep=delays.append)
+    step, calls = _flaky(2)
+
+    assert retrier.run(step, _context(), (), {}) == "ok"
+    record = retrier.snapshot()["f.feature:3::f.feature:4"]
+    assert len(calls) == 3 and delays == [0.5, 1.0]
+    assert record['retries'] == 2 and record['recovered'] == 1 and record['failed'] == 0
+    assert [error['kind'] for error in record['errors']] == [session_health.BUSY] * 2
+
+
+def test_aserciones_no_se_reintentan_y_los_intentos_se_agotan():
+    retrier = StepRetrier(RetryPolicy(attempts=2, backoff=0), sleep=lambda delay: None)
+    step, calls = _flaky(1, AssertionError("total distinto"))
+    with pytest.raises(AssertionError):
+        retrier.run(step, _context(), (), {})
+    assert len(calls) == 1
+
+    step, calls = _flaky(5)
+    with pytest.raises(ComError):
+        retrier.run(step, _context(), (), {})
+    assert len(calls) == 2
+    assert retrier.snapshot()["f.feature:3::f.feature:4"]['failed'] == 1
+
+
+def test_registro_con_otra_forma_desactiva_el_reintento():
+    assert StepRetrier().install(SimpleNamespace(steps=None)) is None
+    assert StepRetrier().install(SimpleNamespace(steps={'given': [object()]})) is None
+
+    matcher = SimpleNamespace(func=lambda context: "ok")
+    retrier = StepRetrier().install(SimpleNamespace(steps={'given': [matcher]}))
+    assert retrier is not None and matcher.func._retry_wrapped
+
+
+def test_annotate_tolera_formatters_sin_estado():
+    retrier = StepRetrier(RetryPolicy(attempts=2, backoff=0), sleep=lambda delay: None)
+    retrier.run(_flaky(1)[0], _context(), (), {})
+    step = SimpleNamespace(location="f.feature:4")
+    scenario = SimpleNamespace(location="f.feature:3", all_steps=[step])
+    entry = {'location': "f.feature:4", 'result': {'status': 'passed'}}
+    formatter = SimpleNamespace(current_feature_data={'elements': [{'location': "f.feature:3", 'steps': [entry]}]})
+
+    assert retrier.annotate(scenario, [SimpleNamespace(), formatter]) == 1
+    assert step.retries['recovered'] == 1
+    assert entry['result']['retries']['retries'] == 1
+
+
+def test_indice_de_inestabilidad(tmp_path):
+    store = FlakinessStore(tmp_path / "flakiness.json", alpha=0.5)
+    store.update({"a", "b"}, {"a": {'name': "paso a", 'failed': 0}})
+    steps = store.update({"a", "b"}, {})
+
+    assert steps["a"]['runs'] == 2 and steps["a"]['flaky_runs'] == 1
+    assert steps["a"]['score'] == 0.25
+    assert steps["b"]['score'] == 0.0
+    assert store.load() == steps
@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.reporting.timing_store import StepTimingStore, grouped_quantiles
+
+
+def test_grouped_quantiles_coincide_con_np_percentile():
+    rng = np.random.default_rng(7)
+    group_ids = rng.integers(0, 5, size=300)
+    values = rng.exponential(2.0, size=300)
+
+    groups, counts, sums, (p50, p95) = grouped_quantiles(group_ids, values, (50, 95))
+
+    for index, group in enumerate(groups):
+        members = values[group_ids == group]
+        assert counts[index] == members.size
+        assert np.isclose(sums[index], members.sum())
+        assert np.isclose(p50[index], np.percentile(members, 50))
+        assert np.isclose(p95[index], np.percentile(members, 95))
+
+
+def test_grouped_quantiles_grupo_de_un_valor():
+    groups, counts, _, (p99,) = grouped_quantiles(np.array([3, 1, 3]), np.array([4.0, 9.0, 2.0]), (99,))
+
+    assert groups.tolist() == [1, 3]
+    assert counts.tolist() == [1, 2]
+    assert p99[0] == 9.0
+    assert np.isclose(p99[1], np.percentile([4.0, 2.0], 99))
+
+
+def test_percentiles_por_paso_y_filtros(tmp_path):
+    store = StepTimingStore(tmp_path)
+    store.append_rows(run=['r1'] * 4, module=['m'] * 4, scenario=['s'] * 4,
+                      step=['Given a', 'Given a', 'When b', 'Given a'],
+                      status=[0, 0, 0, 1], duration=[1.0, 3.0, 5.0, 100.0])
+
+    rows = {row['step']: row for row in store.percentiles(by='step', q=(50,), status='passed')}
+
+    assert rows['Given a']['count'] == 2 and rows['Given a']['p50'] == 2.0
+    assert rows['When b']['mean'] == 5.0
+
+
+def test_reabrir_conserva_las_filas_confirmadas(tmp_path):
+    StepTimingStore(tmp_path).append_rows(run=['r1'], module=['m'], scenario=['s'], step=['Given a'],
+                                          status=[0], duration=[1.5])
+    store = StepTimingStore(tmp_path)
+
+    assert len(store) == 1
+    assert store.values('run') == ['r1']
+    assert store.summary(by='module') == [{'module': 'm', 'passed': 1, 'failed': 0, 'skipped': 0, 'other': 0,
+                                           'total_duration': 1.5}]
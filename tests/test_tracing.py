@@ -0,0 +1,65 @@
+import json
+import time
+
+from src.utils.tracing import Tracer, merge_traces
+
+
+def _spans(events):
+    return {event['name']: event for event in events if event['ph'] == 'X'}
+
+
+def test_spans_anidados_con_tiempos_contenidos(tmp_path):
+    tracer = Tracer("behave", tmp_path, run_id="run-1")
+    with tracer.span("scenario", "behave", scenario="Login"):
+        time.sleep(0.002)
+        with tracer.span("step", "behave"):
+            time.sleep(0.002)
+            tracer.complete("findById", "sap", time.perf_counter_ns() - 1_000_000, 1_000_000, {'element': "wnd[0]"})
+        time.sleep(0.002)
+
+    events = tracer._events
+    # Cada span se registra al cerrarse: primero el más interno
+    assert [event['name'] for event in events] == ["findById", "step", "scenario"]
+    scenario, step, call = events[2], events[1], events[0]
+    assert scenario['ts'] < step['ts'] <= call['ts']
+    assert call['ts'] + call['dur'] <= step['ts'] + step['dur'] < scenario['ts'] + scenario['dur']
+    assert scenario['dur'] >= 6000 and scenario['args'] == {'scenario': "Login"}
+    assert abs(scenario['ts'] / 1e6 - time.time()) < 5  # anclado al reloj de pared, en µs
+
+
+def test_write_cierra_spans_abiertos(tmp_path):
+    tracer = Tracer("behave", tmp_path, run_id="run-1")
+    tracer.begin('step', "Given abrir SAP", "behave", module="module_login")
+    tracer.begin('feature', "Login", "behave")
+    tracer.end('step', status="passed")
+
+    path = tracer.write()
+
+    events = json.loads(path.read_text(encoding='utf-8'))['traceEvents']
+    spans = _spans(events)
+    assert path == tmp_path / "run-1" / f"behave_{tracer.pid}.json"
+    assert spans["Given abrir SAP"]['args'] == {'module': "module_login", 'status': "passed"}
+    assert spans["Login"]['args'] == {'unfinished': True}
+    assert any(event['ph'] == 'M' and event['name'] == 'process_name' for event in events)
+
+
+def test_merge_de_trazas_por_proceso(tmp_path):
+    runner = Tracer("run_all_modules", tmp_path, run_id="run-1")
+    worker = Tracer("behave", tmp_path, run_id="run-1")
+    worker.pid = runner.pid + 1
+    with runner.span("module", "runner", module="module_login"):
+        with worker.span("scenario", "behave"):
+            pass
+    runner.write()
+    worker.write()
+    (tmp_path / "run-1" / "roto.json").write_text("{", encoding='utf-8')
+
+    merged = merge_traces(tmp_path / "run-1")
+
+    assert merged == tmp_path / "run-1.trace.json"
+    events = json.loads(merged.read_text(encoding='utf-8'))['traceEvents']
+    spans = _spans(events)
+    assert {spans["module"]['pid'], spans["scenario"]['pid']} == {runner.pid, worker.pid}
+    assert spans["module"]['ts'] <= spans["scenario"]['ts']
+    assert sorted(event['args']['name'] for event in events if event['name'] == 'process_name') == \
+        sorted([f"behave ({worker.pid})", f"run_all_modules ({runner.pid})"])